@@ -0,0 +1,49 @@
+"""
+Batch execution benchmarks for the JobQueue of the Encapsulator.
+
+A batch of CPU bound pure Python simulations is run on the thread pool of the job queue, which was the original
+implementation of the /process_batch endpoint, and on its pool of worker processes.
+
+usage: python -m benchmarks.bench_batch [n_items ...]
+"""
+import sys
+from time import perf_counter
+
+from digital_twin_distiller.jobqueue import JobQueue
+from digital_twin_distiller.simulationproject import SimulationProject
+
+
+class LoopProject(SimulationProject):
+    def update_input(self):
+        pass
+
+    def run(self):
+        n = self._input["n"]
+        self._output = {"s": sum(i * i % 7 for i in range(n))}
+
+
+def measure(n_items, process, max_jobs=4):
+    queue = JobQueue(max_workers=max_jobs)
+
+    # the pools are started before the measurement
+    queue.submit(LoopProject(), {"n": 1}, process=process).future.result()
+
+    start = perf_counter()
+    jobs = [queue.submit(LoopProject(), {"n": 2_000_000}, process=process) for _ in range(n_items)]
+    outputs = [job.future.result() for job in jobs]
+    elapsed = perf_counter() - start
+    queue.shutdown()
+    return elapsed, outputs
+
+
+def main(sizes):
+    print(f"{'items':>6} {'threads [s]':>12} {'processes [s]':>14}")
+    for n in sizes:
+        t_threads, expected = measure(n, process=False)
+        t_processes, outputs = measure(n, process=True)
+        assert expected == outputs
+        print(f"{n:>6} {t_threads:>12.3f} {t_processes:>14.3f}")
+
+
+if __name__ == "__main__":
+    main([int(ni) for ni in sys.argv[1:]] or [4, 8])
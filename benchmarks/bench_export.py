@@ -0,0 +1,95 @@
+"""
+Export time benchmarks for the solver scripts.
+
+A FEMM script of a polygon with n sides is exported directly to a file handle, which gets a write call for every
+written piece, and to the in-memory script buffer of the platform, which writes the file with a single call when it
+is closed. The write calls are counted on the file objects, Python buffers them before the system calls.
+
+usage: python -m benchmarks.bench_export [n_segments ...]
+"""
+import sys
+from math import cos, pi, sin
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from unittest.mock import patch
+
+from digital_twin_distiller.geometry import Geometry
+from digital_twin_distiller.metadata import FemmMetadata
+from digital_twin_distiller.objects import Line, Node
+from digital_twin_distiller.platforms.femm import Femm
+from digital_twin_distiller.snapshot import Snapshot
+
+
+class CountingFile:
+    """File handle that counts its write calls."""
+
+    def __init__(self, path):
+        self.f = open(path, "w")
+        self.name = path
+        self.writes = 0
+
+    def write(self, str_):
+        self.writes += 1
+        return self.f.write(str_)
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def polygon_snapshot(n: int, directory):
+    metadata = FemmMetadata()
+    metadata.problem_type = "magnetic"
+    metadata.coordinate_type = "planar"
+    metadata.file_script_name = Path(directory) / "femm_script"
+    metadata.file_metrics_name = Path(directory) / "femm_metrics.csv"
+    metadata.unit = "meters"
+
+    geo = Geometry()
+    pts = [Node(100 * cos(2 * pi * i / n), 100 * sin(2 * pi * i / n)) for i in range(n)]
+    for i in range(n):
+        geo.add_line(Line(pts[i], pts[(i + 1) % n]))
+
+    snapshot = Snapshot(Femm(metadata))
+    snapshot.add_geometry(geo)
+    return snapshot
+
+
+def bench_file_handle(snapshot):
+    f = CountingFile(snapshot.platform.metadata.file_script_name)
+    start = perf_counter()
+    snapshot.export(f)
+    return perf_counter() - start, f.writes
+
+
+def bench_buffer(snapshot):
+    files = []
+
+    def counting_open(path, mode="r", *args, **kwargs):
+        files.append(CountingFile(path))
+        return files[-1]
+
+    start = perf_counter()
+    with patch("digital_twin_distiller.platforms.platform.open", counting_open, create=True):
+        snapshot.export()
+    return perf_counter() - start, sum(fi.writes for fi in files)
+
+
+def main(sizes):
+    print(f"{'segments':>10} {'file handle [s]':>16} {'writes':>9} {'buffer [s]':>11} {'writes':>7}")
+    with TemporaryDirectory() as directory:
+        for n in sizes:
+            snapshot = polygon_snapshot(n, directory)
+            t_file, w_file = bench_file_handle(snapshot)
+            t_buffer, w_buffer = bench_buffer(snapshot)
+            print(f"{n:>10} {t_file:>16.3f} {w_file:>9} {t_buffer:>11.3f} {w_buffer:>7}")
+
+
+if __name__ == "__main__":
+    main([int(ni) for ni in sys.argv[1:]] or [10_000, 50_000, 100_000])
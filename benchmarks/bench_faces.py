@@ -0,0 +1,114 @@
+"""
+Face extraction benchmarks for the NgSolve platform.
+
+The geometries of the example motors and polar grids of growing size are exported to an NgSolve platform, then the
+faces of its graph are found by the planar face walk. The enumeration of all simple cycles, which was used before, is
+shown for comparison, it is stopped after max_cycles cycles.
+
+usage: python -m benchmarks.bench_faces [n_sectors ...]
+"""
+import importlib.util
+import inspect
+import os
+import shutil
+import sys
+from itertools import islice
+from math import cos, pi, sin
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import networkx as nx
+
+from digital_twin_distiller.metadata import NgElectrostaticMetadata
+from digital_twin_distiller.model import BaseModel
+from digital_twin_distiller.objects import Line, Node
+from digital_twin_distiller.platforms.ng_electrostatic import NgElectrostatics
+
+EXAMPLES = Path(__file__).parent.parent / "examples" / "fem_simulations"
+MOTORS = ["bldc-motor-simulation", "switched-reluctance-motor-simulation"]
+
+max_cycles = 1000
+
+
+def ng_platform(elements):
+    metadata = NgElectrostaticMetadata()
+    metadata.file_script_name = "bench_faces"
+    platform = NgElectrostatics(metadata)
+    for ei in elements:
+        platform.export_geometry_element(ei)
+    return platform
+
+
+def motor_elements(name):
+    """Builds the example motor in a temporary copy of its directory and gives back its geometry."""
+    with TemporaryDirectory() as directory:
+        model_dir = Path(directory) / name
+        shutil.copytree(EXAMPLES / name, model_dir)
+
+        spec = importlib.util.spec_from_file_location("model", model_dir / "model.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["model"] = module
+
+        # some models export their parts into the working directory
+        cwd = os.getcwd()
+        os.chdir(model_dir)
+        try:
+            spec.loader.exec_module(module)
+            model_class = next(
+                ci
+                for ci in vars(module).values()
+                if inspect.isclass(ci) and issubclass(ci, BaseModel) and ci.__module__ == "model"
+            )
+            model = model_class()
+            model.build()
+        finally:
+            os.chdir(cwd)
+            del sys.modules["model"]
+
+    snapshot = model.snapshot
+    return [*snapshot.nodes.values(), *snapshot.lines.values(), *snapshot.circle_arcs.values()]
+
+
+def polar_grid(n_rings, n_sectors):
+    """Lines of a polar grid, like the slots of a stator, it has n_rings * n_sectors faces."""
+    nodes = [
+        [Node((10 + r) * cos(2 * pi * k / n_sectors), (10 + r) * sin(2 * pi * k / n_sectors)) for k in range(n_sectors)]
+        for r in range(n_rings + 1)
+    ]
+    lines = [Line(ring[k], ring[(k + 1) % n_sectors]) for ring in nodes for k in range(n_sectors)]
+    lines += [Line(nodes[r][k], nodes[r + 1][k]) for r in range(n_rings) for k in range(n_sectors)]
+    return lines
+
+
+def bench(name, elements):
+    platform = ng_platform(elements)
+
+    # the faces of the platform graph are cached, a copy of it is walked every time
+    t_faces = float("inf")
+    for _ in range(3):
+        G = platform.G.copy()
+        start = perf_counter()
+        faces = platform._find_faces(G)
+        t_faces = min(t_faces, perf_counter() - start)
+
+    start = perf_counter()
+    n_cycles = sum(1 for _ in islice(nx.simple_cycles(platform.G), max_cycles))
+    t_cycles = perf_counter() - start
+
+    cycles = f"{n_cycles}" if n_cycles < max_cycles else f">={max_cycles}"
+    edges = platform.G.number_of_edges()
+    print(f"{name:>38} {edges:>7} {len(faces):>7} {t_faces:>10.4f} {cycles:>10} {t_cycles:>11.3f}")
+
+
+def main(sizes):
+    print(f"{'geometry':>38} {'edges':>7} {'faces':>7} {'faces [s]':>10} {'cycles':>10} {'cycles [s]':>11}")
+    for name in MOTORS:
+        bench(name, motor_elements(name))
+
+    for n in sizes:
+        bench(f"polar grid 3 x {n}", polar_grid(3, n))
+
+
+if __name__ == "__main__":
+    main([int(ni) for ni in sys.argv[1:]] or [12, 48, 200, 1000])
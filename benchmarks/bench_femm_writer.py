@@ -0,0 +1,49 @@
+"""
+Command generation benchmarks for the FemmWriter.
+
+The add_segment commands of n segments are generated with a string.Template for every command, which was the
+original implementation, and with the precompiled command table.
+
+usage: python -m benchmarks.bench_femm_writer [n_segments ...]
+"""
+import sys
+from string import Template
+from time import perf_counter
+
+import numpy as np
+
+from digital_twin_distiller.femm_wrapper import FemmWriter
+
+
+def template_segments(segments):
+    cmds = []
+    for x1, y1, x2, y2 in segments.tolist():
+        cmd = Template("mi_addsegment($x1_coord, $y1_coord, $x2_coord, $y2_coord)")
+        cmds.append(cmd.substitute(x1_coord=x1, y1_coord=y1, x2_coord=x2, y2_coord=y2))
+    return cmds
+
+
+def single_segments(segments):
+    writer = FemmWriter()
+    return [writer.add_segment(x1, y1, x2, y2) for x1, y1, x2, y2 in segments.tolist()]
+
+
+def measure(emitter, segments):
+    start = perf_counter()
+    cmds = emitter(segments)
+    return perf_counter() - start, cmds
+
+
+def main(sizes):
+    print(f"{'segments':>10} {'template [s]':>13} {'add_segment [s]':>16}")
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        segments = rng.uniform(-100.0, 100.0, (n, 4))
+        t_template, expected = measure(template_segments, segments)
+        t_single, single = measure(single_segments, segments)
+        assert expected == single
+        print(f"{n:>10} {t_template:>13.3f} {t_single:>16.3f}")
+
+
+if __name__ == "__main__":
+    main([int(ni) for ni in sys.argv[1:]] or [10_000, 50_000, 200_000])
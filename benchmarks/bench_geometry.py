@@ -0,0 +1,66 @@
+"""
+Build time benchmarks for the Geometry class.
+
+Every segment shares its endpoints with its neighbours, so half of the inserted nodes have to be merged with an
+already existing one.
+
+usage: python -m benchmarks.bench_geometry [n_segments ...]
+"""
+import sys
+from math import cos, pi, sin
+from time import perf_counter
+
+from digital_twin_distiller.geometry import Geometry
+from digital_twin_distiller.objects import Line, Node
+
+
+def polygon_segments(n: int, r: float = 100.0):
+    """Gives back the endpoint coordinates of the n sides of a regular polygon."""
+    pts = [(r * cos(2 * pi * i / n), r * sin(2 * pi * i / n)) for i in range(n)]
+    return [(*pts[i], *pts[(i + 1) % n]) for i in range(n)]
+
+
+def bench_node_insertion(n: int):
+    segments = polygon_segments(n)
+    geo = Geometry()
+
+    start = perf_counter()
+    for x0, y0, x1, y1 in segments:
+        geo.append_node(Node(x0, y0))
+        geo.append_node(Node(x1, y1))
+    elapsed = perf_counter() - start
+
+    assert len(geo.nodes) == n
+    return elapsed
+
+
+def bench_line_insertion(n: int):
+    segments = polygon_segments(n)
+    geo = Geometry()
+
+    start = perf_counter()
+    for x0, y0, x1, y1 in segments:
+        geo.add_line(Line(Node(x0, y0), Node(x1, y1)))
+
+    # every segment is added again in the opposite direction, these have to be filtered out
+    for x0, y0, x1, y1 in segments:
+        geo.add_line(Line(Node(x1, y1), Node(x0, y0)))
+
+    geo.merge_lines()
+    elapsed = perf_counter() - start
+
+    assert len(geo.nodes) == n
+    assert len(geo.lines) == n
+    return elapsed
+
+
+def main(sizes):
+    print(f"{'segments':>10} {'node insertion [s]':>20} {'add_line [s]':>14} {'per segment [us]':>18}")
+    for n in sizes:
+        t_node = bench_node_insertion(n)
+        t_line = bench_line_insertion(n)
+        print(f"{n:>10} {t_node:>20.3f} {t_line:>14.3f} {t_line / n * 1e6:>18.2f}")
+
+
+if __name__ == "__main__":
+    main([int(ni) for ni in sys.argv[1:]] or [10_000, 50_000, 100_000, 200_000])
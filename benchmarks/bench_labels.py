@@ -0,0 +1,49 @@
+"""
+Label assignment benchmarks for the NgSolve platform.
+
+The faces of a polar grid get a label point in their centers, and the labels are located with a shapely contains test
+for every face and label pair, which was the original implementation, and with the batch locator of the planar module.
+
+usage: python -m benchmarks.bench_labels [n_sectors ...]
+"""
+import sys
+from time import perf_counter
+
+from shapely.geometry import Point
+
+from benchmarks.bench_faces import polar_grid
+from digital_twin_distiller.planar import locate_points, planar_faces
+
+
+def shapely_labels(faces, points):
+    located = []
+    polygons = [face.polygon() for face in faces]
+    for point in points:
+        containing = [k for k, polygon in enumerate(polygons) if polygon.contains(Point(point))]
+        located.append(containing[0] if containing else -1)
+    return located
+
+
+def batch_labels(faces, points):
+    return locate_points(faces, points).tolist()
+
+
+def measure(locator, faces, points):
+    start = perf_counter()
+    located = locator(faces, points)
+    return perf_counter() - start, located
+
+
+def main(sizes):
+    print(f"{'faces':>8} {'labels':>8} {'shapely [s]':>12} {'batch [s]':>10}")
+    for n in sizes:
+        faces = planar_faces([(li.start_pt, li.end_pt) for li in polar_grid(3, n)])
+        points = [tuple(face.rings()[0].mean(axis=0)) for face in faces]
+        t_shapely, expected = measure(shapely_labels, faces, points)
+        t_batch, located = measure(batch_labels, faces, points)
+        assert expected == located == list(range(len(faces)))
+        print(f"{len(faces):>8} {len(points):>8} {t_shapely:>12.3f} {t_batch:>10.3f}")
+
+
+if __name__ == "__main__":
+    main([int(ni) for ni in sys.argv[1:]] or [100, 300, 1000])
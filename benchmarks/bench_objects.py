@@ -0,0 +1,52 @@
+"""
+Construction time and memory benchmarks for the geometrical objects.
+
+Every line gets two new nodes, like the lines of a rotor geometry, which is rebuilt in every step of a sweep.
+
+usage: python -m benchmarks.bench_objects [n_objects ...]
+"""
+import sys
+import tracemalloc
+from time import perf_counter
+
+from digital_twin_distiller.objects import CircleArc, Line, Node
+
+
+def build_nodes(n: int):
+    return [Node(i, 0.0) for i in range(n)]
+
+
+def build_lines(n: int):
+    return [Line(Node(i, 0.0), Node(i, 1.0)) for i in range(n)]
+
+
+def build_arcs(n: int):
+    return [CircleArc(Node(i - 1.0, 0.0), Node(i, 0.0), Node(i + 1.0, 0.0)) for i in range(n)]
+
+
+def measure(builder, n: int):
+    """Gives back the construction time and the allocated memory of n objects."""
+    start = perf_counter()
+    objects = builder(n)
+    elapsed = perf_counter() - start
+    del objects
+
+    tracemalloc.start()
+    objects = builder(n)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+
+    return elapsed, memory
+
+
+def main(sizes):
+    print(f"{'objects':>10} {'type':>10} {'time [s]':>10} {'per object [us]':>16} {'per object [B]':>15}")
+    for n in sizes:
+        for name, builder in (("Node", build_nodes), ("Line", build_lines), ("CircleArc", build_arcs)):
+            elapsed, memory = measure(builder, n)
+            print(f"{n:>10} {name:>10} {elapsed:>10.3f} {elapsed / n * 1e6:>16.2f} {memory / n:>15.0f}")
+
+
+if __name__ == "__main__":
+    main([int(ni) for ni in sys.argv[1:]] or [10_000, 100_000])
@@ -11,10 +11,12 @@ from digital_twin_distiller.boundaries import (
     PeriodicBoundaryCondition,
 )
 from digital_twin_distiller.geometry import Geometry
+from digital_twin_distiller.geometry_arrays import GeometryArrays
 from digital_twin_distiller.material import Material
 from digital_twin_distiller.metadata import FemmMetadata, Agros2DMetadata, NgSolveMetadata, NgElectrostaticMetadata
 from digital_twin_distiller.modelpiece import ModelPiece
 from digital_twin_distiller.platforms import *
+from digital_twin_distiller.resultcache import ResultCache
 from digital_twin_distiller.snapshot import Snapshot
 from digital_twin_distiller.model import BaseModel
 
@@ -0,0 +1,56 @@
+"""
+Affine transformations of the plane.
+
+The transformations are 3 x 3 matrices acting on homogeneous (x, y, 1) coordinates, so a sequence of translations,
+rotations, scalings and mirrorings is composed into one matrix by matrix products, and an (N, 2) coordinate array is
+transformed by one numpy call.
+"""
+from functools import reduce
+
+import numpy as np
+
+
+def translation(dx, dy):
+    """Gives back the matrix of the translation with (dx, dy)."""
+    return np.array([[1.0, 0.0, dx], [0.0, 1.0, dy], [0.0, 0.0, 1.0]])
+
+
+def rotation(alpha, ref_point=(0, 0)):
+    """Gives back the matrix of the counter-clockwise rotation around the reference point with alpha degrees."""
+    x, y = tuple(ref_point)
+    alpha = np.radians(alpha)
+    c, s = np.cos(alpha), np.sin(alpha)
+    return np.array([[c, -s, x - c * x + s * y], [s, c, y - s * x - c * y], [0.0, 0.0, 1.0]])
+
+
+def scaling(sx, sy):
+    """Gives back the matrix of the scaling with sx and sy from the origin."""
+    return np.array([[sx, 0.0, 0.0], [0.0, sy, 0.0], [0.0, 0.0, 1.0]])
+
+
+def reflection(p1=(0, 0), p2=(0, 1)):
+    """Gives back the matrix of the mirroring on the line defined by p1 and p2."""
+    p1 = np.array(tuple(p1), dtype=float)
+    u = np.array(tuple(p2), dtype=float) - p1
+    m = 2 * np.outer(u, u) / (u @ u) - np.eye(2)
+
+    matrix = np.eye(3)
+    matrix[:2, :2] = m
+    matrix[:2, 2] = p1 - m @ p1
+    return matrix
+
+
+def compose(*matrices):
+    """Gives back the matrix of the transformations applied in the given order, the first one is applied first."""
+    return reduce(lambda a, b: b @ a, matrices, np.eye(3))
+
+
+def apply(matrix, points):
+    """Transforms the (N, 2) array of points, gives back a new array."""
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    return points @ matrix[:2, :2].T + matrix[:2, 2]
+
+
+def reverses_orientation(matrix):
+    """The transformation mirrors the plane, the counter-clockwise curves become clockwise."""
+    return np.linalg.det(matrix[:2, :2]) < 0
@@ -1,17 +1,37 @@
+import asyncio
+import hashlib
+import importlib
 import json
 import os.path
 import subprocess
+import sys
 import time
-import traceback
+import warnings
 from pathlib import Path
-from typing import Optional
+from threading import Thread
+from typing import List, Optional
 
 import uvicorn
-from fastapi import FastAPI, Response, status
+from fastapi import APIRouter, FastAPI, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Extra, ValidationError
 
+from digital_twin_distiller.jobqueue import Job, JobQueue, exception_info
+from digital_twin_distiller.model import BaseModel as Model
 from digital_twin_distiller.modelpaths import ModelDir
+from digital_twin_distiller.resultcache import ResultCache
+from digital_twin_distiller.snapshot import Snapshot
+
+# environment variable of the JSON settings of the worker processes
+WORKER_SETTINGS = "DIGITAL_TWIN_DISTILLER_WORKER_SETTINGS"
+
+# the hash of the documentation sources is stored in the built site
+DOCS_HASH = "docs.sha256"
+
+# the app of the last Encapsulator, it is given back by the deprecated module level app
+_last_app = None
 
 
 class InputJsonSim(BaseModel):
@@ -36,7 +56,7 @@ class InputJsonSim(BaseModel):
 
 
 # Defining the API
-app = FastAPI(title="{} API", docs_url="/apidocs", redoc_url=None)
+router = APIRouter()
 
 tags_metadata = [
     {
@@ -47,6 +67,7 @@ tags_metadata = [
             "url": "http://montana.ai",
         },
     },
+    {"name": "jobs", "description": "Submit simulations, poll their status, fetch their results or cancel them."},
     {"name": "ping", "description": "Endpoint for pinging server."},
     {
         "name": "docs",
@@ -64,29 +85,161 @@ tags_metadata = [
 ]
 
 
-@app.post("/process_sim", include_in_schema=True, tags=["process_sim"])
-async def process_sim(item: InputJsonSim):
+@router.post("/process_sim", include_in_schema=True, tags=["process_sim"])
+async def process_sim(item: InputJsonSim, request: Request):
     """
     Endpoint for performing the project.run() method on data sent for the API in JSON format.
     The endpoint performs automatic input validation via the Item class.
+    The simulation runs in the job queue, so the server can answer the other requests in the meantime.
     """
     data = json.loads(item.json())
-    app.project._output.clear()
+    job = request.app.jobs.submit(request.app.project, data)
     try:
-        app.project._input = data
-        app.project.update_input()
-        app.project.run()
-    except Exception as e:
-        app.project._output["exception"] = {
-            "type": e.__class__.__name__,
-            "message": str(e),
-            "traceback": traceback.format_exc(),
-        }
+        return await asyncio.wrap_future(job.future)
+    except asyncio.CancelledError:
+        # the client has disconnected or the server is shutting down, a queued simulation is not started
+        request.app.jobs.cancel(job.id)
+        raise
+
+
+@router.post("/process_batch", include_in_schema=True, tags=["process_sim"])
+async def process_batch(items: List[dict], request: Request):
+    """
+    Endpoint for running more simulations with one request. Every item of the list is the same as the input of the
+    /process_sim endpoint, the simulations run at the same time in the worker processes of the job queue, or in its
+    threads if the project cannot be pickled. The outputs are given back in the order of the items, the invalid items
+    and the failed simulations are reported in their own outputs.
+    """
+    outputs = []
+    for item in items:
+        try:
+            data = json.loads(InputJsonSim(**item).json())
+        except ValidationError as e:
+            outputs.append({"exception": exception_info(e)})
+        else:
+            outputs.append(request.app.jobs.submit(request.app.project, data, process=True))
+
+    jobs = [job for job in outputs if isinstance(job, Job)]
+    try:
+        for i, job in enumerate(outputs):
+            if isinstance(job, Job):
+                # the output of the job is set before its future is done, the errors of the pool are reported in it
+                await asyncio.wait({asyncio.wrap_future(job.future)})
+                outputs[i] = job.output
+    except asyncio.CancelledError:
+        # the queued simulations of the batch are not started
+        for job in jobs:
+            request.app.jobs.cancel(job.id)
+        raise
+
+    return outputs
+
+
+def _format_event(event: str, data, fmt: str) -> str:
+    data = jsonable_encoder(data)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return json.dumps({"event": event, "data": data}) + "\n"
+
+
+async def _stream_events(job: Job, fmt: str):
+    # the events are passed to the event loop by the thread of the job, so no thread waits for them
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    job.events.subscribe(lambda event: loop.call_soon_threadsafe(events.put_nowait, event))
+    try:
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+
+            yield _format_event(*event, fmt)
     finally:
-        return app.project._output
+        # the client has disconnected, the simulation is stopped at its next partial result
+        job.events.subscribe(None)
+        job.stop.set()
+
 
+@router.post("/process_stream", include_in_schema=True, tags=["process_sim"])
+async def process_stream(item: InputJsonSim, request: Request, format: str = "ndjson"):
+    """
+    Endpoint for running a simulation and streaming its partial results as they are ready. The input is the same as
+    the input of the /process_sim endpoint. The registered simulation should be a generator function yielding the
+    partial results, e.g. the result of every step of a sweep.
 
-@app.get("/ping", include_in_schema=True, tags=["ping"])
+    The events are sent as newline delimited JSON ({"event": ..., "data": ...} lines, format=ndjson) or as server-sent
+    events (format=sse). Every partial result is a "partial" event, the last event is the "result" event with the same
+    output as the /process_sim endpoint. The simulation is stopped if the client disconnects.
+    """
+    if format not in {"ndjson", "sse"}:
+        return JSONResponse({"detail": "The format should be ndjson or sse."}, status.HTTP_400_BAD_REQUEST)
+
+    data = json.loads(item.json())
+    job = request.app.jobs.submit(request.app.project, data, stream=True)
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(_stream_events(job, format), media_type=media_type, headers={"X-Job-Id": job.id})
+
+
+@router.post("/jobs", include_in_schema=True, tags=["jobs"], status_code=status.HTTP_202_ACCEPTED)
+def submit_job(item: InputJsonSim, request: Request):
+    """
+    Submits a simulation to the job queue and gives back the id of the job. The input is the same as the input of the
+    /process_sim endpoint.
+    """
+    data = json.loads(item.json())
+    return request.app.jobs.submit(request.app.project, data).info()
+
+
+@router.get("/jobs/{job_id}", include_in_schema=True, tags=["jobs"])
+def job_status(job_id: str, request: Request, response: Response):
+    """
+    Gives back the status of the job: queued, running, finished, failed or cancelled.
+    """
+    job = request.app.jobs.get(job_id)
+    if job is None:
+        response.status_code = status.HTTP_404_NOT_FOUND
+        return {"job_id": job_id, "status": "unknown"}
+
+    return job.info()
+
+
+@router.get("/jobs/{job_id}/result", include_in_schema=True, tags=["jobs"])
+def job_result(job_id: str, request: Request, response: Response):
+    """
+    Gives back the output of a finished job, it is the same as the output of the /process_sim endpoint. If the job is
+    not finished yet, then its status is given back with 409 status code.
+    """
+    job = request.app.jobs.get(job_id)
+    if job is None:
+        response.status_code = status.HTTP_404_NOT_FOUND
+        return {"job_id": job_id, "status": "unknown"}
+
+    if job.status not in {job.FINISHED, job.FAILED}:
+        response.status_code = status.HTTP_409_CONFLICT
+        return job.info()
+
+    return job.output
+
+
+@router.delete("/jobs/{job_id}", include_in_schema=True, tags=["jobs"])
+def cancel_job(job_id: str, request: Request, response: Response):
+    """
+    Cancels a queued job or stops a running streaming job at its next partial result. The other running jobs cannot be
+    cancelled, then the status is given back with 409 status code.
+    """
+    job = request.app.jobs.get(job_id)
+    if job is None:
+        response.status_code = status.HTTP_404_NOT_FOUND
+        return {"job_id": job_id, "status": "unknown"}
+
+    if not request.app.jobs.cancel(job_id):
+        response.status_code = status.HTTP_409_CONFLICT
+
+    return job.info()
+
+
+@router.get("/ping", include_in_schema=True, tags=["ping"])
 def ping():
     """
     Pings the server to check if it is available.
@@ -97,24 +250,156 @@ def ping():
     return result_json
 
 
+def create_app(project=None, max_jobs: int = 4):
+    """
+    Creates the API of the project. Every app has its own project and job queue, so more apps can be served at the
+    same time, e.g. by the worker processes of uvicorn or gunicorn.
+    :param project: SimulationProject instance
+    :param max_jobs: the maximal number of the simulations running at the same time
+    """
+    app = FastAPI(title="{} API", docs_url="/apidocs", redoc_url=None)
+    app.include_router(router)
+    app.project = project
+    app.jobs = JobQueue(max_workers=max_jobs)
+    if project is not None:
+        app.title = app.title.format(project.app_name)
+
+    return app
+
+
+def create_worker_app():
+    """
+    App factory of the worker processes started by Encapsulator.run. It creates the app from the settings stored in
+    the environment by the Encapsulator, the project and its model class are imported by their import strings, so
+    every worker has its own copy of the project.
+    """
+    settings = json.loads(os.environ[WORKER_SETTINGS])
+
+    ModelDir.set_base(settings["model_dir"])
+    if settings["result_cache"] is not None:
+        set_result_cache(*settings["result_cache"])
+
+    project = import_object(settings["project"])
+    # the model is set in the main block of the simulation scripts usually, which is not run by the workers
+    if settings["model"] is not None:
+        project.set_model(import_object(settings["model"]))
+
+    worker_app = create_app(project, settings["max_jobs"])
+    for endpoint, site_path in settings["mounts"]:
+        worker_app.mount(endpoint, StaticFiles(directory=site_path, html=True, check_dir=False), name="documentation")
+
+    return worker_app
+
+
+def import_object(import_string: str):
+    """Gives back the object of a "module:attribute" import string, the attribute can be a dotted path."""
+    module_name, _, name = import_string.partition(":")
+    obj = importlib.import_module(module_name)
+    for attribute in name.split("."):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def project_import_string(project) -> str:
+    """
+    Gives back the "module:attribute" import string of a project defined on module level. The project is searched in
+    the main module, in the module of its class and in the modules of its registered simulations.
+    """
+    modules = ["__main__", type(project).__module__]
+    modules.extend(func.__module__ for func in getattr(project, "simulations", {}).values())
+    for module_name in modules:
+        for name, value in vars(sys.modules.get(module_name, object)).items():
+            if value is project:
+                return f"{module_name}:{name}"
+
+    raise ValueError("The project should be defined on module level to be imported by the worker processes.")
+
+
+def set_result_cache(directory, max_entries=None, max_size=None):
+    """
+    Sets a result cache in the directory for every model and a solution store for every snapshot of this process, and
+    turns on the deduplication of the snapshots. The caches can be shared by more processes, the cache files are
+    written atomically.
+    :param directory: the cache directory
+    :param max_entries: the maximal number of the entries of the caches, None means no limit
+    :param max_size: the maximal size of the caches in bytes, None means no limit
+    """
+    directory = Path(directory)
+    Model.result_cache = ResultCache(directory / "models", max_entries, max_size)
+    Snapshot.solution_store = ResultCache(directory / "solutions", max_entries, max_size)
+    Snapshot.deduplicate = True
+
+
+def docs_hash(docs_path) -> str:
+    """
+    Gives back the sha256 hash of the documentation sources, i.e. the names and the contents of the files in the docs
+    folder except the built site.
+    """
+    docs_path = Path(docs_path)
+    h = hashlib.sha256()
+    for path in sorted(docs_path.rglob("*")):
+        relative = path.relative_to(docs_path)
+        if relative.parts[0] == "site" or not path.is_file():
+            continue
+
+        h.update(relative.as_posix().encode())
+        h.update(b"\0")
+        h.update(path.read_bytes())
+        h.update(b"\0")
+
+    return h.hexdigest()
+
+
+def build_docs(docs_path, force=False) -> bool:
+    """
+    Builds the mkdocs documentation in the docs folder, if its sources changed since the last build.
+    :param docs_path: path to the docs folder containing mkdocs.yml
+    :param force: build the documentation even if the sources did not change
+    :return: True if the documentation was built, False if the last build is up to date
+    """
+    docs_path = Path(docs_path)
+    site_path = docs_path / "site"
+    stamp = site_path / DOCS_HASH
+
+    source_hash = docs_hash(docs_path)
+    if not force and stamp.exists() and stamp.read_text() == source_hash:
+        return False
+
+    subprocess.run("mkdocs build", shell=True, check=True, cwd=docs_path)
+    (site_path / "images").mkdir(parents=True, exist_ok=True)
+    stamp.write_text(source_hash)
+    return True
+
+
 class Encapsulator:
     """
     Server for running a custom project as an API.
     """
 
-    def __init__(self, project):
+    # build the documentation after the server started, the docs endpoint is empty until the build is finished
+    docs_in_background = False
+
+    def __init__(self, project, max_jobs: int = 4, workers: int = 1):
         """
         :param project: SimulationProject instance
+        :param max_jobs: the maximal number of the simulations running at the same time in a worker process
+        :param workers: the number of the worker processes of the server
         """
-        self.app = app
-        self.app.project = project
-        self.app.title = self.app.title.format(project.app_name)
-        # self.workers = self.number_of_workers()
+        self.project = project
+        self.app = create_app(project, max_jobs)
+        global _last_app
+        _last_app = self.app
+        self.max_jobs = max_jobs
+        self.workers = workers
         self.host = "127.0.0.1"
         self.port = 5000
         self.cert_file_path = None
         self.key_file_path = None
 
+        # these are repeated in the worker processes
+        self.mounts = []
+        self.result_cache = None
+
         self.set_endpoint_for_docs(ModelDir.DOCS)
 
     def set_cert_file_path(self, cert_file_path):
@@ -123,28 +408,57 @@ class Encapsulator:
     def set_key_file_path(self, key_file_path):
         self.key_file_path = key_file_path
 
-    def set_endpoint_for_docs(self, docs_path, endpoint="/", build=True):
+    def set_endpoint_for_docs(self, docs_path, endpoint="/", build=True, background=None):
         """
-        Builds mkdocs documentation and deploys the documentation at the given endpoint.
+        Builds mkdocs documentation and deploys the documentation at the given endpoint. The documentation is rebuilt
+        only if its sources changed since the last build.
         :param docs_path: path to the docs folder containing mkdocs.yml
         :param endpoint: endpoint to publish built docs to
         :param build: whether to build documentation or not
+        :param background: build the documentation in a background thread, the default is docs_in_background
         :return:
         """
-        if build:
-            self.build_docs(docs_path)
+        if background is None:
+            background = self.docs_in_background
+
         site_path = Path(docs_path).joinpath("site")
-        self.app.mount(endpoint, StaticFiles(directory=site_path, html=True, check_dir=True), name="documentation")
+        if build and background:
+            Thread(target=self.build_docs, args=(docs_path,), name="mkdocs", daemon=True).start()
+        elif build:
+            self.build_docs(docs_path)
+
+        # the site folder may not exist yet, if it is built in the background
+        self.app.mount(endpoint, StaticFiles(directory=site_path, html=True, check_dir=False), name="documentation")
+        self.mounts.append((endpoint, site_path))
+
+    def build_docs(self, docs_path, force=False):
+        """
+        Build the documentation with mkdocs, if its sources changed since the last build.
+        """
+        return build_docs(docs_path, force)
+
+    def set_max_jobs(self, max_jobs: int):
+        """
+        Set the maximal number of the simulations running at the same time, the other jobs wait in the queue.
+        :param max_jobs: int, e.g. 4
+        """
+        self.max_jobs = int(max_jobs)
+        self.app.jobs.set_max_workers(max_jobs)
+
+    def set_workers(self, workers: int):
+        """
+        Set the number of the worker processes. Every worker has its own copy of the project and its own job queue.
+        :param workers: int, e.g. 4
+        """
+        self.workers = int(workers)
 
-    def build_docs(self, docs_path):
+    def set_result_cache(self, directory, max_entries=None, max_size=None):
         """
-        Build the documentation with mkdocs.
+        Share the results of the models and the solutions of the solver scripts between the worker processes through
+        a cache directory. See the set_result_cache function.
         """
-        cwd = Path(os.getcwd())
-        os.chdir(docs_path)
-        subprocess.run("mkdocs build", shell=True, check=True)
-        os.chdir(cwd)
-        (docs_path / "site" / "images").resolve().mkdir(exist_ok=True)
+        self.result_cache = (Path(directory).resolve(), max_entries, max_size)
+        set_result_cache(*self.result_cache)
 
     def set_host(self, host: str):
         """
@@ -160,26 +474,52 @@ class Encapsulator:
         """
         self.port = int(port)
 
-    def run(self):
+    def run(self, workers: int = None):
         """
         Running the application that is running the specified input project's run method.
+        :param workers: the number of the worker processes, the default is the workers attribute
         :return: None
         """
+        workers = workers or self.workers
+        options = {"host": self.host, "port": self.port, "log_level": "info"}
         if self.key_file_path and self.cert_file_path:
-            uvicorn.run(
-                self.app,
-                host=self.host,
-                port=self.port,
-                log_level="info",
-                ssl_keyfile=self.key_file_path,
-                ssl_certfile=self.cert_file_path,
-            )
+            options["ssl_keyfile"] = self.key_file_path
+            options["ssl_certfile"] = self.cert_file_path
+
+        if workers > 1:
+            # the workers import the app factory and create their own apps from the stored settings
+            os.environ[WORKER_SETTINGS] = json.dumps(self.worker_settings())
+            uvicorn.run(f"{__name__}:create_worker_app", factory=True, workers=workers, **options)
         else:
-            uvicorn.run(self.app, host=self.host, port=self.port, log_level="info")
+            uvicorn.run(self.app, **options)
+
+    def worker_settings(self) -> dict:
+        """
+        The JSON serializable settings of the worker processes, the project and its model class are given by their
+        import strings.
+        """
+        model = getattr(self.project, "model", None)
+        return {
+            "project": project_import_string(self.project),
+            "model": None if model is None else f"{model.__module__}:{model.__qualname__}",
+            "max_jobs": self.max_jobs,
+            "model_dir": str(ModelDir.BASE),
+            "mounts": [(endpoint, str(site_path)) for endpoint, site_path in self.mounts],
+            "result_cache": None if self.result_cache is None else [str(self.result_cache[0]), *self.result_cache[1:]],
+        }
 
     def __call__(self, *args, **kwargs):
         self.run()
 
 
-if __name__ == "__main__":
-    uvicorn.run("server:app", host="127.0.0.1", port=5000, log_level="info")
+
+def __getattr__(name):
+    # the module level app of the earlier versions, it was shared by every Encapsulator
+    if name == "app":
+        warnings.warn(
+            "digital_twin_distiller.encapsulator.app is deprecated, use create_app or Encapsulator.app instead.",
+            category=DeprecationWarning,
+            stacklevel=2,
+        )
+        return _last_app if _last_app is not None else create_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -28,6 +28,46 @@ femm_fields = [
     femm_heat_flow,
 ]
 
+# the prefixes of the preprocessor commands of the fields
+femm_prefixes = {
+    femm_electrostatic: "ei",
+    femm_magnetic: "mi",
+    femm_current_flow: "ci",
+    femm_heat_flow: "hi",
+}
+
+# the preprocessor commands that differ only in their prefixes, the arguments are filled by str.format
+femm_commands = {
+    "analyze": "{}_analyze({{}})",
+    "add_node": "{}_addnode({{}}, {{}})",
+    "add_segment": "{}_addsegment({{}}, {{}}, {{}}, {{}})",
+    "add_blocklabel": "{}_addblocklabel({{}}, {{}})",
+    "add_arc": "{}_addarc({{}}, {{}}, {{}}, {{}}, {{}}, {{}})",
+    "clear_selected": "{}_clearselected()",
+    "select_segment": "{}_selectsegment({{}}, {{}})",
+    "select_arc_segment": "{}_selectarcsegment({{}}, {{}})",
+    "select_node": "{}_selectnode({{}}, {{}})",
+    "select_label": "{}_selectlabel({{}}, {{}})",
+    "select_group": "{}_selectgroup({{}})",
+    "select_circle": "{}_selectcircle({{}}, {{}}, {{}}, {{}})",
+    "select_rectangle": "{}_selectrectangle({{}},{{}},{{}},{{}},{{}})",
+    "set_segment_prop": '{}_setsegmentprop("{{}}", {{}}, {{}}, {{}}, {{}}, "{{}}")',
+}
+
+# the preprocessor commands that are generated only for some fields
+femm_field_commands = {
+    "set_arc_segment_prop": ("{}_setarcsegmentprop({{}}, '{{}}', {{}}, {{}})", {femm_magnetic, femm_electrostatic}),
+}
+
+# the commands of every field, they are formatted only once
+femm_command_table = {
+    field: {
+        **{name: command.format(prefix) for name, command in femm_commands.items()},
+        **{name: command.format(prefix) for name, (command, fields) in femm_field_commands.items() if field in fields},
+    }
+    for field, prefix in femm_prefixes.items()
+}
+
 # material types for the different FEMM suppoerted magnetic fields
 
 # Lam_type
@@ -159,6 +199,14 @@ class FemmWriter:
 
         return True
 
+    @property
+    def commands(self):
+        """The precompiled commands of the field."""
+        try:
+            return femm_command_table[self.field]
+        except (KeyError, TypeError):
+            raise ValueError(f"The physical field ({self.field}) is not defined!") from None
+
     def validate_units(self, unit):
         if unit not in {
             "inches",
@@ -200,14 +248,7 @@ class FemmWriter:
             lua_geometry.append(self.add_node(node.x, node.y))
 
         for line in geometry.lines:
-            lua_geometry.append(
-                self.add_segment(
-                    line.start_pt.x,
-                    line.start_pt.y,
-                    line.end_pt.x,
-                    line.end_pt.y,
-                )
-            )
+            lua_geometry.append(self.add_segment(line.start_pt.x, line.start_pt.y, line.end_pt.x, line.end_pt.y))
 
         for arc in geometry.circle_arcs:
             # calculate the angle for the femm circle arc generation
@@ -216,16 +257,7 @@ class FemmWriter:
 
             deg = 2 * round(degrees(asin(clamp / radius)), 2)
 
-            lua_geometry.append(
-                self.add_arc(
-                    arc.start_pt.x,
-                    arc.start_pt.y,
-                    arc.end_pt.x,
-                    arc.end_pt.y,
-                    angle=deg,
-                    maxseg=1,
-                )
-            )
+            lua_geometry.append(self.add_arc(arc.start_pt.x, arc.start_pt.y, arc.end_pt.x, arc.end_pt.y, deg, 1))
 
         return lua_geometry
 
@@ -296,46 +328,19 @@ class FemmWriter:
         minimized. For a visible window, either specify no value for flag or
         specify 0. For a minimized window, flag should be set to 1.
         """
-        cmd = None
-        self.validate_field()
 
-        if self.field == femm_magnetic:
-            cmd = Template("mi_analyze($flag)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_analyze($flag)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_analyze($flag)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_analyze($flag)")
+        cmd = self.commands["analyze"].format(flag)
 
         if FemmWriter.push:
-            self.lua_model.append(cmd.substitute(flag=flag))
+            self.lua_model.append(cmd)
 
-        return cmd.substitute(flag=flag)
+        return cmd
 
     # object add remove commnads from FEMM MANUAL page 84.
     def add_node(self, x, y):
         """adds a node to the given point (x,y)"""
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_addnode($x_coord, $y_coord)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_addnode($x_coord, $y_coord)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_addnode($x_coord, $y_coord)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_addnode($x_coord, $y_coord)")
-
-        cmd = cmd.substitute(x_coord=x, y_coord=y)
+        cmd = self.commands["add_node"].format(x, y)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -348,22 +353,7 @@ class FemmWriter:
         (x2,y2)
         """
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_addsegment($x1_coord, $y1_coord, $x2_coord, $y2_coord)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_addsegment($x1_coord, $y1_coord, $x2_coord, $y2_coord)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_addsegment($x1_coord, $y1_coord, $x2_coord, $y2_coord)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_addsegment($x1_coord, $y1_coord, $x2_coord, $y2_coord)")
-
-        cmd = cmd.substitute(x1_coord=x1, y1_coord=y1, x2_coord=x2, y2_coord=y2)
+        cmd = self.commands["add_segment"].format(x1, y1, x2, y2)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -373,22 +363,7 @@ class FemmWriter:
     def add_blocklabel(self, x, y):
         """Add a new block label at (x,y)"""
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_addblocklabel($x_coord, $y_coord)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_addblocklabel($x_coord, $y_coord)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_addblocklabel($x_coord, $y_coord)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_addblocklabel($x_coord, $y_coord)")
-
-        cmd = cmd.substitute(x_coord=x, y_coord=y)
+        cmd = self.commands["add_blocklabel"].format(x, y)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -402,22 +377,7 @@ class FemmWriter:
         with angle ‘angle’ divided into ‘maxseg’ segments.
         """
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_addarc($x_1, $y_1, $x_2, $y_2, $angle, $maxseg)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_addarc($x_1, $y_1, $x_2, $y_2, $angle, $maxseg)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_addarc($x_1, $y_1, $x_2, $y_2, $angle, $maxseg)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_addarc($x_1, $y_1, $x_2, $y_2, $angle, $maxseg)")
-
-        cmd = cmd.substitute(x_1=x1, y_1=y1, x_2=x2, y_2=y2, angle=angle, maxseg=maxseg)
+        cmd = self.commands["add_arc"].format(x1, y1, x2, y2, angle, maxseg)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -949,20 +909,7 @@ class FemmWriter:
     def clear_selected(self):
         """Clear all selected nodes, blocks, segments and arc segments."""
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = "mi_clearselected()"
-
-        if self.field == femm_electrostatic:
-            cmd = "ei_clearselected()"
-
-        if self.field == femm_heat_flow:
-            cmd = "hi_clearselected()"
-
-        if self.field == femm_current_flow:
-            cmd = "ci_clearselected()"
+        cmd = self.commands["clear_selected"]
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -972,22 +919,7 @@ class FemmWriter:
     def select_segment(self, x, y):
         """Select the line segment closest to (x,y)"""
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_selectsegment($xp, $yp)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_selectsegment($xp, $yp)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_selectsegment($xp, $yp)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_selectsegment($xp, $yp)")
-
-        cmd = cmd.substitute(xp=x, yp=y)
+        cmd = self.commands["select_segment"].format(x, y)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -997,22 +929,7 @@ class FemmWriter:
     def select_arc_segment(self, x, y):
         """Select the arc segment closest to (x,y)"""
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_selectarcsegment($xp, $yp)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_selectarcsegment($xp, $yp)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_selectarcsegment($xp, $yp)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_selectarcsegment($xp, $yp)")
-
-        cmd = cmd.substitute(xp=x, yp=y)
+        cmd = self.commands["select_arc_segment"].format(x, y)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -1022,22 +939,7 @@ class FemmWriter:
     def select_node(self, x, y):
         """Select node closest to (x,y), Returns the coordinates ofthe se-lected node"""
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_selectnode($xp, $yp)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_selectnode($xp, $yp)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_selectnode($xp, $yp)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_selectnode($xp, $yp)")
-
-        cmd = cmd.substitute(xp=x, yp=y)
+        cmd = self.commands["select_node"].format(x, y)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -1047,22 +949,7 @@ class FemmWriter:
     def select_label(self, x, y):
         """Select the label closet to (x,y). Returns the coordinates of the selected label."""
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_selectlabel($xp, $yp)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_selectlabel($xp, $yp)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_selectlabel($xp, $yp)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_selectlabel($xp, $yp)")
-
-        cmd = cmd.substitute(xp=x, yp=y)
+        cmd = self.commands["select_label"].format(x, y)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -1076,22 +963,7 @@ class FemmWriter:
         leave the edit mode in 4(group)
         """
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_selectgroup($np)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_selectgroup($np)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_selectgroup($np)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_selectgroup($np)")
-
-        cmd = cmd.substitute(np=n)
+        cmd = self.commands["select_group"].format(n)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -1107,22 +979,7 @@ class FemmWriter:
         all entity types are to be selected.
         """
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_selectcircle($xp, $yp, $Rp, $Editmode)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_selectcircle($xp, $yp, $Rp, $Editmode)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_selectcircle($xp, $yp, $Rp, $Editmode)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_selectcircle($xp, $yp, $Rp, $Editmode)")
-
-        cmd = cmd.substitute(xp=x, yp=y, Rp=R, Editmode=editmode)
+        cmd = self.commands["select_circle"].format(x, y, R, editmode)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -1137,22 +994,7 @@ class FemmWriter:
         entity types are to be selected.
         """
 
-        cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_selectrectangle($x1p,$y1p,$x2p,$y2p,$Editmode)")
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_selectrectangle($x1p,$y1p,$x2p,$y2p,$Editmode)")
-
-        if self.field == femm_heat_flow:
-            cmd = Template("hi_selectrectangle($x1p,$y1p,$x2p,$y2p,$Editmode)")
-
-        if self.field == femm_current_flow:
-            cmd = Template("ci_selectrectangle($x1p,$y1p,$x2p,$y2p,$Editmode)")
-
-        cmd = cmd.substitute(x1p=x1, y1p=y1, x2p=x2, y2p=y2, Editmode=editmode)
+        cmd = self.commands["select_rectangle"].format(x1, y1, x2, y2, editmode)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -1207,17 +1049,7 @@ class FemmWriter:
                          conductor, this parameter can be specified as
                          "<None>".
         """
-        prefix = None
-        if self.field == femm_magnetic:
-            prefix = "mi"
-        elif self.field == femm_heat_flow:
-            prefix = "hi"
-        elif self.field == femm_current_flow:
-            prefix = "ci"
-        elif self.field == femm_electrostatic:
-            prefix = "ei"
-
-        cmd = f'{prefix}_setsegmentprop("{propname}", {elementsize}, {automesh}, {hide}, {group}, "{inductor}")'
+        cmd = self.commands["set_segment_prop"].format(propname, elementsize, automesh, hide, group, inductor)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
@@ -1232,25 +1064,9 @@ class FemmWriter:
         :param group: a member of group number group
         """
         cmd = None
-        self.validate_field()
-
-        if self.field == femm_magnetic:
-            cmd = Template("mi_setarcsegmentprop($maxsegdeg, $propname, $hide, $group)")
-            cmd = cmd.substitute(
-                maxsegdeg=maxsegdeg,
-                propname="'" + propname + "'",
-                hide=hide,
-                group=group,
-            )
-
-        if self.field == femm_electrostatic:
-            cmd = Template("ei_setarcsegmentprop($maxsegdeg, $propname, $hide, $group)")
-            cmd = cmd.substitute(
-                maxsegdeg=maxsegdeg,
-                propname="'" + propname + "'",
-                hide=hide,
-                group=group,
-            )
+        command = self.commands.get("set_arc_segment_prop")
+        if command is not None:
+            cmd = command.format(maxsegdeg, propname, hide, group)
 
         if FemmWriter.push:
             self.lua_model.append(cmd)
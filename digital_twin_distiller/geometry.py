@@ -7,8 +7,10 @@ A general geometrical shape can defined by the following objects:
 import os
 import re
 import sys
-from copy import copy, deepcopy
-from math import degrees
+from collections import defaultdict
+from copy import copy
+from itertools import chain
+from math import atan2, degrees, floor, hypot, pi, sqrt
 from pathlib import Path
 
 import ezdxf
@@ -18,9 +20,42 @@ import numpy as np
 import svgpathtools as svg
 
 import digital_twin_distiller.objects as obj
+from digital_twin_distiller.planar import (
+    arc_area,
+    arc_direction,
+    bezier_area,
+    bezier_direction,
+    locate_points,
+    planar_faces,
+)
+from digital_twin_distiller.spatial_index import arc_distances, closest, segment_distances
 from digital_twin_distiller.utils import getID
 
 
+class Regions:
+    """
+    The closed regions of a geometry, the bounded faces of its lines, circle arcs and cubic beziers. The half-edges of
+    the faces refer to the edges by their positions in the edges list.
+    """
+
+    def __init__(self, edges: list, faces: list):
+        self.edges = edges
+        self.faces = faces
+
+    def loops(self, face):
+        """
+        Gives back the boundary loops of the face, the outer boundary first, as lists of (edge, reversed) pairs. The
+        outer boundary is counter-clockwise, the reversed edges are walked from their end points.
+        """
+        return [
+            [(self.edges[i], self.edges[i].start_pt is not u) for i, u, _ in loop] for loop in (face.outer, *face.holes)
+        ]
+
+    def locate(self, points):
+        """Gives back the index of the face containing each (x, y) point, or -1 if the point is outside of the faces."""
+        return locate_points(self.faces, points)
+
+
 class Geometry:
     def __init__(self):
         self.nodes = []
@@ -29,6 +64,25 @@ class Geometry:
         self.cubic_beziers = []
         self.epsilon = 1.0e-5
 
+        # spatial hash of the nodes: grid cell -> positions in self.nodes, the cell size is epsilon
+        self._node_grid = defaultdict(list)
+        self._node_ids = {}
+
+        # the indexed (node, x, y) of the positions, the stale entries of the grid are recognized by them
+        self._node_points = []
+        self._node_grid_state = None
+
+        # endpoint index of the lines, arcs and beziers: attribute name -> (index, state)
+        self._edge_indices = {}
+
+        # closed regions of the edges and the content of the edges when they were found
+        self._regions = None
+        self._regions_state = None
+
+        # edges by the sorted id pairs of their end points and the edges with the end point ids they were mapped by
+        self._adjacency = None
+        self._adjacency_state = None
+
     def add_node(self, node):
         # self.nodes.append(copy(node))
         self.append_node(node)
@@ -39,24 +93,21 @@ class Geometry:
         line.start_pt = self.append_node(line.start_pt)
         line.end_pt = self.append_node(line.end_pt)
 
-        if line not in self.lines:
-            self.lines.append(line)
+        self._append_edge("lines", line)
 
     def add_arc(self, arc):
         # save every start and end points for the geoemtry if they are not exists
         arc.start_pt = self.append_node(arc.start_pt)
         arc.end_pt = self.append_node(arc.end_pt)
 
-        if arc not in self.circle_arcs:
-            self.circle_arcs.append(arc)
+        self._append_edge("circle_arcs", arc)
 
     def add_cubic_bezier(self, cb):
         # save every start and end points for the geoemtry if they are not exists
         cb.start_pt = self.append_node(cb.start_pt)
         cb.end_pt = self.append_node(cb.end_pt)
 
-        if cb not in self.cubic_beziers:
-            self.cubic_beziers.append(cb)
+        self._append_edge("cubic_beziers", cb)
 
     def add_rectangle(self, r: obj.Rectangle):
         p = list(r)
@@ -67,41 +118,151 @@ class Geometry:
 
     def delete_hanging_nodes(self):
         """Delete all nodes, which not part of a another object (Line, Circle, etc)"""
-        temp = []
-        for node in self.nodes:
-            hanging = True
-            for line in self.lines:
-                if node.id == line.start_pt.id or node.id == line.end_pt.id:
-                    hanging = False
+        connected = set()
+        for line in self.lines:
+            connected.add(line.start_pt.id)
+            connected.add(line.end_pt.id)
 
-            for arc in self.circle_arcs:
-                if node.id == arc.start_pt.id or node.id == arc.end_pt.id:
-                    hanging = False
+        for arc in self.circle_arcs:
+            connected.add(arc.start_pt.id)
+            connected.add(arc.end_pt.id)
 
-            if not hanging:
-                temp.append(node)
+        temp = [node for node in self.nodes if node.id in connected]
 
         del self.nodes
         self.nodes = temp
+        self.invalidate_index()
 
     def append_node(self, new_node):
         """Appends the node to the node list only if its not exists, gives back that node object"""
-        for i in range(len(self.nodes)):
-            if self.nodes[i].distance_to(new_node) < self.epsilon:
-                return self.nodes[i]
+        i = self._find_close_node(new_node.x, new_node.y)
+        if i is not None:
+            return self.nodes[i]
 
         self.nodes.append(new_node)
+        self._index_node(len(self.nodes) - 1)
         return new_node
 
+    def invalidate_index(self):
+        """
+        Drops the node lookup index, it will be rebuilt on the next query. Call this function after the coordinates
+        of the stored nodes were modified in place: the node lookup recognizes the stale entries of the cells it
+        visits, but a node moved next to the queried point is found only after the index is rebuilt.
+        """
+        self._node_grid_state = None
+        self._edge_indices.clear()
+        self._regions_state = None
+        self._adjacency_state = None
+
+    def _node_cell(self, x, y):
+        return floor(x / self.epsilon), floor(y / self.epsilon)
+
+    def _index_node(self, i):
+        node = self.nodes[i]
+        self._node_grid[self._node_cell(node.x, node.y)].append(i)
+        self._node_points.append((node, node.x, node.y))
+        self._node_ids.setdefault(node.id, i)
+        self._node_grid_state = (id(self.nodes), len(self.nodes), self.epsilon)
+
+    def _update_node_index(self):
+        """
+        Rebuilds the node index if the node list was replaced, resized from outside or the tolerance has changed.
+        """
+        if self._node_grid_state == (id(self.nodes), len(self.nodes), self.epsilon):
+            return
+
+        self._node_grid.clear()
+        self._node_ids.clear()
+        self._node_points.clear()
+        for i in range(len(self.nodes)):
+            self._index_node(i)
+
+        self._node_grid_state = (id(self.nodes), len(self.nodes), self.epsilon)
+
+    def _find_close_node(self, x, y):
+        """
+        Gives back the position of the first node that is closer than epsilon to the (x, y) point or None. Only the
+        neighbouring cells of the grid have to be visited, because their size is epsilon. If a visited entry of the
+        grid is stale, i.e. its node was replaced or moved in place, then the index is rebuilt and searched again.
+        """
+        self._update_node_index()
+
+        found = self._search_node_grid(x, y)
+        if found is False:
+            self._node_grid_state = None
+            self._update_node_index()
+            found = self._search_node_grid(x, y)
+
+        return found
+
+    def _search_node_grid(self, x, y):
+        """The position of the first node closer than epsilon to the (x, y) point, None, or False if it is stale."""
+        cx, cy = self._node_cell(x, y)
+        found = None
+        for i in range(cx - 1, cx + 2):
+            for j in range(cy - 1, cy + 2):
+                for k in self._node_grid.get((i, j), ()):
+                    if found is not None and k > found:
+                        break
+
+                    node, xk, yk = self._node_points[k]
+                    if node is not self.nodes[k] or node.x != xk or node.y != yk:
+                        return False
+
+                    if hypot(xk - x, yk - y) < self.epsilon:
+                        found = k
+                        break
+
+        return found
+
+    @staticmethod
+    def _edge_key(edge):
+        """
+        The endpoints of the stored edges are the merged geometry nodes, so two edges can be equal only if they
+        connect the same node objects. Lines are undirected, arcs and beziers are keyed by their direction.
+        """
+        a = id(edge.start_pt)
+        b = id(edge.end_pt)
+        if isinstance(edge, obj.Line) and b < a:
+            return b, a
+
+        return a, b
+
+    def _get_edge_index(self, name):
+        """
+        Gives back the endpoint index of the lines, circle_arcs or cubic_beziers list. The index is rebuilt if the
+        list was replaced or resized from outside.
+        """
+        edges = getattr(self, name)
+        index, state = self._edge_indices.get(name, (None, None))
+        if state != (id(edges), len(edges)):
+            index = defaultdict(list)
+            for ei in edges:
+                index[self._edge_key(ei)].append(ei)
+
+            self._edge_indices[name] = (index, (id(edges), len(edges)))
+
+        return index
+
+    def _append_edge(self, name, edge):
+        """Appends the edge to the given list if it's not exists."""
+        candidates = self._get_edge_index(name)[self._edge_key(edge)]
+        if any(edge == ci for ci in candidates):
+            return
+
+        edges = getattr(self, name)
+        edges.append(edge)
+        candidates.append(edge)
+        index, _ = self._edge_indices[name]
+        self._edge_indices[name] = (index, (id(edges), len(edges)))
+
     # Todo: bezierre és circle arcra be kellene fejezni
     def merge_lines(self):
         lines = self.lines.copy()
         self.lines.clear()
 
-        # TODO: GK: This can be used in the add_line method
         for li in lines:
-            if li not in self.lines:
-                self.add_line(li)
+            self.add_line(li)
 
     def meshi_it(self, mesh_strategy):
         mesh = mesh_strategy(self.nodes, self.lines, self.circle_arcs, self.cubic_beziers)
@@ -111,12 +272,44 @@ class Geometry:
         """
         This functin deletes the line from the geometry closest to the x, y coordinates.
         """
-        closest_line = min(self.lines, key=lambda li: li.distance_to_point(x, y))
-        idx = self.lines.index(closest_line)
-        self.lines.pop(idx)
+        self.lines.pop(closest(self.line_distances(x, y))[1])
+
+    def line_distances(self, x, y):
+        """
+        Gives back the distances between the (x, y) point and the lines as an array. The x and y can be arrays of P
+        points too, then the result is a (P, N) array.
+        """
+        segments = np.array([(li.start_pt.x, li.start_pt.y, li.end_pt.x, li.end_pt.y) for li in self.lines])
+        return segment_distances(x, y, segments)
+
+    def arc_distances(self, x, y):
+        """
+        Gives back the distances between the (x, y) point and the circle arcs as an array. The x and y can be arrays
+        of P points too, then the result is a (P, N) array.
+        """
+        arcs = np.array(
+            [
+                (arc.start_pt.x, arc.start_pt.y, arc.center_pt.x, arc.center_pt.y, arc.end_pt.x, arc.end_pt.y)
+                for arc in self.circle_arcs
+            ]
+        )
+        return arc_distances(x, y, arcs)
+
+    def closest_line(self, x, y):
+        """Gives back the line closest to the (x, y) point."""
+        return self.lines[closest(self.line_distances(x, y))[1]]
+
+    def closest_arc(self, x, y):
+        """Gives back the circle arc closest to the (x, y) point."""
+        return self.circle_arcs[closest(self.arc_distances(x, y))[1]]
 
     def find_node(self, id: int):
         """Finds and gives back a node with the given id"""
+        self._update_node_index()
+        i = self._node_ids.get(id)
+        if i is not None and self.nodes[i].id == id:
+            return self.nodes[i]
+
         return next((x for x in self.nodes if x.id == id), None)
 
     def __repr__(self):
@@ -325,101 +518,319 @@ class Geometry:
 
         """
 
-        x1 = line_1.start_pt.x
-        y1 = line_1.start_pt.y
-        x2 = line_1.end_pt.x
-        y2 = line_1.end_pt.y
+        segments_1 = [(line_1.start_pt.x, line_1.start_pt.y, line_1.end_pt.x, line_1.end_pt.y)]
+        segments_2 = [(line_2.start_pt.x, line_2.start_pt.y, line_2.end_pt.x, line_2.end_pt.y)]
+        points, _, _ = self.get_line_intersections_batch(segments_1, segments_2)
 
-        x3 = line_2.start_pt.x
-        y3 = line_2.start_pt.y
-        x4 = line_2.end_pt.x
-        y4 = line_2.end_pt.y
+        p1 = None if np.isnan(points[0, 0, 0]) else tuple(points[0, 0])
+        p2 = None if np.isnan(points[0, 1, 0]) else tuple(points[0, 1])
+        return p1, p2
 
-        p1 = None
-        p2 = None
+    def get_line_intersections_batch(self, segments_1, segments_2):
+        """
+        Vectorized version of get_line_intersetions, the i-th segment of the first array is tested against the i-th
+        segment of the second one.
 
-        p = np.array([x1, y1])
-        r = np.array([x2 - x1, y2 - y1])
+        :param segments_1: (N, 4) array of [x1, y1, x2, y2] rows
+        :param segments_2: (N, 4) array of [x3, y3, x4, y4] rows
 
-        q = np.array([x3, y3])
-        s = np.array([x4 - x3, y4 - y3])
+        :returns: points, t, u
 
-        test1 = np.abs(np.cross(r, s))
-        test2 = np.abs(np.cross((q - p), r))
+        points is an (N, 2, 2) array, its [i, 0] and [i, 1] rows are the p1 and p2 points of get_line_intersetions,
+        the missing points are NaN. t and u are (N, 2) arrays of the parameters of these points along the first and
+        the second segment, p = start_1 + t * (end_1 - start_1) = start_2 + u * (end_2 - start_2).
+        """
+        seg_1 = np.asarray(segments_1, dtype=float).reshape(-1, 4)
+        seg_2 = np.asarray(segments_2, dtype=float).reshape(-1, 4)
+        x1, y1, x2, y2 = seg_1.T
+        x3, y3, x4, y4 = seg_2.T
+
+        rx, ry = x2 - x1, y2 - y1
+        sx, sy = x4 - x3, y4 - y3
+        qpx, qpy = x3 - x1, y3 - y1
+
+        test1 = np.abs(rx * sy - ry * sx)
+        test2 = np.abs(qpx * ry - qpy * rx)
+        parallel = test1 < self.epsilon
+        collinear = parallel & (test2 < self.epsilon)
+
+        inrange = lambda x: (x > (0 - self.epsilon)) & (x < (1 + self.epsilon))
+
+        n = len(seg_1)
+        t = np.full((n, 2), np.nan)
+        u = np.full((n, 2), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rr = rx * rx + ry * ry
+            ss = sx * sx + sy * sy
+            t0 = (qpx * rx + qpy * ry) / rr
+            t1 = t0 + (sx * rx + sy * ry) / rr
+            t2 = -(qpx * sx + qpy * sy) / ss
+            t3 = t2 + (rx * sx + ry * sy) / ss
+
+            den = x1 * y3 - x1 * y4 - x2 * y3 + x2 * y4 - x3 * y1 + x3 * y2 + x4 * y1 - x4 * y2
+            up = (-x1 * y2 + x1 * y3 + x2 * y1 - x2 * y3 - x3 * y1 + x3 * y2) / den
+            tp = (x1 * y3 - x1 * y4 - x3 * y1 + x3 * y4 + x4 * y1 - x4 * y3) / den
+
+        # the endpoints of the overlapping section of collinear segments, the endpoints of the second segment are
+        # preferred like in get_line_intersetions
+        for k, tk, uk in ((0, t0, 0.0), (1, t1, 1.0)):
+            mask = collinear & inrange(tk)
+            t[mask, k] = tk[mask]
+            u[mask, k] = uk
+
+        for k, uk, tk in ((0, t2, 0.0), (1, t3, 1.0)):
+            mask = collinear & inrange(uk)
+            t[mask, k] = tk
+            u[mask, k] = uk[mask]
+
+        # crossing segments
+        mask = ~parallel & inrange(tp) & inrange(up)
+        t[mask, 0] = tp[mask]
+        u[mask, 0] = up[mask]
+
+        # the points are computed on the segment, which gives the parameter
+        on_second = collinear[:, None] & inrange(np.column_stack((t2, t3)))
+        points = np.empty((n, 2, 2))
+        points[..., 0] = x1[:, None] + t * rx[:, None]
+        points[..., 1] = y1[:, None] + t * ry[:, None]
+        points[on_second, 0] = (x3[:, None] + u * sx[:, None])[on_second]
+        points[on_second, 1] = (y3[:, None] + u * sy[:, None])[on_second]
+        return points, t, u
+
+    def get_line_arc_intersections(self, line, arc):
+        """
+        :param line: line segment
+        :param arc: circle arc
 
-        t0 = np.dot(q - p, r) / np.dot(r, r)
-        t1 = t0 + np.dot(s, r) / np.dot(r, r)
-        t2 = np.dot(p - q, s) / np.dot(s, s)
-        t3 = t2 + np.dot(r, s) / np.dot(s, s)
+        :returns: list of the (x, y) intersection points
 
-        inrange = lambda x: x > (0 - self.epsilon) and x < (1 + self.epsilon)
-        # distance = lambda x, y: np.sqrt((x[0] - y[0]) ** 2 + (x[1] - y[1]) ** 2)
+        The points are accepted with the same relative tolerance on the line parameter and on the angle of the arc as
+        the line-line intersections. If the distance between the line and the circle is smaller than epsilon, then the
+        line is considered as a tangent.
+        """
+        px = line.start_pt.x
+        py = line.start_pt.y
+        rx = line.end_pt.x - px
+        ry = line.end_pt.y - py
+        cx = arc.center_pt.x
+        cy = arc.center_pt.y
+        radius = hypot(arc.start_pt.x - cx, arc.start_pt.y - cy)
+
+        a = rx * rx + ry * ry
+        if a < self.epsilon**2:
+            return []
+
+        # the closest point of the infinite line to the center point
+        tc = ((cx - px) * rx + (cy - py) * ry) / a
+        d = hypot(px + tc * rx - cx, py + tc * ry - cy)
+
+        if d > radius + self.epsilon:
+            return []
+        elif d > radius - self.epsilon:
+            candidates = [tc]
+        else:
+            dt = sqrt(radius**2 - d**2) / sqrt(a)
+            candidates = [tc - dt, tc + dt]
 
-        if test1 < self.epsilon:
+        points = []
+        for t in candidates:
+            if -self.epsilon < t < 1 + self.epsilon:
+                x = px + t * rx
+                y = py + t * ry
+                if self._arc_position(arc, x, y) is not None:
+                    points.append((x, y))
 
-            if test2 < self.epsilon:
+        return points
 
-                if inrange(t0):
-                    p1 = tuple(p + t0 * r)
+    def get_arc_intersections(self, arc_1, arc_2):
+        """
+        :param arc_1: the first circle arc
+        :param arc_2: second circle arc
 
-                if inrange(t1):
-                    p2 = tuple(p + t1 * r)
+        :returns: list of the (x, y) intersection points
 
-                if inrange(t2):
-                    p1 = tuple(q + t2 * s)
+        If the arcs are on the same circle, then the endpoints of the overlapping section are given back.
+        """
+        c1x = arc_1.center_pt.x
+        c1y = arc_1.center_pt.y
+        c2x = arc_2.center_pt.x
+        c2y = arc_2.center_pt.y
+        r1 = hypot(arc_1.start_pt.x - c1x, arc_1.start_pt.y - c1y)
+        r2 = hypot(arc_2.start_pt.x - c2x, arc_2.start_pt.y - c2y)
+        d = hypot(c2x - c1x, c2y - c1y)
+
+        if d < self.epsilon:
+            if abs(r1 - r2) > self.epsilon:
+                return []
+
+            # the same circle: the endpoints of one arc that are on the other
+            candidates = [tuple(arc_2.start_pt), tuple(arc_2.end_pt), tuple(arc_1.start_pt), tuple(arc_1.end_pt)]
+        elif d > r1 + r2 + self.epsilon or d < abs(r1 - r2) - self.epsilon:
+            return []
+        else:
+            # distance of the common chord from the first center point along the center line
+            a = (r1**2 - r2**2 + d**2) / (2 * d)
+            h = sqrt(max(r1**2 - a**2, 0.0))
+            mx = c1x + a * (c2x - c1x) / d
+            my = c1y + a * (c2y - c1y) / d
+            if h < self.epsilon:
+                candidates = [(mx, my)]
+            else:
+                ux = -(c2y - c1y) / d
+                uy = (c2x - c1x) / d
+                candidates = [(mx + h * ux, my + h * uy), (mx - h * ux, my - h * uy)]
+
+        return [(x, y) for x, y in candidates if self._on_arcs(arc_1, arc_2, x, y)]
+
+    def _on_arcs(self, arc_1, arc_2, x, y):
+        return self._arc_position(arc_1, x, y) is not None and self._arc_position(arc_2, x, y) is not None
+
+    def _arc_position(self, arc, x, y):
+        """
+        Gives back the angle of the (x, y) point measured counter-clockwise from the start point of the arc, or None if
+        the point is not on the arc. The angle is accepted with epsilon relative tolerance.
+        """
+        cx = arc.center_pt.x
+        cy = arc.center_pt.y
+        phi_start = atan2(arc.start_pt.y - cy, arc.start_pt.x - cx)
+        sweep = (atan2(arc.end_pt.y - cy, arc.end_pt.x - cx) - phi_start) % (2 * pi)
+        phi = (atan2(y - cy, x - cx) - phi_start) % (2 * pi)
+
+        if phi < sweep * (1 + self.epsilon):
+            return phi
+        elif phi > 2 * pi - sweep * self.epsilon:
+            return phi - 2 * pi
+        else:
+            return None
 
-                if inrange(t3):
-                    p2 = tuple(q + t3 * s)
+    def _edge_bboxes(self, edges):
+        """
+        Gives back the [xmin, ymin, xmax, ymax] bounding boxes of the lines and circle arcs as an (N, 4) array. The
+        boxes are enlarged by the tolerance of the intersection tests, so the edges with disjoint boxes cannot
+        intersect.
+        """
+        boxes = np.empty((len(edges), 4))
+        for i, ei in enumerate(edges):
+            if isinstance(ei, obj.CircleArc):
+                r = hypot(ei.start_pt.x - ei.center_pt.x, ei.start_pt.y - ei.center_pt.y)
+                margin = r + self.epsilon * (r + 1 / r) if r > self.epsilon else self.epsilon
+                boxes[i] = (ei.center_pt.x, ei.center_pt.y, ei.center_pt.x, ei.center_pt.y)
+            else:
+                length = hypot(ei.end_pt.x - ei.start_pt.x, ei.end_pt.y - ei.start_pt.y)
+                # the collinearity test is not scaled with the length of the lines
+                margin = self.epsilon * (length + 1 / length) if length > self.epsilon else self.epsilon
+                boxes[i] = (
+                    min(ei.start_pt.x, ei.end_pt.x),
+                    min(ei.start_pt.y, ei.end_pt.y),
+                    max(ei.start_pt.x, ei.end_pt.x),
+                    max(ei.start_pt.y, ei.end_pt.y),
+                )
 
-        else:
-            up = (-x1 * y2 + x1 * y3 + x2 * y1 - x2 * y3 - x3 * y1 + x3 * y2) / (
-                x1 * y3 - x1 * y4 - x2 * y3 + x2 * y4 - x3 * y1 + x3 * y2 + x4 * y1 - x4 * y2
-            )
-            tp = (x1 * y3 - x1 * y4 - x3 * y1 + x3 * y4 + x4 * y1 - x4 * y3) / (
-                x1 * y3 - x1 * y4 - x2 * y3 + x2 * y4 - x3 * y1 + x3 * y2 + x4 * y1 - x4 * y2
-            )
-            if inrange(tp) and inrange(up):
-                p1 = tuple(p + tp * r)
+            boxes[i, :2] -= margin
+            boxes[i, 2:] += margin
 
-        # if (p1 is not None) and (p2 is not None) and (distance(p1, p2) < self.epsilon):
-        #     p2 = None
+        return boxes
 
-        return p1, p2
+    @staticmethod
+    def sweep_overlaps(boxes):
+        """
+        Gives back the index pairs (i < j) of the overlapping boxes as an (M, 2) array.
+
+        The boxes are sorted by their left side, then every box is compared only with the boxes that start before its
+        right side (sweep and prune), these comparisons are done with array operations.
+
+        :param boxes: (N, 4) array of [xmin, ymin, xmax, ymax] rows
+        """
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        n = len(boxes)
+        order = np.argsort(boxes[:, 0], kind="stable")
+        b = boxes[order]
+
+        # the boxes between i + 1 and end[i] start before the right side of the i-th box
+        end = np.searchsorted(b[:, 0], b[:, 2], side="right")
+        counts = np.maximum(end - np.arange(1, n + 1), 0)
+        first = np.repeat(np.arange(n), counts)
+        second = first + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        overlap = (b[second, 1] <= b[first, 3]) & (b[first, 1] <= b[second, 3])
+        pairs = np.column_stack((order[first[overlap]], order[second[overlap]]))
+        pairs.sort(axis=1)
+        return pairs
 
     def generate_intersections(self):
-        """Todo: generate intersections"""
-        N = len(self.lines)
+        """
+        Splits the lines and the circle arcs at their intersection points.
+
+        Only those pairs of edges are tested whose bounding boxes are overlapping, these are selected with
+        sweep_overlaps. The line segments between the intersection points of a line are the same as if every line would
+        be tested against every other. The lines shorter than epsilon are used as cutting edges only.
+        """
+        nb_lines = len(self.lines)
+        edges = self.lines + self.circle_arcs
+
+        # (index of the other edge, index of the point, x, y) records for every edge
+        intersections = [[] for _ in edges]
+        pairs = self.sweep_overlaps(self._edge_bboxes(edges))
+        line_pairs = pairs[pairs[:, 1] < nb_lines]
+
+        # the line-line intersections are computed in both directions with one vectorized call, the first line gets
+        # the results
+        segments = np.array([(li.start_pt.x, li.start_pt.y, li.end_pt.x, li.end_pt.y) for li in self.lines])
+        segments = segments.reshape(-1, 4)
+        first = np.concatenate((line_pairs[:, 0], line_pairs[:, 1]))
+        second = np.concatenate((line_pairs[:, 1], line_pairs[:, 0]))
+        points, _, _ = self.get_line_intersections_batch(segments[first], segments[second])
+        for a, k in zip(*np.nonzero(~np.isnan(points[..., 0]))):
+            intersections[first[a]].append((int(second[a]), int(k), *points[a, k].tolist()))
+
+        for i, j in pairs[pairs[:, 1] >= nb_lines].tolist():
+            if i < nb_lines:
+                points = self.get_line_arc_intersections(edges[i], edges[j])
+            else:
+                points = self.get_arc_intersections(edges[i], edges[j])
+
+            for k, pk in enumerate(points):
+                intersections[i].append((j, k, *pk))
+                intersections[j].append((i, k, *pk))
+
         newlines = list()
-        for i in range(N):
-            line_1 = self.lines[i]
-            intersections = list()
-            distance = lambda a, b: (a.x - b[0]) ** 2 + (a.y - b[1]) ** 2
-
-            for j in range(0, N):  # i+1 is important
-                line_2 = self.lines[j]
-                p1, p2 = self.get_line_intersetions(line_1, line_2)
-
-                if p1 is not None:
-                    if i != j:
-                        # plt.scatter(p1[0], p1[1], c="r", marker="o", s=40)
-                        intersections.append((distance(line_1.start_pt, p1), *p1))
-
-                if p2 is not None:
-                    if i != j:
-                        intersections.append((distance(line_1.start_pt, p2), *p2))
-
-            intersections.sort(key=lambda ii: ii[0])
-            for k in range(len(intersections) - 1):
-                start_node = obj.Node(x=intersections[k][1], y=intersections[k][2], id_=getID())
-                end_node = obj.Node(
-                    x=intersections[k + 1][1],
-                    y=intersections[k + 1][2],
-                    id_=getID(),
-                )
+        for line_1, points in zip(self.lines, intersections):
+            if line_1.start_pt.distance_to(line_1.end_pt) <= self.epsilon:
+                continue
+
+            # ordering by the distance from the start point, the original order of the pairs is kept between equals
+            x0, y0 = line_1.start_pt.x, line_1.start_pt.y
+            points.sort(key=lambda ii: ((ii[2] - x0) ** 2 + (ii[3] - y0) ** 2, ii[0], ii[1]))
+            for pk, pl in zip(points, points[1:]):
+                start_node = obj.Node(x=pk[2], y=pk[3], id_=getID())
+                end_node = obj.Node(x=pl[2], y=pl[3], id_=getID())
                 newlines.append(obj.Line(start_pt=start_node, end_pt=end_node, id_=getID()))
 
+        # the arcs having less than 2 distinct intersection points are kept unchanged
+        newarcs = list()
+        for arc, points in zip(self.circle_arcs, intersections[nb_lines:]):
+            nb_arcs = len(newarcs)
+            points.sort(key=lambda ii: (self._arc_position(arc, ii[2], ii[3]), ii[0], ii[1]))
+            for pk, pl in zip(points, points[1:]):
+                if hypot(pl[2] - pk[2], pl[3] - pk[3]) > self.epsilon:
+                    newarcs.append(
+                        obj.CircleArc(
+                            obj.Node(pk[2], pk[3]),
+                            obj.Node(arc.center_pt.x, arc.center_pt.y),
+                            obj.Node(pl[2], pl[3]),
+                            max_seg_deg=arc.max_seg_deg,
+                            color=arc.color,
+                            attributes=arc.attributes,
+                        )
+                    )
+
+            if len(newarcs) == nb_arcs:
+                newarcs.append(arc)
+
         self.nodes.clear()
         self.lines.clear()
+        self.circle_arcs.clear()
+        self.invalidate_index()
 
         for li in newlines:
             if li.start_pt.distance_to(li.end_pt) > self.epsilon:
@@ -427,6 +838,9 @@ class Geometry:
 
         self.merge_lines()
 
+        for arc in newarcs:
+            self.add_arc(arc)
+
     @staticmethod
     def get_color_value_from_svg(attributes: dict):
         """Reads the color code from the svg file"""
@@ -460,74 +874,121 @@ class Geometry:
         return g
 
     def find_edges(self, nodes: list):
-        """Search for the edges with the given direction"""
+        """
+        Search for the edges of the closed loop of the given node ids. The edges are given back as OrientedEdge views
+        in the direction of the loop, the edges walked from their end points have negative ids.
+        """
+        adjacency = self._get_adjacency()
 
         surface = []
         # we are looking for a closed loop, therefore the first and the last item should create an edge
-        nodes.append(nodes[0])
-        for i, node in enumerate(nodes[:-1]):
-            # lines
-            for line in self.lines:
-                if line.end_pt.id == node and line.start_pt.id == nodes[i + 1]:
+        for a, b in zip(nodes, [*nodes[1:], nodes[0]]):
+            for edge in adjacency.get((a, b) if a <= b else (b, a), ()):
+                if edge.end_pt.id == a and edge.start_pt.id == b:
                     # direction: from end -> to start
-                    temp = deepcopy(line)
-                    temp.id = -temp.id
-                    surface.append(temp)
+                    surface.append(obj.OrientedEdge(edge, reversed=True))
 
-                if line.start_pt.id == node and line.end_pt.id == nodes[i + 1]:
+                if edge.start_pt.id == a and edge.end_pt.id == b:
                     # direction: from start -> to end
-                    surface.append(deepcopy(line))
-
-            # arcs
-            for arc in self.circle_arcs:
-                if arc.end_pt.id == node and arc.start_pt.id == nodes[i + 1]:
-                    # direction: from end -> to start
-                    temp = deepcopy(arc)
-                    temp.id = -temp.id
-                    surface.append(temp)
-
-                if arc.start_pt.id == node and arc.end_pt.id == nodes[i + 1]:
-                    # direction: from start -> to end
-                    surface.append(deepcopy(arc))
-
-            # cubic bezier
-            for cb in self.cubic_beziers:
-                if cb.end_pt.id == node and cb.start_pt.id == nodes[i + 1]:
-                    # direction: from end -> to start
-                    temp = deepcopy(cb)
-                    temp.id = -temp.id
-                    surface.append(temp)
-
-                if cb.start_pt.id == node and cb.end_pt.id == nodes[i + 1]:
-                    # direction: from start -> to end
-                    surface.append(deepcopy(cb))
+                    surface.append(obj.OrientedEdge(edge))
 
         return surface
 
-    def find_surfaces(self):
-        """Builds a networkx graph from the given geometry and search for the closed surfaces with networkx."""
-
-        Graph = nx.Graph()
-
-        # add edges to the graph from the different entities: lines, circles, cubic_bezier
-        for line in self.lines:
-            Graph.add_edge(line.start_pt.id, line.end_pt.id)
+    def _edges_state(self):
+        """The edges and the ids of their end points, the adjacency map depends on them."""
+        return tuple(
+            (id(ei), ei.start_pt.id, ei.end_pt.id) for ei in chain(self.lines, self.circle_arcs, self.cubic_beziers)
+        )
 
-        for circles in self.circle_arcs:
-            Graph.add_edge(circles.start_pt.id, circles.end_pt.id)
-
-        for cb in self.cubic_beziers:
-            Graph.add_edge(cb.start_pt.id, cb.end_pt.id)
+    def _edges_content(self):
+        """
+        The edges with their points and the coordinates of the points, the regions depend on them. The cached edges
+        keep their points alive, so the ids are not reused while the regions are cached.
+        """
+        content = []
+        for ei in chain(self.lines, self.circle_arcs, self.cubic_beziers):
+            u, v = ei.start_pt, ei.end_pt
+            item = (id(ei), id(u), u.x, u.y, id(v), v.x, v.y)
+            if isinstance(ei, obj.CircleArc):
+                item += (ei.center_pt.x, ei.center_pt.y)
+            elif isinstance(ei, obj.CubicBezier):
+                item += (ei.control1.x, ei.control1.y, ei.control2.x, ei.control2.y)
+            content.append(item)
+
+        return tuple(content)
+
+    def _get_adjacency(self):
+        """
+        Gives back the lines, circle arcs and cubic beziers by the sorted id pairs of their end points. The map is
+        rebuilt if the edges or their end points were changed.
+        """
+        state = self._edges_state()
+        if self._adjacency_state != state:
+            self._adjacency = defaultdict(list)
+            for edge in chain(self.lines, self.circle_arcs, self.cubic_beziers):
+                a, b = edge.start_pt.id, edge.end_pt.id
+                self._adjacency[(a, b) if a <= b else (b, a)].append(edge)
 
-        closed_loops = nx.cycle_basis(Graph)
+            self._adjacency_state = state
 
-        surfaces = []
+        return self._adjacency
 
-        for loop in closed_loops:
-            surface = self.find_edges(loop)
-            surfaces.append(surface)
+    def regions(self):
+        """
+        Gives back the closed regions of the lines, circle arcs and cubic beziers. The regions are found once and
+        reused by the exporters until the edges, their points or the coordinates of their points are changed.
+        """
+        state = self._edges_content()
+        if self._regions_state == state:
+            return self._regions
+
+        edges = self.lines + self.circle_arcs + self.cubic_beziers
+
+        def points(i, u):
+            """The coordinates of the edge walked from u, and whether it is walked from its start point."""
+            e = edges[i]
+            forward = e.start_pt is u
+            if isinstance(e, obj.CubicBezier):
+                pts = [e.start_pt, e.control1, e.control2, e.end_pt]
+                if not forward:
+                    pts.reverse()
+            else:
+                pts = [e.start_pt, e.end_pt] if forward else [e.end_pt, e.start_pt]
+                if isinstance(e, obj.CircleArc):
+                    pts.append(e.center_pt)
+
+            return [(pt.x, pt.y) for pt in pts], forward
+
+        def direction(i, u, v):
+            pts, forward = points(i, u)
+            if isinstance(edges[i], obj.CircleArc):
+                return arc_direction(*pts, forward)
+            if isinstance(edges[i], obj.CubicBezier):
+                return bezier_direction(*pts)
+            return atan2(v.y - u.y, v.x - u.x)
+
+        def area(i, u, v):
+            pts, forward = points(i, u)
+            if isinstance(edges[i], obj.CircleArc):
+                return arc_area(*pts, forward)
+            if isinstance(edges[i], obj.CubicBezier):
+                return bezier_area(*pts)
+            return 0.5 * (u.x * v.y - v.x * u.y)
+
+        faces = planar_faces([(ei.start_pt, ei.end_pt) for ei in edges], direction=direction, area=area)
+        self._regions = Regions(edges, faces)
+        self._regions_state = state
+        return self._regions
 
-        return surfaces
+    def find_surfaces(self):
+        """
+        Gives back the outer boundaries of the closed regions as lists of OrientedEdge views in counter-clockwise
+        order, the edges walked from their end points have negative ids.
+        """
+        regions = self.regions()
+        return [
+            [obj.OrientedEdge(edge, reverse) for edge, reverse in regions.loops(face)[0]] for face in regions.faces
+        ]
 
     def plot_connection_graph(self, debug=False):
         """Plots the connection graph of the given task."""
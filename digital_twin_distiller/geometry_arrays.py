@@ -0,0 +1,234 @@
+"""
+Structure of arrays representation of a Geometry.
+
+Every distinct Node object of the geometry is stored once in a float64 coordinate array, the lines, circle arcs and
+cubic beziers are int32 index arrays into it. The ids, labels, colors and attributes are kept in parallel tables, so
+the conversion between the two representations is lossless.
+"""
+import numpy as np
+
+import digital_twin_distiller.objects as obj
+from digital_twin_distiller import affine
+from digital_twin_distiller.geometry import Geometry
+
+
+class GeometryArrays:
+    def __init__(self):
+        self.epsilon = 1.0e-5
+
+        # nodes: (N, 2) coordinates, the node_listed rows are the items of Geometry.nodes in their original order
+        self.nodes = np.empty((0, 2))
+        self.node_listed = np.empty(0, dtype=bool)
+        self.node_precision = np.empty(0, dtype=np.int32)
+        self.node_hanging = np.empty(0, dtype=bool)
+        self.node_ids = []
+        self.node_labels = []
+
+        # lines: (L, 2) [start, end] node indices
+        self.lines = np.empty((0, 2), dtype=np.int32)
+        self.line_mesh_scaling = np.empty(0)
+        self.line_ids = []
+        self.line_labels = []
+        self.line_colors = []
+        self.line_attributes = []
+
+        # circle arcs: (A, 4) [start, center, apex, end] node indices
+        self.circle_arcs = np.empty((0, 4), dtype=np.int32)
+        self.arc_max_seg_deg = np.empty(0)
+        self.arc_theta = np.empty(0)
+        self.arc_radius = np.empty(0)
+        self.arc_ids = []
+        self.arc_labels = []
+        self.arc_colors = []
+        self.arc_attributes = []
+
+        # cubic beziers: (B, 4) [start, control1, control2, end] node indices
+        self.cubic_beziers = np.empty((0, 4), dtype=np.int32)
+        self.bezier_n_segment = []
+        self.bezier_ids = []
+        self.bezier_labels = []
+        self.bezier_colors = []
+        self.bezier_attributes = []
+
+    @classmethod
+    def from_geometry(cls, geo: Geometry):
+        """
+        Creates the array representation of the geometry. The Node objects shared by more elements are stored only
+        once, so the same nodes are shared after the back conversion.
+        """
+        arrays = cls()
+        arrays.epsilon = geo.epsilon
+
+        nodes = []
+        position = {}
+
+        def index(node):
+            key = id(node)
+            if key not in position:
+                position[key] = len(nodes)
+                nodes.append(node)
+            return position[key]
+
+        for ni in geo.nodes:
+            index(ni)
+        nb_listed = len(nodes)
+
+        arrays.lines = np.array([(index(li.start_pt), index(li.end_pt)) for li in geo.lines], dtype=np.int32)
+        arrays.circle_arcs = np.array(
+            [(index(a.start_pt), index(a.center_pt), index(a.apex_pt), index(a.end_pt)) for a in geo.circle_arcs],
+            dtype=np.int32,
+        )
+        arrays.cubic_beziers = np.array(
+            [(index(b.start_pt), index(b.control1), index(b.control2), index(b.end_pt)) for b in geo.cubic_beziers],
+            dtype=np.int32,
+        )
+        arrays.lines = arrays.lines.reshape(-1, 2)
+        arrays.circle_arcs = arrays.circle_arcs.reshape(-1, 4)
+        arrays.cubic_beziers = arrays.cubic_beziers.reshape(-1, 4)
+
+        arrays.nodes = np.array([(ni.x, ni.y) for ni in nodes], dtype=float).reshape(-1, 2)
+        arrays.node_listed = np.arange(len(nodes)) < nb_listed
+        arrays.node_precision = np.array([ni.precision for ni in nodes], dtype=np.int32)
+        arrays.node_hanging = np.array([ni.hanging for ni in nodes], dtype=bool)
+        arrays.node_ids = [ni.id for ni in nodes]
+        arrays.node_labels = [ni.label for ni in nodes]
+
+        arrays.line_mesh_scaling = np.array([li.meshScaling for li in geo.lines], dtype=float)
+        arrays.line_ids = [li.id for li in geo.lines]
+        arrays.line_labels = [li.label for li in geo.lines]
+        arrays.line_colors = [li.color for li in geo.lines]
+        arrays.line_attributes = [li.attributes for li in geo.lines]
+
+        arrays.arc_max_seg_deg = np.array([a.max_seg_deg for a in geo.circle_arcs], dtype=float)
+        arrays.arc_theta = np.array([a.theta for a in geo.circle_arcs], dtype=float)
+        arrays.arc_radius = np.array([a.radius for a in geo.circle_arcs], dtype=float)
+        arrays.arc_ids = [a.id for a in geo.circle_arcs]
+        arrays.arc_labels = [a.label for a in geo.circle_arcs]
+        arrays.arc_colors = [a.color for a in geo.circle_arcs]
+        arrays.arc_attributes = [a.attributes for a in geo.circle_arcs]
+
+        arrays.bezier_n_segment = [b.n_segment for b in geo.cubic_beziers]
+        arrays.bezier_ids = [b.id for b in geo.cubic_beziers]
+        arrays.bezier_labels = [b.label for b in geo.cubic_beziers]
+        arrays.bezier_colors = [b.color for b in geo.cubic_beziers]
+        arrays.bezier_attributes = [b.attributes for b in geo.cubic_beziers]
+
+        return arrays
+
+    def to_geometry(self):
+        """Creates a Geometry from the arrays, the elements get back their ids, labels, colors and attributes."""
+        nodes = []
+        for (x, y), id_, label, precision, hanging in zip(
+            self.nodes.tolist(), self.node_ids, self.node_labels, self.node_precision.tolist(), self.node_hanging
+        ):
+            node = obj.Node(x, y, id_=id_, label=label, precision=precision)
+            node.hanging = bool(hanging)
+            nodes.append(node)
+
+        geo = Geometry()
+        geo.epsilon = self.epsilon
+        geo.nodes = [ni for ni, listed in zip(nodes, self.node_listed) if listed]
+
+        for (start, end), mesh_scaling, id_, label, color, attributes in zip(
+            self.lines.tolist(),
+            self.line_mesh_scaling.tolist(),
+            self.line_ids,
+            self.line_labels,
+            self.line_colors,
+            self.line_attributes,
+        ):
+            line = obj.Line(nodes[start], nodes[end], id_=id_, label=label, color=color, attributes=attributes)
+            line.meshScaling = mesh_scaling
+            geo.lines.append(line)
+
+        for (start, center, apex, end), max_seg_deg, theta, radius, id_, label, color, attributes in zip(
+            self.circle_arcs.tolist(),
+            self.arc_max_seg_deg.tolist(),
+            self.arc_theta.tolist(),
+            self.arc_radius.tolist(),
+            self.arc_ids,
+            self.arc_labels,
+            self.arc_colors,
+            self.arc_attributes,
+        ):
+            arc = obj.CircleArc(
+                nodes[start],
+                nodes[center],
+                nodes[end],
+                id_=id_,
+                label=label,
+                max_seg_deg=max_seg_deg,
+                color=color,
+                attributes=attributes,
+            )
+            arc.apex_pt = nodes[apex]
+            arc.max_seg_deg = max_seg_deg
+            arc.theta = theta
+            arc.radius = radius
+            geo.circle_arcs.append(arc)
+
+        for (start, control1, control2, end), n_segment, id_, label, color, attributes in zip(
+            self.cubic_beziers.tolist(),
+            self.bezier_n_segment,
+            self.bezier_ids,
+            self.bezier_labels,
+            self.bezier_colors,
+            self.bezier_attributes,
+        ):
+            bezier = obj.CubicBezier(
+                nodes[start],
+                nodes[control1],
+                nodes[control2],
+                nodes[end],
+                id_=id_,
+                label=label,
+                color=color,
+                attributes=attributes,
+            )
+            bezier.n_segment = n_segment
+            geo.cubic_beziers.append(bezier)
+
+        return geo
+
+    def bbox(self):
+        """[xmin, ymin, xmax, ymax] of the listed nodes, like ModelPiece.update_bbox"""
+        listed = self.nodes[self.node_listed]
+        return [*listed.min(axis=0).tolist(), *listed.max(axis=0).tolist()]
+
+    def translate(self, dx, dy):
+        """Moves every node with (dx, dy), the coordinates are rounded to the precision of the nodes."""
+        self.transform(affine.translation(dx, dy), rounding=True)
+
+    def rotate(self, ref_point=(0, 0), alpha=0.0):
+        """Rotates every node around the reference point with alpha degrees."""
+        self.transform(affine.rotation(alpha, ref_point), rounding=True)
+
+    def scale(self, sx, sy):
+        self.transform(affine.scaling(sx, sy))
+
+    def mirror(self, p1=(0, 0), p2=(0, 1)):
+        """
+        Mirrors every node on the line defined by p1 and p2. The start and end points of the arcs are swapped to
+        preserve the arc direction.
+        """
+        self.transform(affine.reflection(p1, p2))
+
+    def transform(self, matrix, rounding=False):
+        """Applies an affine transformation matrix to every node, like ModelPiece.transform."""
+        self.nodes = affine.apply(matrix, self.nodes)
+        if rounding:
+            self._round()
+
+        if affine.reverses_orientation(matrix):
+            self.circle_arcs = self.circle_arcs[:, [3, 1, 2, 0]]
+
+    def _round(self):
+        for precision in np.unique(self.node_precision).tolist():
+            rows = self.node_precision == precision
+            self.nodes[rows] = np.round(self.nodes[rows], precision)
+
+    def __copy__(self):
+        arrays = GeometryArrays()
+        for name, value in vars(self).items():
+            setattr(arrays, name, value.copy() if hasattr(value, "copy") else value)
+        return arrays
@@ -54,16 +54,11 @@ class GMSHModel:
                 end_point = None
                 for index, edge in enumerate(sf):
 
-                    # firstly, the code ordering the lines into the right order, to form a directed closed loop
+                    # firstly, the code ordering the lines into the right order, to form a directed closed loop,
+                    # the oriented edges are walked from their start points to their end points
                     if not start_point:
-                        if edge.id > 0:
-                            start_point = geom.add_point([edge.start_pt.x, edge.start_pt.y], self.lcar)
-                            end_point = geom.add_point([edge.end_pt.x, edge.end_pt.y], self.lcar)
-
-                        else:
-                            start_point = geom.add_point([edge.end_pt.x, edge.end_pt.y], self.lcar)
-                            end_point = geom.add_point([edge.start_pt.x, edge.start_pt.y], self.lcar)
-
+                        start_point = geom.add_point([edge.start_pt.x, edge.start_pt.y], self.lcar)
+                        end_point = geom.add_point([edge.end_pt.x, edge.end_pt.y], self.lcar)
                         first_point = start_point
                     else:
                         start_point = end_point
@@ -71,30 +66,26 @@ class GMSHModel:
                         if index == len(sf) - 1:
                             end_point = first_point
                         else:
-                            if edge.id > 0:
-                                end_point = geom.add_point([edge.end_pt.x, edge.end_pt.y], self.lcar)
-                            else:
-                                end_point = geom.add_point(
-                                    [edge.start_pt.x, edge.start_pt.y],
-                                    self.lcar,
-                                )
+                            end_point = geom.add_point([edge.end_pt.x, edge.end_pt.y], self.lcar)
 
                     # in the case of a line
-                    if isinstance(edge, obj.Line):
+                    if isinstance(edge.edge, obj.Line):
                         line_nr = geom.add_line(p0=start_point, p1=end_point)
                         gmsh_edges.append(line_nr)
 
                     # circle arcs
-                    if isinstance(edge, obj.CircleArc):
+                    if isinstance(edge.edge, obj.CircleArc):
                         center_pt = geom.add_point([edge.center_pt.x, edge.center_pt.y], self.lcar)
                         # arc_nr = geom.add_circle(start=start_point, center=center_pt, end=end_point)
                         arc_nr = geom.add_circle_arc(start=start_point, center=center_pt, end=end_point)
                         gmsh_edges.append(arc_nr)
 
                     # bezier curves
-                    if isinstance(edge, obj.CubicBezier):
-                        control1 = geom.add_point([edge.control1.x, edge.control1.y], self.lcar)
-                        control2 = geom.add_point([edge.control2.x, edge.control2.y], self.lcar)
+                    if isinstance(edge.edge, obj.CubicBezier):
+                        # the control points of a reversed curve are in the opposite order
+                        c1, c2 = (edge.control2, edge.control1) if edge.reversed else (edge.control1, edge.control2)
+                        control1 = geom.add_point([c1.x, c1.y], self.lcar)
+                        control2 = geom.add_point([c2.x, c2.y], self.lcar)
                         bezier = geom.add_bspline(
                             control_points=[
                                 start_point,
@@ -107,7 +98,7 @@ class GMSHModel:
 
                     # the number of the boundaries should be renumbered to get the
                     for key, val in self.boundaries.items():
-                        if abs(edge.id) in val:
+                        if edge.edge.id in val:
                             if key in self.boundary_queue_gmsh:
                                 self.boundary_queue_gmsh[key].append(gmsh_edges[-1])
                             else:
@@ -0,0 +1,270 @@
+"""
+Background execution of the simulation requests of the Encapsulator.
+
+Every job gets its own copy of the SimulationProject, so the jobs do not share their input and output state. The jobs
+are executed by a thread pool, the size of the pool limits the number of the simulations running at the same time.
+The streaming jobs put the partial results of the generator simulations in a queue as they are ready. The jobs can be
+sent to a pool of worker processes too, then the CPU bound Python parts of the simulations run in parallel.
+"""
+import pickle
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from copy import copy
+from queue import Queue
+from threading import Event, Lock
+from uuid import uuid4
+
+
+def exception_info(e: Exception) -> dict:
+    """The description of an exception in the outputs of the API."""
+    return {
+        "type": e.__class__.__name__,
+        "message": str(e),
+        "traceback": "".join(traceback.format_exception(type(e), e, e.__traceback__)),
+    }
+
+
+def run_project(project, data: dict, partial=None, stop=None) -> dict:
+    """
+    Runs the project with the input data and gives back its output. The exceptions are reported in the output.
+
+    :param partial: optional function, it is called with the partial results of the generator simulations
+    :param stop: optional threading.Event, the simulation is stopped at the next partial result when it is set
+    """
+    project._output.clear()
+    try:
+        project._input = data
+        project.update_input()
+        if partial is None:
+            project.run()
+        else:
+            steps = project.run_iter()
+            try:
+                for result in steps:
+                    partial(result)
+                    if stop is not None and stop.is_set():
+                        project._output["cancelled"] = True
+                        break
+            finally:
+                steps.close()
+    except Exception as e:
+        project._output["exception"] = exception_info(e)
+
+    return project._output
+
+
+class EventQueue(Queue):
+    """
+    The events of a streaming job. The events can be consumed from a thread by the get method, or they can be handed
+    over to a subscribed callback, e.g. to feed an asyncio.Queue without blocking a thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._callback = None
+
+    def subscribe(self, callback):
+        """
+        Calls the callback with the queued events and then with every new event instead of queueing them. The callback
+        is called from the thread of the job, None removes the callback.
+        """
+        with self.mutex:
+            self._callback = callback
+            while callback is not None and self.queue:
+                callback(self.queue.popleft())
+
+    def _put(self, item):
+        if self._callback is None:
+            super()._put(item)
+        else:
+            self._callback(item)
+
+
+class Job:
+    """
+    A simulation request submitted to the JobQueue.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, project, data: dict, stream: bool = False):
+        self.id = uuid4().hex
+        self.project = project
+        self.data = data
+        self.status = Job.QUEUED
+        self.output = None
+        self.future = None
+
+        # the events of the streaming jobs: ("partial", result) items, then ("result", output) and None at the end
+        self.events = EventQueue() if stream else None
+        self.stop = Event()
+
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def run(self):
+        self.status = Job.RUNNING
+        self.started = time.time()
+        try:
+            if self.events is None:
+                self.output = run_project(self.project, self.data)
+            else:
+                partial = lambda result: self.events.put(("partial", result))
+                self.output = run_project(self.project, self.data, partial, self.stop)
+        finally:
+            self._finish()
+
+        return self.output
+
+    def _finish(self):
+        self.finished = time.time()
+        if self.output is None or "exception" in self.output:
+            self.status = Job.FAILED
+        elif self.output.get("cancelled"):
+            self.status = Job.CANCELLED
+        else:
+            self.status = Job.FINISHED
+
+        # the finished jobs do not hold the project state
+        self.project = None
+
+        if self.events is not None:
+            self.events.put(("result", self.output))
+            self.events.put(None)
+
+    def _process_done(self, future):
+        """Done callback of the jobs running in a worker process, the output is sent back by the future."""
+        if future.cancelled():
+            return
+
+        try:
+            self.output = future.result()
+        except Exception as e:
+            # e.g. the worker process was killed
+            self.output = {"exception": exception_info(e)}
+
+        self._finish()
+
+    @property
+    def done(self):
+        return self.status in {Job.FINISHED, Job.FAILED, Job.CANCELLED}
+
+    def info(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    """
+    Runs the submitted jobs on a pool of worker threads.
+
+    :param max_workers: the maximal number of the simulations running at the same time
+    :param max_done: the number of the finished jobs kept for the status and result queries
+    """
+
+    def __init__(self, max_workers: int = 4, max_done: int = 1000):
+        self.max_workers = max_workers
+        self.max_done = max_done
+
+        self._jobs = {}
+        self._lock = Lock()
+        self._executor = None
+        self._process_executor = None
+
+    def set_max_workers(self, max_workers: int):
+        """Sets the concurrency limit. The running jobs are finished in the old pool."""
+        with self._lock:
+            self.max_workers = int(max_workers)
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if self._process_executor is not None:
+                self._process_executor.shutdown(wait=False)
+                self._process_executor = None
+
+    def submit(self, project, data: dict, stream: bool = False, process: bool = False) -> Job:
+        """
+        Submits a run of a copy of the project with the input data. The partial results of the streaming jobs are
+        put in their events queue.
+
+        :param process: run the job in a worker process, it is run in a thread if the project cannot be pickled
+        """
+        job = Job(copy(project), data, stream)
+        if process and not stream:
+            try:
+                pickle.dumps((job.project, data))
+            except Exception:
+                process = False
+
+        with self._lock:
+            self._forget_done()
+            self._jobs[job.id] = job
+            if process and not stream:
+                if self._process_executor is None:
+                    self._process_executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+                job.future = self._process_executor.submit(run_project, job.project, data)
+                job.future.add_done_callback(job._process_done)
+            else:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="simulation")
+
+                job.future = self._executor.submit(job.run)
+
+        return job
+
+    def get(self, job_id: str):
+        """Gives back the job with the id, or None if there is no such job."""
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancels a queued job, or stops a running streaming job at its next partial result. The other running jobs and
+        the finished jobs cannot be cancelled.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return False
+
+        if job.future.cancel():
+            job.status = Job.CANCELLED
+            job.finished = time.time()
+            job.project = None
+            if job.events is not None:
+                job.events.put(None)
+            return True
+
+        if job.events is not None:
+            job.stop.set()
+            return True
+
+        return False
+
+    def _forget_done(self):
+        """Removes the oldest finished jobs over the max_done limit."""
+        done = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in done[: max(0, len(done) - self.max_done + 1)]:
+            del self._jobs[job_id]
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+            if self._process_executor is not None:
+                self._process_executor.shutdown(wait=wait)
+                self._process_executor = None
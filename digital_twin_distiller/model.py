@@ -6,6 +6,7 @@ from uuid import uuid4
 
 from digital_twin_distiller import objects as obj
 from digital_twin_distiller.geometry import Geometry
+from digital_twin_distiller.resultcache import ResultCache, canonical_hash
 from digital_twin_distiller.snapshot import Snapshot
 
 
@@ -14,18 +15,26 @@ class BaseModel(metaclass=ABCMeta):
     This abstract class servers as a baseline to describe a digital-twin-distiller-model. It also provides automatic
     path creation, model building, execution, results extraction and cleanup.
 
-
+    The results can be cached by setting the `result_cache` class attribute or the `result_cache` keyword argument
+    to a `ResultCache` instance. Then the solver is not executed again if a model of the same class has already been
+    solved with the same solver script and the same `cache_key()`.
     """
 
+    # opt-in cache of the results, it is shared by the instances of the class
+    result_cache: ResultCache = None
+
     def __init__(self, **kwargs):
         """
         This function sets the paths and file names.
 
         Parameters:
             exportname: A specific name for a Model instance instead of a random generated string.
+            result_cache: A `ResultCache` instance that overrides the `result_cache` class attribute.
 
         """
         self.name = kwargs.get("exportname") or str(uuid4())
+        if kwargs.get("result_cache") is not None:
+            self.result_cache = kwargs["result_cache"]
         self.dir_current = Path(sys.modules[self.__module__].__file__).parent
         self.dir_resources = self.dir_current / "resources"
         self.dir_snapshots = self.dir_current / "snapshots"
@@ -129,6 +138,32 @@ class BaseModel(metaclass=ABCMeta):
         self._assign_boundary_conditions()
         self.add_postprocessing()
 
+    def cache_key(self):
+        """
+        Gives back the parameters of the model that change its results without changing its solver script, e.g. the
+        parameters of a post-processing step. They are the part of the result cache key. The values should be JSON
+        serializable, numpy arrays, sets or paths.
+        """
+        return None
+
+    def _result_key(self):
+        """
+        Gives back the result cache key of the exported model, or None if the cache is not used. The key is the hash of
+        the model class, the cache_key() and the solver script. The name of the model is removed from the script,
+        because it is random by default and it only appears in the file names.
+        """
+        if self.result_cache is None:
+            return None
+
+        try:
+            script = Path(self.snapshot.platform.metadata.file_script_name).read_text()
+        except OSError:
+            return None
+
+        script = script.replace(self.name, "")
+        cls = type(self)
+        return canonical_hash(f"{cls.__module__}.{cls.__qualname__}", self.cache_key(), script)
+
     def _init_directories(self):
         """
         Make the specified directories. This function will not raise an exception when a directory is already present.
@@ -156,11 +191,8 @@ class BaseModel(metaclass=ABCMeta):
         Iterate over the boundary conditions and assign them in the `snapshot` attribute.
         """
 
-        for bi in self.boundary_queue:
-            self.snapshot.assign_boundary_condition(*bi)
-
-        for abi in self.boundary_arc_queue:
-            self.snapshot.assign_arc_boundary_condition(*abi)
+        self.snapshot.assign_boundary_conditions(self.boundary_queue)
+        self.snapshot.assign_arc_boundary_conditions(self.boundary_arc_queue)
 
     @abstractmethod
     def setup_solver(self):
@@ -216,11 +248,16 @@ class BaseModel(metaclass=ABCMeta):
             if devmode:
                 self.snapshot.export(develmode=True)
                 self.snapshot.execute(cleanup=False, timeout=1e7)
+                res = self.snapshot.retrive_results()
             else:
                 self.snapshot.export(develmode=False)
-                self.snapshot.execute(cleanup=False, timeout=timeout)
-
-            res = self.snapshot.retrive_results()
+                key = self._result_key()
+                res = self.result_cache.get(key) if key else None
+                if res is None:
+                    self.snapshot.execute(cleanup=False, timeout=timeout)
+                    res = self.snapshot.retrive_results()
+                    if key and len(res) > 0:
+                        self.result_cache.set(key, res)
 
             # if cleanup:
             #     rmtree(self.dir_export)
@@ -1,9 +1,9 @@
-import operator
-from math import pi
+import numpy as np
 
+from digital_twin_distiller import affine
 from digital_twin_distiller.geometry import Geometry
-from digital_twin_distiller.objects import Node
-from digital_twin_distiller.utils import getID, get_short_id, mirror_point
+from digital_twin_distiller.geometry_arrays import GeometryArrays
+from digital_twin_distiller.utils import getID
 
 
 class ModelPiece:
@@ -27,48 +27,18 @@ class ModelPiece:
         self.geom.import_dxf(str(file_name))
         self.update_bbox()
 
+    def load_piece_from_arrays(self, arrays: GeometryArrays):
+        self.geom = arrays.to_geometry()
+        self.update_bbox()
+
+    def to_arrays(self):
+        return GeometryArrays.from_geometry(self.geom)
+
     def spawn(self):
         return self.__copy__()
 
     def translate(self, dx, dy):
-        updated = set()
-        for i, node_i in enumerate(self.geom.nodes):
-            self.geom.nodes[i].move_xy(dx, dy)
-            updated.add(get_short_id(node_i))
-
-        for i, li in enumerate(self.geom.lines):
-            id_start = get_short_id(li.start_pt)
-            id_end = get_short_id(li.end_pt)
-            if id_start not in updated:
-                self.geom.lines[i].start_pt.move_xy(dx, dy)
-                updated.add(id_start)
-
-            if id_end not in updated:
-                self.geom.lines[i].end_pt.move_xy(dx, dy)
-                updated.add(id_end)
-
-        for i, ai in enumerate(self.geom.circle_arcs):
-            id_start = get_short_id(ai.start_pt)
-            id_center = get_short_id(ai.center_pt)
-            id_apex = get_short_id(ai.apex_pt)
-            id_end = get_short_id(ai.end_pt)
-
-            if id_start not in updated:
-                self.geom.circle_arcs[i].start_pt.move_xy(dx, dy)
-                updated.add(id_start)
-
-            if id_center not in updated:
-                self.geom.circle_arcs[i].center_pt.move_xy(dx, dy)
-                updated.add(id_center)
-
-            if id_apex not in updated:
-                self.geom.circle_arcs[i].apex_pt.move_xy(dx, dy)
-                updated.add(id_apex)
-
-            if id_end not in updated:
-                self.geom.circle_arcs[i].end_pt.move_xy(dx, dy)
-                updated.add(id_end)
-
+        self.transform(affine.translation(dx, dy), rounding=True)
         self.update_bbox()
 
     def put(self, x, y, bbox_ref="lower-left"):
@@ -112,106 +82,70 @@ class ModelPiece:
         """
         This function mirrors all the geometry point on a line defined by p1 and p2.
         """
-        p1 = Node(*p1)
-        p2 = Node(*p2)
-        for i in range(len(self.geom.nodes)):
-            self.geom.nodes[i] = mirror_point(p1, p2, self.geom.nodes[i])
-
-        for i in range(len(self.geom.circle_arcs)):
-            # when mirroring the start and end points are going to be swapped to preserve the arc direction
-            start = mirror_point(p1, p2, self.geom.circle_arcs[i].start_pt)
-            end = mirror_point(p1, p2, self.geom.circle_arcs[i].end_pt)
-            self.geom.circle_arcs[i].start_pt = end
-            self.geom.circle_arcs[i].center_pt = mirror_point(p1, p2, self.geom.circle_arcs[i].center_pt)
-            self.geom.circle_arcs[i].apex_pt = mirror_point(p1, p2, self.geom.circle_arcs[i].apex_pt)
-            self.geom.circle_arcs[i].end_pt = start
-
-        for i in range(len(self.geom.lines)):
-            self.geom.lines[i].start_pt = mirror_point(p1, p2, self.geom.lines[i].start_pt)
-            self.geom.lines[i].end_pt = mirror_point(p1, p2, self.geom.lines[i].end_pt)
+        self.transform(affine.reflection(p1, p2))
 
     def rotate(self, ref_point=(0, 0), alpha=0.0):
         """
         Rotate all points of the modelpiece around the reference point with alpha degrees.
         """
+        self.transform(affine.rotation(alpha, ref_point), rounding=True)
+        self.update_bbox()
 
-        ref_point = Node(*ref_point)
-        alpha = alpha * pi / 180
-        for i in range(len(self.geom.nodes)):
-            self.geom.nodes[i] = self.geom.nodes[i].rotate_about(ref_point, alpha)
+    def scale(self, sx, sy):
+        self.transform(affine.scaling(sx, sy))
 
-        for i in range(len(self.geom.circle_arcs)):
-            self.geom.circle_arcs[i].start_pt = self.geom.circle_arcs[i].start_pt.rotate_about(ref_point, alpha)
-            self.geom.circle_arcs[i].center_pt = self.geom.circle_arcs[i].center_pt.rotate_about(ref_point, alpha)
-            self.geom.circle_arcs[i].apex_pt = self.geom.circle_arcs[i].apex_pt.rotate_about(ref_point, alpha)
-            self.geom.circle_arcs[i].end_pt = self.geom.circle_arcs[i].end_pt.rotate_about(ref_point, alpha)
+    def transform(self, matrix, rounding=False):
+        """
+        Applies an affine transformation matrix of digital_twin_distiller.affine to every point of the geometry,
+        the transformations can be composed into one matrix with affine.compose. The points are moved in place, and
+        the Node objects shared by more elements are moved only once. The start and end points of the arcs are
+        swapped by the mirroring transformations to preserve the arc direction.
 
-        for i in range(len(self.geom.lines)):
-            self.geom.lines[i].start_pt = self.geom.lines[i].start_pt.rotate_about(ref_point, alpha)
-            self.geom.lines[i].end_pt = self.geom.lines[i].end_pt.rotate_about(ref_point, alpha)
+        :param matrix: 3 x 3 matrix of the transformation
+        :param rounding: the new coordinates are rounded to the precision of the nodes
+        """
+        points = self._points()
+        xy = affine.apply(matrix, [(pi.x, pi.y) for pi in points]).tolist()
+        for pi, (x, y) in zip(points, xy):
+            if rounding:
+                x, y = round(x, pi.precision), round(y, pi.precision)
+            pi.x, pi.y = x, y
 
-        self.update_bbox()
+        if affine.reverses_orientation(matrix):
+            for arc in self.geom.circle_arcs:
+                arc.start_pt, arc.end_pt = arc.end_pt, arc.start_pt
 
-    def scale(self, sx, sy):
-        updated = set()
-        for i in range(len(self.geom.nodes)):
-            self.geom.nodes[i].x *= sx
-            self.geom.nodes[i].y *= sy
-            updated.add(get_short_id(self.geom.nodes[i]))
-
-        for i in range(len(self.geom.lines)):
-            id_start = get_short_id(self.geom.lines[i].start_pt)
-            id_end = get_short_id(self.geom.lines[i].end_pt)
-
-            if id_start not in updated:
-                self.geom.lines[i].start_pt.x *= sx
-                self.geom.lines[i].start_pt.y *= sy
-                updated.add(id_start)
-
-            if id_end not in updated:
-                self.geom.lines[i].end_pt.x *= sx
-                self.geom.lines[i].end_pt.y *= sy
-                updated.add(id_end)
-
-        for i in range(len(self.geom.circle_arcs)):
-            id_start = get_short_id(self.geom.circle_arcs[i].start_pt)
-            id_center = get_short_id(self.geom.circle_arcs[i].center_pt)
-            id_apex = get_short_id(self.geom.circle_arcs[i].apex_pt)
-            id_end = get_short_id(self.geom.circle_arcs[i].end_pt)
-
-            if id_start not in updated:
-                self.geom.circle_arcs[i].start_pt.x *= sx
-                self.geom.circle_arcs[i].start_pt.y *= sy
-                updated.add(id_start)
-
-            if id_center not in updated:
-                self.geom.circle_arcs[i].center_pt.x *= sx
-                self.geom.circle_arcs[i].center_pt.y *= sy
-                updated.add(id_center)
-
-            if id_apex not in updated:
-                self.geom.circle_arcs[i].apex_pt.x *= sx
-                self.geom.circle_arcs[i].apex_pt.y *= sy
-                updated.add(id_apex)
-
-            if id_end not in updated:
-                self.geom.circle_arcs[i].end_pt.x *= sx
-                self.geom.circle_arcs[i].end_pt.y *= sy
-                updated.add(id_end)
+        self.geom.invalidate_index()
+
+    def _points(self):
+        """Gives back the distinct Node objects of the nodes, lines, circle arcs and cubic beziers."""
+        points = {}
+        for ni in self.geom.nodes:
+            points.setdefault(id(ni), ni)
+
+        for li in self.geom.lines:
+            for pi in (li.start_pt, li.end_pt):
+                points.setdefault(id(pi), pi)
+
+        for ai in self.geom.circle_arcs:
+            for pi in (ai.start_pt, ai.center_pt, ai.apex_pt, ai.end_pt):
+                points.setdefault(id(pi), pi)
+
+        for bi in self.geom.cubic_beziers:
+            for pi in (bi.start_pt, bi.control1, bi.control2, bi.end_pt):
+                points.setdefault(id(pi), pi)
+
+        return list(points.values())
 
     def update_bbox(self):
-        minx = min(self.geom.nodes, key=lambda node_i: node_i.x).x
-        miny = min(self.geom.nodes, key=lambda node_i: node_i.y).y
-        maxx = max(self.geom.nodes, key=lambda node_i: node_i.x).x
-        maxy = max(self.geom.nodes, key=lambda node_i: node_i.y).y
-        self.bbox = [minx, miny, maxx, maxy]
-        self._update_extreme_points()
-
-    def _update_extreme_points(self):
-        self.upper = max(self.geom.nodes, key=operator.attrgetter("y"))
-        self.lower = min(self.geom.nodes, key=operator.attrgetter("y"))
-        self.right = max(self.geom.nodes, key=operator.attrgetter("x"))
-        self.left = min(self.geom.nodes, key=operator.attrgetter("x"))
+        nodes = self.geom.nodes
+        xy = np.array([(ni.x, ni.y) for ni in nodes], dtype=float).reshape(-1, 2)
+        (left, lower), (right, upper) = xy.argmin(axis=0).tolist(), xy.argmax(axis=0).tolist()
+
+        self.bbox = [nodes[left].x, nodes[lower].y, nodes[right].x, nodes[upper].y]
+
+        # extreme points
+        self.left, self.lower, self.right, self.upper = nodes[left], nodes[lower], nodes[right], nodes[upper]
 
     def __copy__(self):
         piece = ModelPiece(self.name)
@@ -4,7 +4,7 @@ from copy import copy
 
 from numpy import linspace
 
-from digital_twin_distiller.utils import getID, get_phi, get_short_id, mirror_point, pairwise
+from digital_twin_distiller.utils import getID, get_phi, mirror_point, pairwise
 
 
 def transformIntoInterval(minx, maxx, x):
@@ -38,6 +38,10 @@ class Node:
     the label can be important to rotate and copy and rotate the selected part of the geometry.
     """
 
+    __slots__ = ("x", "y", "id", "label", "precision", "hanging")
+
+    epsilon = 1e-5  # the nodes closer than epsilon in both directions are equal
+
     def __init__(self, x=0.0, y=0.0, id_=None, label=None, precision=6):
         self.x = x
         self.y = y
@@ -83,7 +87,7 @@ class Node:
             return False
 
     def __eq__(self, other):
-        return abs(self.x - other.x) < 1e-5 and abs(self.y - other.y) < 1e-5
+        return abs(self.x - other.x) < self.epsilon and abs(self.y - other.y) < self.epsilon
 
     def __add__(self, p):
         """Point(x1+x2, y1+y2)"""
@@ -178,8 +182,17 @@ class Node:
         # else:
         #     return False
 
-    def __hash__(self):
-        return int(get_short_id(self), base=16)
+    # The nodes are hashed by their identity: the coordinates are mutable, and the tolerance of __eq__ is not
+    # transitive, so no hash computed from the coordinates can agree with it. Use grid_cell() to index the nodes.
+    __hash__ = object.__hash__
+
+    def grid_cell(self):
+        """
+        Gives back the (i, j) index of the epsilon sized grid cell of the node, it can be used as a key to find the
+        equal nodes. Equal nodes are in the same or in neighbouring cells. The cells are centered on the multiples of
+        epsilon, the round coordinates are far from the borders.
+        """
+        return math.floor(self.x / self.epsilon + 0.5), math.floor(self.y / self.epsilon + 0.5)
 
     def length(self):
         return math.hypot(*self)
@@ -245,6 +258,8 @@ class Node:
 class Line:
     """A directed line, which is defined by the (start -> end) points"""
 
+    __slots__ = ("start_pt", "end_pt", "id", "label", "color", "attributes", "meshScaling")
+
     def __init__(self, start_pt, end_pt, id_=None, label=None, color=None, attributes: dict = {}):
         # sorting the incoming points by coordinate
         # sorted_points = sorted((start_pt, end_pt), key=lambda pi: pi.x)  # sorting by x coordinate
@@ -257,7 +272,6 @@ class Line:
         self.label = label
         self.color = color  # the color of the given edge can be used to render the appropriate boundary conditions to the given edges
         self.attributes = attributes.copy()
-        self.length = math.dist(self.start_pt, self.end_pt)
         self.meshScaling = 1.0
 
         getMeshScaling = attributes.get("meshScaling")
@@ -275,6 +289,10 @@ class Line:
             attributes=self.attributes,
         )
 
+    @property
+    def length(self):
+        return math.dist(self.start_pt, self.end_pt)
+
     def set_mesh_scaling(self, meshScaling):
         self.meshScaling = transformMeshScalingInterval(self.length / calculateMeshScalingInput(meshScaling))
 
@@ -372,6 +390,21 @@ class Line:
 class CircleArc:
     """A directed line, which is defined by the (start -> end) points"""
 
+    __slots__ = (
+        "start_pt",
+        "center_pt",
+        "end_pt",
+        "id",
+        "label",
+        "max_seg_deg",
+        "color",
+        "attributes",
+        "meshScaling",
+        "radius",
+        "theta",
+        "apex_pt",
+    )
+
     def __init__(
         self, start_pt, center_pt, end_pt, id_=None, label=None, max_seg_deg=1, color=None, attributes: dict = {}
     ):
@@ -424,14 +457,21 @@ class CircleArc:
 
     def distance_to_point(self, x, y):
         """
-        This function returns the minimum distance between p and the circle arcs points:
-        start, end, center and apex point.
+        This function returns the distance between the (x, y) point and the circle arc. The closest point is on the
+        arc if the point is in the angular range of the arc, otherwise it is one of the endpoints. The radius is
+        computed from the current start and center points, because the transforms move the nodes in place.
         """
+        cx, cy = self.center_pt.x, self.center_pt.y
+        radius = math.hypot(self.start_pt.x - cx, self.start_pt.y - cy)
+        phi_start = math.atan2(self.start_pt.y - cy, self.start_pt.x - cx)
+        sweep = (math.atan2(self.end_pt.y - cy, self.end_pt.x - cx) - phi_start) % (2 * math.pi)
+        phi = (math.atan2(y - cy, x - cx) - phi_start) % (2 * math.pi)
+
+        if phi <= sweep:
+            return abs(math.hypot(x - cx, y - cy) - radius)
+
         p = Node(x, y)
-        d1 = self.start_pt.distance_to(p)
-        d2 = self.apex_pt.distance_to(p)
-        d3 = self.end_pt.distance_to(p)
-        return min(d1, d2, d3)
+        return min(self.start_pt.distance_to(p), self.end_pt.distance_to(p))
 
     def __eq__(self, other):
         """
@@ -470,6 +510,8 @@ class CircleArc:
 
 
 class CubicBezier:
+    __slots__ = ("start_pt", "control1", "control2", "end_pt", "id", "label", "color", "attributes", "n_segment")
+
     def __init__(
         self,
         start_pt,
@@ -550,6 +592,37 @@ class CubicBezier:
         )
 
 
+class OrientedEdge:
+    """
+    A view of a line, circle arc or cubic bezier walked in the given direction, the edge is not copied. The reversed
+    edges are walked from their end points and their ids are negative. The other attributes are read from the edge.
+    """
+
+    __slots__ = ("edge", "reversed")
+
+    def __init__(self, edge, reversed=False):
+        self.edge = edge
+        self.reversed = reversed
+
+    @property
+    def id(self):
+        return -self.edge.id if self.reversed else self.edge.id
+
+    @property
+    def start_pt(self):
+        return self.edge.end_pt if self.reversed else self.edge.start_pt
+
+    @property
+    def end_pt(self):
+        return self.edge.start_pt if self.reversed else self.edge.end_pt
+
+    def __getattr__(self, name):
+        return getattr(self.edge, name)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.edge!r}, reversed={self.reversed})"
+
+
 class Rectangle:
     def __init__(self, x0: float = 0.0, y0: float = 0.0, **kwargs):
         """
@@ -0,0 +1,345 @@
+"""
+Faces of planar graphs.
+
+The edges leaving a node are sorted by their directions, and the faces are walked by turning to the next edge in
+clockwise order at every node, so every face is on the left side of its boundary. The walk gives every face exactly
+once in O(E log E) time. The unbounded face of every connected component is dropped, and the components lying inside
+a bounded face of another component become the holes of that face.
+
+The points are located in the faces by the even-odd rule: a horizontal ray from a point inside a face crosses the
+boundaries of the face an odd number of times. The crossings are counted with numpy for all the points in the bounding
+box of a face at once.
+"""
+from math import atan2, pi, sin, sqrt
+
+import numpy as np
+from shapely.geometry import Polygon
+
+
+def _position(node):
+    return node.x, node.y
+
+
+class Face:
+    """
+    A bounded face of a planar graph. Its boundaries are given by half-edges, the (edge index, u, v) triplets of the
+    edges walked from u to v. The face is on the left side of every half-edge, so the outer boundary is
+    counter-clockwise and the boundaries of the holes are clockwise.
+    """
+
+    def __init__(self, outer, area, position=_position):
+        self.outer = outer
+        self.holes = []
+        self.area = area
+        self.position = position
+
+    @property
+    def half_edges(self):
+        """The half-edges of the outer boundary, then the half-edges of the holes."""
+        half_edges = list(self.outer)
+        for hole in self.holes:
+            half_edges.extend(hole)
+        return half_edges
+
+    @property
+    def nodes(self):
+        """The nodes of the outer boundary in counter-clockwise order."""
+        return [u for _, u, _ in self.outer]
+
+    def rings(self):
+        """Gives back the coordinates of the outer boundary and of the holes as (n, 2) arrays."""
+        return [_ring([self.position(u) for _, u, _ in ring]) for ring in (self.outer, *self.holes)]
+
+    def polygon(self):
+        """
+        Gives back the shapely polygon of the face, the edges are replaced by their chords. The polygon is empty if
+        the face is bounded by less than 3 edges, e.g. by two arcs.
+        """
+        if len(self.outer) < 3:
+            return Polygon()
+
+        return Polygon(
+            [self.position(u) for _, u, _ in self.outer],
+            [[self.position(u) for _, u, _ in hole] for hole in self.holes if len(hole) >= 3],
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(nodes={len(self.outer)}, holes={len(self.holes)}, area={self.area})"
+
+
+def planar_faces(edges, position=_position, direction=None, area=None):
+    """
+    Gives back the bounded faces of a planar graph. The edges should not cross each other, they can meet only at their
+    endpoints. Parallel edges, like two arcs between the same nodes, are allowed.
+
+    :param edges: list of the (u, v) node pairs of the edges
+    :param position: function node -> (x, y), the default gives back the x and y attributes of the node
+    :param direction: optional function (edge index, u, v) -> the angle of the edge leaving u, e.g. the tangent of an
+                      arc, the default is the direction of the chord from u to v
+    :param area: optional function (edge index, u, v) -> the contribution of the edge to the signed area of a face
+                 walked from u to v, e.g. with the circular segment of an arc, the default is the term of the chord
+    :return: list of Face objects
+    """
+    edges = [tuple(ei) for ei in edges]
+
+    # the nodes are numbered, so they are hashed only once
+    ids = {}
+    xy = []
+    ends = []
+    for u, v in edges:
+        pair = []
+        for node in (u, v):
+            k = ids.get(node)
+            if k is None:
+                k = ids[node] = len(xy)
+                xy.append(position(node))
+            pair.append(k)
+        ends.append(pair)
+
+    # the half-edges are numbered 2 * i for u -> v and 2 * i + 1 for v -> u
+    def origin(h):
+        return ends[h >> 1][h & 1]
+
+    def target(h):
+        return ends[h >> 1][(h & 1) ^ 1]
+
+    def half_edge(h):
+        u, v = edges[h >> 1]
+        return (h >> 1, u, v) if h & 1 == 0 else (h >> 1, v, u)
+
+    angles = []
+    for h in range(2 * len(edges)):
+        if direction is None:
+            (xu, yu), (xv, yv) = xy[origin(h)], xy[target(h)]
+            angles.append(atan2(yv - yu, xv - xu))
+        else:
+            angles.append(direction(*half_edge(h)))
+
+    def half_edge_area(h):
+        if area is None:
+            (xu, yu), (xv, yv) = xy[origin(h)], xy[target(h)]
+            return 0.5 * (xu * yv - xv * yu)
+        return area(*half_edge(h))
+
+    # the edges having the same face on both sides do not separate regions, these are the bridges and the dangling
+    # edges, the cycles connected by them are walked as separate components
+    walks = _walk_faces(ends, angles, len(xy))
+    bridges = set()
+    for walk in walks:
+        walked = set()
+        for h in walk:
+            if h >> 1 in walked:
+                bridges.add(h >> 1)
+            walked.add(h >> 1)
+
+    if bridges:
+        walks = _walk_faces(ends, angles, len(xy), bridges)
+
+    # the unbounded face of a component is the face with the smallest signed area
+    component = _components(ends, len(xy), bridges)
+    faces = []
+    outer_walks = {}
+    for walk in walks:
+        walk_area = sum(half_edge_area(h) for h in walk)
+        c = component[origin(walk[0])]
+        if c not in outer_walks or walk_area < outer_walks[c][1]:
+            if c in outer_walks:
+                faces.append(outer_walks[c])
+            outer_walks[c] = (walk, walk_area)
+        else:
+            faces.append((walk, walk_area))
+
+    # the components inside a face are its holes, the innermost face is the smallest one containing the component
+    components = list(outer_walks)
+    points = _ring([xy[origin(walk[0])] for walk, _ in outer_walks.values()])
+    index = _PointIndex(points)
+    innermost = [None] * len(points)
+    for k, (walk, walk_area) in enumerate(faces):
+        c = component[origin(walk[0])]
+        for j in index.inside([_ring([xy[origin(h)] for h in walk])]):
+            if components[j] != c and (innermost[j] is None or walk_area < faces[innermost[j]][1]):
+                innermost[j] = k
+
+    holes = [[] for _ in faces]
+    for c, k in zip(components, innermost):
+        if k is not None:
+            holes[k].append(outer_walks[c])
+
+    result = []
+    for (walk, walk_area), holes_i in zip(faces, holes):
+        face = Face([half_edge(h) for h in walk], walk_area + sum(ai for _, ai in holes_i), position)
+        face.holes = [[half_edge(h) for h in hole] for hole, _ in holes_i]
+        result.append(face)
+
+    return result
+
+
+def locate_points(faces, points):
+    """
+    Gives back the index of the face containing each point, or -1 if the point is not inside any of the faces. The
+    edges of the faces are replaced by their chords, and the points in the holes are not inside the face. The faces
+    of planar_faces do not overlap, so a point is inside one face at most.
+
+    :param faces: list of Face objects
+    :param points: list of (x, y) coordinates
+    :return: numpy array of the face indices
+    """
+    index = _PointIndex(_ring(points))
+    located = np.full(len(index.points), -1)
+    for k, face in enumerate(faces):
+        located[index.inside(face.rings())] = k
+
+    return located
+
+
+def arc_direction(u, v, center, ccw=True):
+    """
+    Gives back the direction of the tangent of a circle arc leaving the u point, the arc goes from u to v counter-
+    clockwise if ccw is True, else clockwise. The points are (x, y) pairs.
+    """
+    orientation = 1 if ccw else -1
+    return atan2(orientation * (u[0] - center[0]), -orientation * (u[1] - center[1]))
+
+
+def arc_area(u, v, center, ccw=True):
+    """
+    Gives back the term of a circle arc walked from u to v in the signed area of a face: the term of its chord and
+    the area of its circular segment.
+    """
+    (xu, yu), (xv, yv), (cx, cy) = u, v, center
+    s, e = (u, v) if ccw else (v, u)
+    sweep = (atan2(e[1] - cy, e[0] - cx) - atan2(s[1] - cy, s[0] - cx)) % (2 * pi)
+    r2 = (xu - cx) ** 2 + (yu - cy) ** 2
+    return 0.5 * (xu * yv - xv * yu) + (1 if ccw else -1) * 0.5 * r2 * (sweep - sin(sweep))
+
+
+def bezier_direction(p0, p1, p2, p3):
+    """Gives back the direction of the tangent of a cubic bezier curve leaving p0, p1 and p2 are its control points."""
+    for pi_ in (p1, p2, p3):
+        if pi_[0] != p0[0] or pi_[1] != p0[1]:
+            return atan2(pi_[1] - p0[1], pi_[0] - p0[0])
+
+    return 0.0
+
+
+def bezier_area(p0, p1, p2, p3):
+    """
+    Gives back the term of a cubic bezier curve walked from p0 to p3 in the signed area of a face, the integral of
+    (x dy - y dx) / 2. The integrand is a polynomial of degree 5, so the 3 point Gauss-Legendre rule is exact.
+    """
+    area = 0.0
+    for t, w in ((0.5 - sqrt(0.15), 5 / 18), (0.5, 8 / 18), (0.5 + sqrt(0.15), 5 / 18)):
+        b = ((1 - t) ** 3, 3 * t * (1 - t) ** 2, 3 * t**2 * (1 - t), t**3)
+        db = (-3 * (1 - t) ** 2, 3 * (1 - t) * (1 - 3 * t), 3 * t * (2 - 3 * t), 3 * t**2)
+        x = sum(bi * pi_[0] for bi, pi_ in zip(b, (p0, p1, p2, p3)))
+        y = sum(bi * pi_[1] for bi, pi_ in zip(b, (p0, p1, p2, p3)))
+        dx = sum(bi * pi_[0] for bi, pi_ in zip(db, (p0, p1, p2, p3)))
+        dy = sum(bi * pi_[1] for bi, pi_ in zip(db, (p0, p1, p2, p3)))
+        area += w * 0.5 * (x * dy - y * dx)
+
+    return area
+
+
+def _ring(coordinates):
+    return np.array(coordinates, dtype=float).reshape(-1, 2)
+
+
+class _PointIndex:
+    """The points sorted by their x coordinates, so the points in the bounding box of a face are found by a search."""
+
+    def __init__(self, points):
+        self.points = points
+        self.order = np.argsort(points[:, 0], kind="stable")
+        self.x = points[self.order, 0]
+
+    def inside(self, rings):
+        """Gives back the indices of the points inside the rings by the even-odd rule, the first ring is the outer."""
+        outer = rings[0]
+        if len(outer) < 3:
+            return np.empty(0, dtype=int)
+
+        (xmin, ymin), (xmax, ymax) = outer.min(axis=0), outer.max(axis=0)
+        candidates = self.order[np.searchsorted(self.x, xmin) : np.searchsorted(self.x, xmax, side="right")]
+        y = self.points[candidates, 1]
+        candidates = candidates[(ymin <= y) & (y <= ymax)]
+        if not len(candidates):
+            return candidates
+
+        x, y = self.points[candidates, 0], self.points[candidates, 1]
+        odd = np.zeros(len(candidates), dtype=bool)
+        for ring in rings:
+            x1, y1 = ring[:, :1], ring[:, 1:]
+            x2, y2 = np.roll(x1, -1, axis=0), np.roll(y1, -1, axis=0)
+
+            # the edges crossing the horizontal line of a point, and the x coordinates of the crossings
+            crossing = (y1 > y) != (y2 > y)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                xc = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+
+            odd ^= np.count_nonzero(crossing & (x < xc), axis=0) % 2 == 1
+
+        return candidates[odd]
+
+
+def _walk_faces(ends, angles, nb_nodes, removed=()):
+    """
+    Gives back the face walks of the half-edges, the removed edges are skipped. The half-edge after u -> v is the
+    edge following v -> u in clockwise order around v.
+    """
+    leaving = [[] for _ in range(nb_nodes)]
+    for i, (u, v) in enumerate(ends):
+        if i not in removed:
+            leaving[u].append(2 * i)
+            leaving[v].append(2 * i + 1)
+
+    # the half-edges in the counter-clockwise order around their start nodes, and their positions in this order
+    order = {}
+    for hs in leaving:
+        hs.sort(key=angles.__getitem__)
+        for k, h in enumerate(hs):
+            order[h] = k
+
+    walks = []
+    visited = set()
+    for start in order:
+        if start in visited:
+            continue
+
+        walk = []
+        h = start
+        while h not in visited:
+            visited.add(h)
+            walk.append(h)
+
+            # turn at the end node of h
+            twin = h ^ 1
+            hs = leaving[ends[h >> 1][(h & 1) ^ 1]]
+            h = hs[order[twin] - 1]
+
+        walks.append(walk)
+
+    return walks
+
+
+def _components(ends, nb_nodes, removed=()):
+    """Gives back the connected component ids of the numbered nodes, the removed edges are skipped."""
+    parent = list(range(nb_nodes))
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+
+        # path compression
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+
+        return root
+
+    for i, (u, v) in enumerate(ends):
+        if i not in removed:
+            ru, rv = find(u), find(v)
+            if ru != rv:
+                parent[ru] = rv
+
+    return [find(k) for k in range(nb_nodes)]
@@ -1,17 +1,18 @@
 import itertools as it
 import subprocess
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
+from math import atan2
 from threading import Timer
 
 import matplotlib.pyplot as plt
 import networkx as nx
-from shapely.geometry import LinearRing, Point, Polygon
 
 from digital_twin_distiller import CircleArc, Line, Material, Node
 from digital_twin_distiller.boundaries import BoundaryCondition
 from digital_twin_distiller.metadata import NgSolveMetadata
+from digital_twin_distiller.planar import arc_area, arc_direction, locate_points, planar_faces
 from digital_twin_distiller.platforms.platform import Platform
-from digital_twin_distiller.utils import pairwise
 
 
 class NgSolve(Platform, metaclass=ABCMeta):
@@ -28,6 +29,13 @@ class NgSolve(Platform, metaclass=ABCMeta):
         self.G = nx.Graph()
         self.H = nx.DiGraph()
 
+        # the nodes of the G graph by their grid cells
+        self._node_cells = defaultdict(list)
+
+        # the faces of the G graph and the (number of nodes, number of edges) of G when they were found
+        self._faces = None
+        self._faces_state = None
+
         self.edge_attribures = {"type": None, "rightdomain": 0, "leftdomain": 0, "bc": -1}
 
         # materials
@@ -58,18 +66,33 @@ class NgSolve(Platform, metaclass=ABCMeta):
 
     def export_geometry_element(self, e, boundary=None):
         if isinstance(e, Node):
-            self.G.add_node(e)
+            self.G.add_node(self._graph_node(e))
 
         if isinstance(e, Line):
             attributes = self.edge_attribures.copy()
             attributes["type"] = "line"
-            self.G.add_edge(e.start_pt, e.end_pt, **attributes)
+            self.G.add_edge(self._graph_node(e.start_pt), self._graph_node(e.end_pt), **attributes)
 
         if isinstance(e, CircleArc):
             attributes = self.edge_attribures.copy()
             attributes["type"] = "arc"
             attributes["center_pt"] = tuple(e.center_pt)
-            self.G.add_edge(e.start_pt, e.end_pt, **attributes)
+            attributes["start_pt"] = self._graph_node(e.start_pt)
+            self.G.add_edge(attributes["start_pt"], self._graph_node(e.end_pt), **attributes)
+
+    def _graph_node(self, node):
+        """
+        Gives back the node of the G graph, which is equal to the given one, or registers the given node. The equal
+        nodes can be in the neighbouring grid cells as well, so every graph node is keyed by the same Node instance.
+        """
+        i, j = node.grid_cell()
+        for cell in it.product((i - 1, i, i + 1), (j - 1, j, j + 1)):
+            for ni in self._node_cells.get(cell, ()):
+                if ni == node:
+                    return ni
+
+        self._node_cells[i, j].append(node)
+        return node
 
     def export_solving_steps(self):
         """This function is not used here."""
@@ -198,17 +221,17 @@ class NgSolve(Platform, metaclass=ABCMeta):
 
     def compose_geometry(self):
         """
-        1. Find all cycles in the undirected graph
-        2. Select the cycles that contains only 1 label
-        3. Transform the cycles into directed graphs
+        1. Find the faces of the planar graph
+        2. Select the faces that contains only 1 label
+        3. Transform the faces into directed graphs
         4. merge these graphs
         """
 
-        # convert the cycles into a list of undirected graphs
-        allcycle = self._find_all_cycles(self.G)
+        # the regions bounded by the edges of the graph
+        faces = self._find_faces(self.G)
 
-        # filter the cycles
-        loops, labels = self._filter_cycles(allcycle)
+        # filter the faces
+        loops, labels = self._filter_cycles(faces)
 
         # generate surfaces
         surfaces = self._generate_surfaces(loops, labels)
@@ -218,124 +241,85 @@ class NgSolve(Platform, metaclass=ABCMeta):
 
         return surfaces
 
-    def _find_all_cycles(self, G):
+    def _find_faces(self, G):
         """
-        forked from networkx dfs_edges function. Assumes nodes are integers, or at least
-        types which work with min() and > .
-
-        Credit: https://gist.github.com/joe-jordan/6548029
+        Gives back the bounded faces of the graph. The arcs leave their endpoints in the directions of their tangents,
+        and their circular segments are added to the areas of the faces. The faces of the G graph are cached, they are
+        found again when an edge or an endpoint of an edge is changed.
         """
+        edges = list(G.edges(data=True))
+
+        # the content of the edges, which defines the faces
+        state = tuple(
+            (id(u), u.x, u.y, id(v), v.x, v.y, attr["type"], attr.get("center_pt"), attr.get("start_pt") is u)
+            for u, v, attr in edges
+        )
+        if G is self.G and self._faces_state == state:
+            return self._faces
+
+        def direction(i, u, v):
+            attr = edges[i][2]
+            if attr["type"] != "arc":
+                return atan2(v.y - u.y, v.x - u.x)
+
+            return arc_direction((u.x, u.y), (v.x, v.y), attr["center_pt"], attr["start_pt"] is u)
 
-        nodes = [list(i)[0] for i in nx.connected_components(G)]
-
-        # extra variables for cycle detection:
-        cycle_stack = []
-        output_cycles = set()
-
-        def get_hashable_cycle(cycle):
-            """cycle as a tuple in a deterministic order."""
-            m = min(cycle)
-            mi = cycle.index(m)
-            mi_plus_1 = mi + 1 if mi < len(cycle) - 1 else 0
-            if cycle[mi - 1] > cycle[mi_plus_1]:
-                result = cycle[mi:] + cycle[:mi]
-            else:
-                result = list(reversed(cycle[:mi_plus_1])) + list(reversed(cycle[mi_plus_1:]))
-            return tuple(result)
-
-        for start in nodes:
-            if start in cycle_stack:
-                continue
-            cycle_stack.append(start)
-
-            stack = [(start, iter(G[start]))]
-            while stack:
-                parent, children = stack[-1]
-                try:
-                    child = next(children)
-
-                    if child not in cycle_stack:
-                        cycle_stack.append(child)
-                        stack.append((child, iter(G[child])))
-                    else:
-                        i = cycle_stack.index(child)
-                        if i < len(cycle_stack) - 2:
-                            output_cycles.add(get_hashable_cycle(cycle_stack[i:]))
-
-                except StopIteration:
-                    stack.pop()
-                    cycle_stack.pop()
-
-        allcycle = (tuple(i) for i in output_cycles)
-
-        # convert cycles into graphs
-        return tuple(nx.Graph(pairwise(cycle, cycle=True)) for cycle in allcycle)
-
-    def _filter_cycles(self, cycles: list):
+        def area(i, u, v):
+            attr = edges[i][2]
+            if attr["type"] != "arc":
+                return 0.5 * (u.x * v.y - v.x * u.y)
+
+            return arc_area((u.x, u.y), (v.x, v.y), attr["center_pt"], attr["start_pt"] is u)
+
+        faces = planar_faces([(u, v) for u, v, _ in edges], direction=direction, area=area)
+        if G is self.G:
+            self._faces, self._faces_state = faces, state
+
+        return faces
+
+    def _filter_cycles(self, faces: list):
         """
-        This function filters the cycles based on how many labels one cycle contains.
+        This function filters the faces based on how many labels one face contains.
         """
-        labelcounter = []
-        for Hi in cycles:
-            labels_i = []
-            # convert the cycle into a polygon
-            lr = Polygon(LinearRing([tuple(ni) for ni in Hi.nodes]))
-
-            # iterate over the materials
-            for mat_name, mat_i in self.mat.items():
-                # iterate over the materials label points
-                for label_position in mat_i.assigned:
-                    # if the label is in the polygon append it to the label set
-                    if lr.contains(Point(label_position)):
-                        labels_i.append(mat_name)
-
-            # append all labels that is in 1 cycle to the labelcounter list
-            labelcounter.append(labels_i)
+        # the label points of the materials are located in the faces at once
+        labels = [(mat_name, position) for mat_name, mat_i in self.mat.items() for position in mat_i.assigned]
+        located = locate_points(faces, [position for _, position in labels])
+
+        # collect the labels that are in one face
+        labelcounter = [[] for _ in faces]
+        for (mat_name, _), k in zip(labels, located):
+            if k >= 0:
+                labelcounter[k].append(mat_name)
 
         # labelselector is now a list of lists, now we have to select the elements with length=1
         # selector is now a list of booleans
         selector = tuple(map(lambda li: len(li) == 1, labelcounter))
 
-        # using selector, filter the cycles and labels
-        loops = it.compress(cycles, selector)
+        # using selector, filter the faces and labels
+        loops = it.compress(faces, selector)
         selected_labels = tuple(li[0] for li in it.compress(labelcounter, selector))
 
         return loops, selected_labels
 
     def _generate_surfaces(self, loops, labels):
         """
-        This function turns a list of undirected graphs into a list of
-        directed graphs with edge attributes. These edge attributes are the
-        leftdomain and rightdomain with the proper material names.
+        This function turns a list of faces into a list of directed graphs with edge attributes. These edge attributes
+        are the leftdomain and rightdomain with the proper material names. The faces are on the left side of their
+        edges.
         """
         surfaces = []
         for loop, label in zip(loops, labels):
             # the new surface
             si = nx.DiGraph()
 
-            # only 1 cycle exist
-            edges = nx.find_cycle(loop)
-
-            # the signed area will help to decide the orientation of the cycle found above.
-            area = 0.0
-            for n_start, n_end in edges:
+            for _, n_start, n_end in loop.half_edges:
                 # copy the default edge attributes
                 attrs = self.edge_attribures.copy()
-
-                # add the new edges' contribution to the area
-                area += (n_end.x - n_start.x) * (n_end.y + n_start.y)
+                attrs["leftdomain"] = label
 
                 # add the edge to the surface
                 si.add_edge(n_start, n_end, **attrs)
 
-            # iterate over the edges and set the materials name on the left/right side based on the cycles' orientation
-            orientation = "counter-clockwise" if area < 0 else "clockwise"
-            for n_start, n_end in edges:
-                if orientation == "clockwise":
-                    si[n_start][n_end]["rightdomain"] = label
-                else:
-                    si[n_start][n_end]["leftdomain"] = label
-
             surfaces.append(si)
 
         return surfaces
@@ -364,9 +348,10 @@ class NgSolve(Platform, metaclass=ABCMeta):
                         T[u][v]["rightdomain"] = attr["rightdomain"]
 
                 elif T.has_edge(v, u):
+                    # the sides of the reversed edge are swapped
                     attr2 = T.get_edge_data(v, u)
                     if attr2["leftdomain"] == 0:
-                        T[v][u]["leftdomain"] = attr["r"]
+                        T[v][u]["leftdomain"] = attr["rightdomain"]
 
                     if attr2["rightdomain"] == 0:
                         T[v][u]["rightdomain"] = attr["leftdomain"]
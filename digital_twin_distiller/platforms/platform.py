@@ -5,6 +5,32 @@ from digital_twin_distiller.material import Material
 from digital_twin_distiller.metadata import Metadata
 
 
+class ScriptBuffer:
+    """
+    In-memory solver script. The written parts are collected in a list and they are written to the script file with a
+    single write when the buffer is closed.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+        self._chunks = []
+
+    def write(self, str_):
+        self._chunks.append(str_)
+
+    def getvalue(self):
+        return "".join(self._chunks)
+
+    def close(self):
+        if self.closed:
+            return
+
+        with open(self.name, "w") as f:
+            f.write(self.getvalue())
+        self.closed = True
+
+
 class Platform(metaclass=ABCMeta):
     def __init__(self, m: Metadata):
         self.metadata = m
@@ -12,18 +38,23 @@ class Platform(metaclass=ABCMeta):
 
         self.file_script_handle = None
 
+        # the text of the last script exported to the script file
+        self.script = None
+
     def open(self, fhandle=None):
+        self.script = None
         if fhandle:
             self.file_script_handle = fhandle
         else:
-            self.file_script_handle = open(self.metadata.file_script_name, "w")
+            self.file_script_handle = ScriptBuffer(self.metadata.file_script_name)
 
     def close(self):
+        if isinstance(self.file_script_handle, ScriptBuffer):
+            self.script = self.file_script_handle.getvalue()
         self.file_script_handle.close()
 
     def write(self, str_, nb_newline=1):
-        self.file_script_handle.write(str_)
-        self.newline(nb_newline)
+        self.file_script_handle.write(str_ + "\n" * nb_newline)
 
     def newline(self, n):
         self.file_script_handle.write("\n" * n)
@@ -16,13 +16,13 @@ def execute_model(model: ${name}):
 def default_simulation(model, modelparams, simparams, miscparams):
     return "Hello World!"
 
-if __name__ == "__main__":
 
-    ModelDir.set_base(__file__)
+# the model is set on module level, so it is set when the project is imported, e.g. by the worker processes
+ModelDir.set_base(__file__)
+sim.set_model(${name})
 
-    # set the model for the simulation
-    sim.set_model(${name})
 
+if __name__ == "__main__":
     model = Encapsulator(sim)
     model.build_docs(ModelDir.DOCS)
     model.run()
@@ -0,0 +1,163 @@
+"""
+On-disk cache of the simulation results.
+
+The results are stored in pickle files named by the hash of their keys. The access time of an entry is refreshed on
+every hit, so when the cache grows over its limits the least recently used entries are removed first.
+"""
+import hashlib
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+
+
+def _canonical(o):
+    """Converts the objects that are not supported by the json module."""
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+
+    if isinstance(o, np.generic):
+        return o.item()
+
+    if isinstance(o, (set, frozenset)):
+        return sorted(o, key=repr)
+
+    if isinstance(o, Path):
+        return o.as_posix()
+
+    raise TypeError(f"{type(o).__name__} objects cannot be hashed by their content")
+
+
+def canonical_hash(*parts):
+    """
+    Gives back the sha256 hash of the parts. The dictionaries are hashed independently from the order of their keys,
+    and the numpy arrays are hashed like the lists of their elements. A TypeError is raised for the objects that have
+    no stable serialization.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(json.dumps(part, sort_keys=True, default=_canonical).encode())
+        h.update(b"\0")
+
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Content addressed cache of picklable results in a directory.
+
+    :param directory: the cache directory, it is created if it does not exist
+    :param max_entries: the maximal number of stored results, None means no limit
+    :param max_size: the maximal total size of the stored results in bytes, None means no limit
+    """
+
+    suffix = ".pkl"
+
+    def __init__(self, directory, max_entries=None, max_size=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return self.directory / f"{key}{self.suffix}"
+
+    @staticmethod
+    def _touch(path):
+        """Sets the modification time of the file to the current time, it is used as the time of the last access."""
+        now = time.time_ns()
+        os.utime(path, ns=(now, now))
+
+    def _entries(self):
+        """(last access time, size, path) of the stored results, the least recently used first."""
+        entries = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # removed by an other process
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        return sorted(entries)
+
+    def get(self, key, default=None):
+        """Gives back the result stored with the key, or the default value if there is no such result."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            self._touch(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except (pickle.UnpicklingError, EOFError):
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """Stores the value with the key, then removes the least recently used entries over the limits."""
+        # the file is written under a temporary name, so the other processes never see a partial result
+        with NamedTemporaryFile("wb", dir=self.directory, suffix=".tmp", delete=False) as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        path = self._path(key)
+        os.replace(f.name, path)
+        self._touch(path)
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache is within its limits."""
+        if self.max_entries is None and self.max_size is None:
+            return
+
+        entries = self._entries()
+        count = len(entries)
+        size = sum(si for _, si, _ in entries)
+        for _, si, path in entries:
+            if self._within_limits(count, size):
+                break
+
+            path.unlink(missing_ok=True)
+            count -= 1
+            size -= si
+            self.evictions += 1
+
+    def _within_limits(self, count, size):
+        if self.max_entries is not None and count > self.max_entries:
+            return False
+
+        return self.max_size is None or size <= self.max_size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
+
+    def __contains__(self, key):
+        return self._path(key).exists()
+
+    def __len__(self):
+        return len(self._entries())
+
+    def stats(self):
+        """Gives back the hit/miss counters of this cache object and the current size of the cache directory."""
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "size": sum(si for _, si, _ in entries),
+        }
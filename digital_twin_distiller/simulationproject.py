@@ -1,7 +1,11 @@
-import functools
+import inspect
 import json
 import operator as op
+import pickle
 from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from pathlib import Path
 from typing import Dict
 
 from digital_twin_distiller.doe import *
@@ -9,6 +13,64 @@ from digital_twin_distiller.model import BaseModel
 from digital_twin_distiller.modelpaths import ModelDir
 
 
+def iterate_simulation(result):
+    """
+    Yields the partial results of a generator simulation and gives back its result. The result is the return value of
+    the generator, or the list of the partial results if it does not return anything. Other results are given back
+    as they are.
+    """
+    if not inspect.isgenerator(result):
+        return result
+
+    partials = []
+    try:
+        while True:
+            try:
+                partial = next(result)
+            except StopIteration as stop:
+                return partials if stop.value is None else stop.value
+
+            partials.append(partial)
+            yield partial
+    finally:
+        # the simulation is stopped if the partial results are not needed any more
+        result.close()
+
+
+def simulate(func, model, modelparams, simparams, miscparams):
+    """Calls the simulation function and gives back its result, the generator simulations are run to their end."""
+    steps = iterate_simulation(func(model, modelparams, simparams, miscparams))
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+# the parsed default configurations by their paths, with the (modification time, size) of the files
+_defaults = {}
+
+
+def load_defaults(path) -> dict:
+    """
+    Gives back the parsed content of the json file of a default configuration. The file is parsed again only if it
+    changed since the last call, so the result is shared between the calls and should be copied before modification.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    state = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _defaults.get(path)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+
+    with open(path) as f:
+        cfg = dict(json.load(f))
+
+    _defaults[path] = (state, cfg)
+    return cfg
+
+
 class SimulationProject:
     app_name = "digital twin project"
 
@@ -30,6 +92,22 @@ class SimulationProject:
         # This dictionary stores the functions for the different simulations.
         self.simulations = {}
 
+    def __copy__(self):
+        """
+        Gives back a project with the same model and registered simulations, but with its own input, output and
+        configuration state, so more requests can be processed at the same time.
+        """
+        project = type(self).__new__(type(self))
+        project.__dict__.update(self.__dict__)
+
+        project._input = {}
+        project._output = {}
+        project.cfg_simulation = {}
+        project.cfg_model = {}
+        project.cfg_tolerances = {}
+        project.cfg_misc = {}
+        return project
+
     def set_model(self, model: BaseModel):
         """
         Set a model class for the simulations.
@@ -48,22 +126,19 @@ class SimulationProject:
 
         file_sim = ModelDir.DEFAULTS / "simulation.json"
         assert file_sim.exists(), f"Default simulation.json does not exist @ {file_sim.resolve()}"
-        with open(file_sim) as f:
-            default_cfg = dict(json.load(f))
-            if sim_type not in default_cfg.keys():
-                raise ValueError(f"There is no simulation called {self.cfg_simulation['type']!r}")
+        default_cfg = load_defaults(file_sim)
+        if sim_type not in default_cfg.keys():
+            raise ValueError(f"There is no simulation called {sim_type!r}")
 
-            self.cfg_simulation = default_cfg[sim_type]
+        self.cfg_simulation = deepcopy(default_cfg[sim_type])
 
         file_model = ModelDir.DEFAULTS / "model.json"
         assert file_model.exists(), "Default model.json does not exist."
-        with open(file_model) as f:
-            self.cfg_model = dict(json.load(f))
+        self.cfg_model = deepcopy(load_defaults(file_model))
 
         file_misc = ModelDir.DEFAULTS / "misc.json"
         assert file_misc.exists(), "Default misc.json does not exist."
-        with open(file_misc) as f:
-            self.cfg_misc = dict(json.load(f))
+        self.cfg_misc = deepcopy(load_defaults(file_misc))
 
     def update_input(self):
         self._load_defaults()
@@ -88,6 +163,14 @@ class SimulationProject:
         this function will execute the selected simulation and puts the results
         into the _output dictionary.
         """
+        for _ in self.run_iter():
+            pass
+
+    def run_iter(self):
+        """
+        The same as run(), but the partial results of the generator simulations are yielded as they are ready. The
+        other simulations and the tolerance analysis do not yield any partial results.
+        """
 
         # get the simulation type from the simulation section.
         sim_type = self.cfg_simulation["type"]
@@ -98,9 +181,8 @@ class SimulationProject:
         if self.cfg_tolerances["parameters"]:
             self.tolerance_analysis()
         else:
-            self._output["res"] = self.simulations[sim_type](
-                self.model, self.cfg_model, self.cfg_simulation, self.cfg_misc
-            )
+            result = self.simulations[sim_type](self.model, self.cfg_model, self.cfg_simulation, self.cfg_misc)
+            self._output["res"] = yield from iterate_simulation(result)
 
     def tolerance_analysis(self):
         """
@@ -113,11 +195,6 @@ class SimulationProject:
         parameter_tolerances = tuple(self.cfg_tolerances["parameters"].values())
         original_values = tuple(self.cfg_model[pi] for pi in parameter_names)
 
-        result = self.simulations[sim_type](self.model, self.cfg_model, self.cfg_simulation, self.cfg_misc)
-        self._output["res"] = result
-        self._output["tolerances"] = {}
-        yref = self._format_result(result)
-
         # get the designs
         designs = []
         if doe_type == "ff":
@@ -129,22 +206,44 @@ class SimulationProject:
         elif doe_type == "ccf":
             designs = doe_ccf(len(parameter_names))
 
-        Y = []
+        # every design gets its own copy of the model parameters, the first one is the reference
+        jobs = [dict(self.cfg_model)]
         for di in designs:
             dX = map(op.mul, di, parameter_tolerances)
             dX = map(op.add, dX, original_values)
-            X = dict(zip(parameter_names, dX))
-            self.cfg_model.update(X)
+            jobs.append({**self.cfg_model, **dict(zip(parameter_names, dX))})
+
+        results = self._run_simulations(sim_type, jobs)
+
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+
+        self._output["res"] = result
+        self._output["tolerances"] = {}
+        yref = self._format_result(result)
+
+        # the failed designs are reported with their parameters in the output
+        Y = []
+        failed = []
+        for X, results_i in zip(jobs[1:], results):
+            if isinstance(results_i, Exception) or results_i is None:
+                failed.append({"parameters": X, "error": repr(results_i)})
+                continue
 
-            results = self.simulations[sim_type](self.model, self.cfg_model, self.cfg_simulation, self.cfg_misc)
+            Y.append(self._format_result(results_i))
 
-            Y.append(self._format_result(results))
+        if failed:
+            self._output["failed"] = failed
 
         # print(pprint.pformat(Y, indent=2, compact=True))
 
         for var_i in variables:
             # self._output['tolerances'][var_i] = {'upper': None, 'lower': None, 'upper_res': None, 'lower_res': None}
             self._output["tolerances"][var_i] = {"upper": None, "lower": None}
+            if not Y:
+                continue
+
             for yi in Y:
                 delta = list(map(op.sub, yi[var_i], yref[var_i]))
                 delta.sort(key=lambda di: abs(di))
@@ -156,6 +255,46 @@ class SimulationProject:
             self._output["tolerances"][var_i]["lower"] = Y[0]["delta"]
             # self._output['tolerances'][var_i]['lower_res'] = Y[0]
 
+    def _run_simulations(self, sim_type, jobs):
+        """
+        Runs the simulation with every model parameter dictionary of the jobs list. The results are given back in the
+        order of the jobs, the failed simulations are represented by their exceptions.
+
+        The jobs run one after another by default, because a simulation can use its own pool of `misc["processes"]`
+        workers. They are run on a process pool of `misc["tolerance_processes"]` workers if it is set to more than 1,
+        or to None to use every core, and the simulation can be sent to the worker processes.
+        """
+        func = self.simulations[sim_type]
+        processes = self.cfg_misc.get("tolerance_processes", 1)
+
+        try:
+            pickle.dumps((func, self.model, self.cfg_simulation, self.cfg_misc))
+            parallel = processes is None or processes > 1
+        except Exception:
+            parallel = False
+
+        results = []
+        if not parallel or len(jobs) < 2:
+            for modelparams in jobs:
+                try:
+                    results.append(
+                        simulate(func, self.model, modelparams, deepcopy(self.cfg_simulation), deepcopy(self.cfg_misc))
+                    )
+                except Exception as e:
+                    results.append(e)
+
+            return results
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(simulate, func, self.model, p, self.cfg_simulation, self.cfg_misc) for p in jobs]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+
+        return results
+
     def _format_result(self, results) -> dict:
         """
         Format any result into a standard dictionary format. In this format all dictionary keys have a list as a value.
@@ -203,6 +342,12 @@ class SimulationProject:
         the following signature: function_name(model, modelparams, simprams, miscparams)
         and should return a dict with the results or a list of dicts.
 
+        The function can be a generator too, then it should yield the partial
+        results (e.g. the result of every step of a sweep) as they are ready.
+        These are streamed by the /process_stream endpoint. The result of the
+        simulation is the return value of the generator, or the list of the
+        partial results if it does not return anything.
+
         Parameters:
             name: The name of the simulation. This name will be used in the
                   json API call to identify the simulation.
@@ -214,13 +359,10 @@ class SimulationProject:
             # register the function in the simulations dictionary
             self.simulations[name] = func
 
-            # this is the wrapper function around the original.  This section
-            # is needed to use the input function as a normal function.
-            @functools.wraps(func)
-            def _wrapper(*arg, **kw):
-                return func(*arg, **kw)
-
-            return _wrapper
+            # The original function is given back, so it can be used as a
+            # normal function and it can be pickled by its name, e.g. for the
+            # worker processes of the tolerance analysis.
+            return func
 
         return _decorator
 
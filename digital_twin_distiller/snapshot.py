@@ -1,13 +1,35 @@
-from collections import defaultdict
+import os
+from collections import OrderedDict, defaultdict
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
 
 from digital_twin_distiller.boundaries import BoundaryCondition
 from digital_twin_distiller.geometry import Geometry
+from digital_twin_distiller.geometry_arrays import GeometryArrays
 from digital_twin_distiller.material import Material
 from digital_twin_distiller.platforms.platform import Platform
+from digital_twin_distiller.resultcache import ResultCache, canonical_hash
+from digital_twin_distiller.spatial_index import NearestEdgeIndex, arc_boxes, arc_distances, segment_distances
 from digital_twin_distiller.utils import getID
 
 
 class Snapshot:
+    # opt-in reuse of the solutions, identical solver scripts are solved only once. Only the metrics file is restored
+    # for a reused solution, the other files of the solver, e.g. the mesh or the solution file, are not created.
+    deduplicate = False
+
+    # optional shared ResultCache of the metrics files, so the solutions are reused between processes too
+    solution_store: ResultCache = None
+
+    # number of the solver launches avoided by the deduplication
+    avoided_runs = 0
+
+    # the least recently used metrics files of the scripts solved in this process: script hash -> content
+    max_solutions = 128
+    _solutions = OrderedDict()
+
     def __init__(self, p: Platform):
         self.id = getID()
         self.platform = p
@@ -19,6 +41,9 @@ class Snapshot:
         self.circle_arcs = {}
         self.metrics = []
 
+        # nearest edge indices of the lines and the circle arcs: attribute name -> (index, edges, state)
+        self._edge_indices = {}
+
     def set_platform(self, p: Platform):
         self.platform = p
 
@@ -31,25 +56,89 @@ class Snapshot:
             self.boundaries[bc.name] = bc
 
     def assign_boundary_condition(self, x, y, name):
-
-        if name not in self.boundaries.keys():
-            raise ValueError(f'There is no boundary condition called "{name}"')
-
-        closest_line = min(self.lines.values(), key=lambda li: li.distance_to_point(x, y))
-
-        self.boundaries[name].assigned.add(closest_line.id)
+        self.assign_boundary_conditions([(x, y, name)])
 
     def assign_arc_boundary_condition(self, x, y, name):
-
-        if name not in self.boundaries.keys():
-            raise ValueError(f'There is no boundary condition called "{name}"')
-
-        closest_arc = min(
-            self.circle_arcs.values(),
-            key=lambda arc_i: arc_i.distance_to_point(x, y),
-        )
-
-        self.boundaries[name].assigned.add(closest_arc.id)
+        self.assign_arc_boundary_conditions([(x, y, name)])
+
+    def assign_boundary_conditions(self, queue):
+        """
+        Assigns the boundary conditions to the lines closest to the given points.
+
+        :param queue: iterable of (x, y, name) tuples
+        """
+        self._assign_closest("lines", queue)
+
+    def assign_arc_boundary_conditions(self, queue):
+        """
+        Assigns the boundary conditions to the circle arcs closest to the given points.
+
+        :param queue: iterable of (x, y, name) tuples
+        """
+        self._assign_closest("circle_arcs", queue)
+
+    def closest_line(self, x, y):
+        """Gives back the line closest to the (x, y) point."""
+        index, lines = self._get_edge_index("lines")
+        return lines[index.nearest(x, y)]
+
+    def closest_arc(self, x, y):
+        """Gives back the circle arc closest to the (x, y) point."""
+        index, arcs = self._get_edge_index("circle_arcs")
+        return arcs[index.nearest(x, y)]
+
+    def _assign_closest(self, name, queue):
+        for x, y, bc_name in queue:
+            if bc_name not in self.boundaries.keys():
+                raise ValueError(f'There is no boundary condition called "{bc_name}"')
+
+            index, edges = self._get_edge_index(name)
+            closest = edges[index.nearest(x, y)]
+            self.boundaries[bc_name].assigned.add(closest.id)
+
+    def _get_edge_index(self, name):
+        """
+        Gives back the nearest edge index of the lines or the circle arcs, it is rebuilt only when the dictionary
+        has been changed.
+        """
+        edges = getattr(self, name)
+        state = (id(edges), len(edges))
+        cached = self._edge_indices.get(name)
+        if cached is not None and cached[2] == state:
+            return cached[0], cached[1]
+
+        values = list(edges.values())
+        if name == "lines":
+            coordinates = np.array(
+                [(li.start_pt.x, li.start_pt.y, li.end_pt.x, li.end_pt.y) for li in values], dtype=float
+            ).reshape(-1, 4)
+            boxes = np.column_stack(
+                (
+                    np.minimum(coordinates[:, 0], coordinates[:, 2]),
+                    np.minimum(coordinates[:, 1], coordinates[:, 3]),
+                    np.maximum(coordinates[:, 0], coordinates[:, 2]),
+                    np.maximum(coordinates[:, 1], coordinates[:, 3]),
+                )
+            )
+            distance = lambda x, y, indices: segment_distances(x, y, coordinates[indices])
+        else:
+            coordinates = np.array(
+                [
+                    (arc.start_pt.x, arc.start_pt.y, arc.center_pt.x, arc.center_pt.y, arc.end_pt.x, arc.end_pt.y)
+                    for arc in values
+                ],
+                dtype=float,
+            ).reshape(-1, 6)
+            boxes = arc_boxes(coordinates)
+            distance = lambda x, y, indices: arc_distances(x, y, coordinates[indices])
+
+        index = NearestEdgeIndex(boxes, distance)
+        self._edge_indices[name] = (index, values, state)
+        return index, values
+
+    def invalidate_index(self):
+        """Drops the nearest edge indices, it has to be called after the lines or arcs are moved."""
+        self._edge_indices.clear()
 
     def add_material(self, mat: Material):
         if mat.name in self.materials.keys():
@@ -64,6 +153,11 @@ class Snapshot:
             raise ValueError(f'There is no material called "{name}"')
 
     def add_geometry(self, geo: Geometry):
+        if isinstance(geo, GeometryArrays):
+            geo = geo.to_geometry()
+
+        self.invalidate_index()
+
         for ni in geo.nodes:
             self.nodes[ni.id] = ni
 
@@ -112,9 +206,10 @@ class Snapshot:
 
         exported = set()
 
-        # Export the boundaries first
+        # Export the boundaries first, in the order of the edges, so the script does not depend on the random ids
+        order = {id_i: i for i, id_i in enumerate(chain(self.lines, self.circle_arcs))}
         for name_i, boundary_i in self.boundaries.items():
-            for id_i in boundary_i.assigned:
+            for id_i in sorted(boundary_i.assigned, key=lambda id_: order.get(id_, -1)):
                 if id_i in self.lines.keys():
                     line_i = self.lines[id_i]
                     self.platform.export_geometry_element(line_i, boundary=name_i)
@@ -172,7 +267,85 @@ class Snapshot:
             return None
 
     def execute(self, cleanup=False, timeout=10):
-        return self.platform.execute(cleanup=cleanup, timeout=timeout)
+        """
+        Executes the exported solver script. If `deduplicate` is set and the same script has already been solved in
+        this process or it is in the `solution_store`, then the solver is not launched, the stored metrics file is
+        written instead. The other output files of the solver are not restored.
+        """
+        key = self._script_key()
+        if key is not None:
+            metrics = Snapshot._solutions.get(key)
+            if metrics is None and Snapshot.solution_store is not None:
+                metrics = Snapshot.solution_store.get(key)
+
+            if metrics is not None:
+                self._remember_solution(key, metrics)
+                Path(self.platform.metadata.file_metrics_name).write_text(metrics)
+                Snapshot.avoided_runs += 1
+                return True
+
+        previous = self._metrics_state()
+        result = self.platform.execute(cleanup=cleanup, timeout=timeout)
+
+        # a metrics file left behind by an earlier run is not a solution of this script
+        if key is not None and result and self._metrics_state() not in {None, previous}:
+            self._store_solution(key)
+
+        return result
+
+    def _script_key(self):
+        """
+        Gives back the hash of the exported solver script, or None if it cannot be deduplicated. The names of the script
+        and the metrics file are replaced in the script, because they are different for every model.
+        """
+        if not self.deduplicate:
+            return None
+
+        metadata = self.platform.metadata
+        script = self.platform.script
+        if script is None:
+            try:
+                script = Path(metadata.file_script_name).read_text()
+            except (OSError, TypeError):
+                return None
+
+        names = set()
+        for name_i in (metadata.file_metrics_name, metadata.format_file_script_name()):
+            names.add(str(name_i))
+            names.add(Path(name_i).resolve().as_posix())
+
+        for name_i in sorted(names, key=len, reverse=True):
+            script = script.replace(name_i, "")
+
+        return canonical_hash(type(self.platform).__name__, script)
+
+    def _metrics_state(self):
+        """(modification time, size) of the metrics file, or None if it does not exist."""
+        try:
+            stat = os.stat(self.platform.metadata.file_metrics_name)
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def _store_solution(self, key):
+        """Stores the metrics file of a finished solution for the later runs of the same script."""
+        try:
+            metrics = Path(self.platform.metadata.file_metrics_name).read_text()
+        except OSError:
+            return
+
+        self._remember_solution(key, metrics)
+        if Snapshot.solution_store is not None:
+            Snapshot.solution_store.set(key, metrics)
+
+    @staticmethod
+    def _remember_solution(key, metrics):
+        """Keeps the metrics file in this process, the least recently used ones are dropped over `max_solutions`."""
+        Snapshot._solutions[key] = metrics
+        Snapshot._solutions.move_to_end(key)
+        while len(Snapshot._solutions) > Snapshot.max_solutions:
+            Snapshot._solutions.popitem(last=False)
 
     def retrive_results(self):
         results = defaultdict(list)
@@ -0,0 +1,227 @@
+"""
+Distance kernels and nearest edge queries for the lines and circle arcs.
+
+The edges are stored in a uniform grid by their bounding boxes. A query visits growing blocks of cells around the
+point and computes the exact distances of the candidate edges, until no unvisited edge can be closer than the best one.
+"""
+from math import floor, inf, pi, sqrt
+
+import numpy as np
+
+
+def segment_distances(x, y, segments):
+    """
+    Gives back the distances between the (x, y) point and the [x0, y0, x1, y1] rows of the segments array. The
+    arithmetic is the same as in Line.distance_to_point, so the results are identical.
+
+    The x and y can be arrays of P points too, then the result is a (P, N) array.
+    """
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+    x = np.asarray(x, dtype=float)[..., None]
+    y = np.asarray(y, dtype=float)[..., None]
+    ax, ay, bx, by = segments.T
+
+    abx = bx - ax
+    aby = by - ay
+    bex = x - bx
+    bey = y - by
+    aex = x - ax
+    aey = y - ay
+
+    ab_be = abx * bex + aby * bey
+    ab_ae = abx * aex + aby * aey
+
+    to_start = np.sqrt(aex * aex + aey * aey)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        perpendicular = np.abs(abx * aey - aby * aex) / np.sqrt(abx * abx + aby * aby)
+
+    # the zero length segments are points
+    perpendicular = np.where(np.isnan(perpendicular), to_start, perpendicular)
+
+    return np.where(ab_be > 0, np.sqrt(bex * bex + bey * bey), np.where(ab_ae < 0, to_start, perpendicular))
+
+
+def arc_distances(x, y, arcs):
+    """
+    Gives back the distances between the (x, y) point and the [x0, y0, cx, cy, x1, y1] rows of the arcs array. The arcs
+    go counter-clockwise from the start point (x0, y0) to the end point (x1, y1) around the center (cx, cy), the radius
+    is the distance of the start point from the center.
+
+    The x and y can be arrays of P points too, then the result is a (P, N) array.
+    """
+    arcs = np.asarray(arcs, dtype=float).reshape(-1, 6)
+    x = np.asarray(x, dtype=float)[..., None]
+    y = np.asarray(y, dtype=float)[..., None]
+    sx, sy, cx, cy, ex, ey = arcs.T
+
+    radius = np.hypot(sx - cx, sy - cy)
+    phi_start = np.arctan2(sy - cy, sx - cx)
+    sweep = np.mod(np.arctan2(ey - cy, ex - cx) - phi_start, 2 * pi)
+    phi = np.mod(np.arctan2(y - cy, x - cx) - phi_start, 2 * pi)
+
+    # the closest point is on the arc if the point is in its angular range, otherwise it is one of the endpoints
+    to_circle = np.abs(np.hypot(x - cx, y - cy) - radius)
+    to_ends = np.minimum(np.hypot(x - sx, y - sy), np.hypot(x - ex, y - ey))
+    return np.where(phi <= sweep, to_circle, to_ends)
+
+
+def arc_boxes(arcs):
+    """
+    Gives back the [xmin, ymin, xmax, ymax] bounding boxes of the [x0, y0, cx, cy, x1, y1] rows of the arcs array. The
+    extremal points of the circle are added to the endpoints when they are on the arc.
+    """
+    arcs = np.asarray(arcs, dtype=float).reshape(-1, 6)
+    sx, sy, cx, cy, ex, ey = arcs.T
+
+    radius = np.hypot(sx - cx, sy - cy)
+    phi_start = np.arctan2(sy - cy, sx - cx)
+    sweep = np.mod(np.arctan2(ey - cy, ex - cx) - phi_start, 2 * pi)
+
+    boxes = np.column_stack((np.minimum(sx, ex), np.minimum(sy, ey), np.maximum(sx, ex), np.maximum(sy, ey)))
+    for k, (dx, dy) in enumerate(((1, 0), (0, 1), (-1, 0), (0, -1))):
+        on_arc = np.mod(k * pi / 2 - phi_start, 2 * pi) <= sweep
+        px = np.where(on_arc, cx + dx * radius, sx)
+        py = np.where(on_arc, cy + dy * radius, sy)
+        boxes[:, 0] = np.minimum(boxes[:, 0], px)
+        boxes[:, 1] = np.minimum(boxes[:, 1], py)
+        boxes[:, 2] = np.maximum(boxes[:, 2], px)
+        boxes[:, 3] = np.maximum(boxes[:, 3], py)
+
+    return boxes
+
+
+def closest(distances):
+    """
+    Gives back the (distance, index) pair of the smallest distance. If more entities are at the same distance, then
+    the smallest index is given back, like min() over the entities in their original order.
+    """
+    i = int(np.argmin(distances))
+    return float(distances[i]), i
+
+
+class NearestEdgeIndex:
+    """
+    Uniform grid index of edges given by their [xmin, ymin, xmax, ymax] bounding boxes.
+
+    The edges of the cells are stored in one array ordered by the cells, the cell_start and cell_end arrays give the
+    ranges of the cells in it, so the edges of a block of cells can be collected with array operations.
+
+    :param boxes: (N, 4) array of the bounding boxes
+    :param distance: function (x, y, indices) -> the exact distances of the indexed edges from the (x, y) point
+    """
+
+    # maximal number of cells along one axis
+    max_cells = 1024
+
+    # edges covering more cells than this are not stored in the grid, they are tested in every query
+    max_cells_per_edge = 64
+
+    def __init__(self, boxes, distance):
+        self.boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        self.distance = distance
+
+        n = len(self.boxes)
+        if n == 0:
+            self.origin = np.zeros(2)
+            self.cell_size = 1.0
+            self.shape = (0, 0)
+            self.large = np.empty(0, dtype=int)
+            self.cell_edges = np.empty(0, dtype=int)
+            self.cell_start = self.cell_end = np.empty((0, 0), dtype=int)
+            return
+
+        self.origin = self.boxes[:, :2].min(axis=0)
+        extent = self.boxes[:, 2:].max(axis=0) - self.origin
+
+        # about one edge per cell on average, but the cells are not smaller than the typical edge
+        sizes = np.maximum(self.boxes[:, 2] - self.boxes[:, 0], self.boxes[:, 3] - self.boxes[:, 1])
+        self.cell_size = max(
+            float(np.median(sizes)),
+            sqrt(extent[0] * extent[1] / n),
+            float(extent.max()) / self.max_cells,
+        )
+        if self.cell_size <= 0.0:
+            self.cell_size = 1.0
+
+        nx, ny = self.shape = tuple(int(floor(ei / self.cell_size)) + 1 for ei in extent)
+
+        lower = np.floor((self.boxes[:, :2] - self.origin) / self.cell_size).astype(int)
+        upper = np.floor((self.boxes[:, 2:] - self.origin) / self.cell_size).astype(int)
+        lower = np.clip(lower, 0, (nx - 1, ny - 1))
+        upper = np.clip(upper, 0, (nx - 1, ny - 1))
+        width = upper - lower + 1
+        nb_cells = width[:, 0] * width[:, 1]
+
+        self.large = np.flatnonzero(nb_cells > self.max_cells_per_edge)
+        small = np.flatnonzero(nb_cells <= self.max_cells_per_edge)
+
+        # (edge, cell) pairs of the small edges
+        counts = nb_cells[small]
+        edges = np.repeat(small, counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        wy = np.repeat(width[small, 1], counts)
+        i = np.repeat(lower[small, 0], counts) + local // wy
+        j = np.repeat(lower[small, 1], counts) + local % wy
+        cells = i * ny + j
+
+        order = np.argsort(cells, kind="stable")
+        self.cell_edges = edges[order]
+        bounds = np.searchsorted(cells[order], np.arange(nx * ny + 1))
+        self.cell_start = bounds[:-1].reshape(nx, ny)
+        self.cell_end = bounds[1:].reshape(nx, ny)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def nearest(self, x, y):
+        """
+        Gives back the index of the edge closest to the (x, y) point. If more edges are at the same distance, then the
+        smallest index is given back, like min() over the edges in their original order.
+        """
+        if len(self) == 0:
+            raise ValueError("There are no edges in the index.")
+
+        best = self._closest(x, y, self.large)
+
+        nx, ny = self.shape
+        ci = floor((x - self.origin[0]) / self.cell_size)
+        cj = floor((y - self.origin[1]) / self.cell_size)
+
+        # the blocks smaller than the distance of the point from the grid are empty
+        r = max(0, -ci, ci - nx + 1, -cj, cj - ny + 1)
+        while True:
+            best = min(best, self._closest(x, y, self._block(ci, cj, r)))
+
+            # the edges outside of the block are farther than r cells from the point
+            if best[0] < r * self.cell_size:
+                break
+
+            # every cell of the grid is visited
+            if ci - r <= 0 and cj - r <= 0 and ci + r >= nx - 1 and cj + r >= ny - 1:
+                break
+
+            r = max(1, 2 * r)
+
+        return best[1]
+
+    def _closest(self, x, y, indices):
+        """(distance, index) of the closest edge, the smallest index is chosen from the equally close edges."""
+        if len(indices) == 0:
+            return inf, -1
+
+        d = self.distance(x, y, indices)
+        d_min = d.min()
+        return d_min, int(indices[d == d_min].min())
+
+    def _block(self, ci, cj, r):
+        """The indices of the edges in the cells at most r steps far from the (ci, cj) cell, with repetitions."""
+        nx, ny = self.shape
+        i0, i1 = max(ci - r, 0), min(ci + r, nx - 1)
+        j0, j1 = max(cj - r, 0), min(cj + r, ny - 1)
+        if i0 > i1 or j0 > j1:
+            return np.empty(0, dtype=int)
+
+        starts = self.cell_start[i0 : i1 + 1, j0 : j1 + 1].ravel()
+        counts = self.cell_end[i0 : i1 + 1, j0 : j1 + 1].ravel() - starts
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return self.cell_edges[positions]
@@ -1,11 +1,11 @@
 import csv
 import functools
+import os
 import warnings
-from itertools import tee, zip_longest
+from itertools import count, tee, zip_longest
 from math import atan2, fmod, pi, sqrt
 from pathlib import Path
 from statistics import fmean
-from uuid import uuid4
 
 import matplotlib.pyplot as plt
 from numpy import linspace
@@ -30,8 +30,24 @@ __all__ = [
 ]
 
 
+def _reset_id_generator():
+    """
+    The ids are built from a random 64 bit process prefix and a counter, the prefix is drawn again in forked child
+    processes, so the ids of the worker processes are not colliding.
+    """
+    global _id_prefix, _id_counter
+    _id_prefix = int.from_bytes(os.urandom(8), "big") << 64
+    _id_counter = count(1)
+
+
+_reset_id_generator()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_id_generator)
+
+
 def getID():
-    return int(uuid4())
+    """Gives back a unique 128 bit integer id, the last digits are counting up within a process."""
+    return _id_prefix | next(_id_counter)
 
 
 def mirror_point(p1, p2, p3):
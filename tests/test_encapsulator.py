@@ -1,13 +1,31 @@
+import asyncio
+import json
+import os
 import unittest
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Event
+from types import SimpleNamespace
+from unittest.mock import patch
 
 import requests
 from fastapi.testclient import TestClient
 
 from digital_twin_distiller.cli import new
-from digital_twin_distiller.encapsulator import Encapsulator
+from digital_twin_distiller.encapsulator import (
+    WORKER_SETTINGS,
+    Encapsulator,
+    InputJsonSim,
+    build_docs,
+    create_app,
+    create_worker_app,
+    process_sim,
+)
+from digital_twin_distiller.jobqueue import EventQueue, JobQueue
+from digital_twin_distiller.model import BaseModel
 from digital_twin_distiller.modelpaths import ModelDir
 from digital_twin_distiller.simulationproject import SimulationProject
+from digital_twin_distiller.snapshot import Snapshot
 from digital_twin_distiller.utils import purge_dir
 
 CURRENT = Path(__file__).parent
@@ -26,6 +44,47 @@ class DummySimulationProject(SimulationProject):
         pass
 
 
+class SweepProject(SimulationProject):
+    def update_input(self):
+        self.cfg_simulation = self._input["simulation"]
+        self.cfg_tolerances = {"parameters": {}}
+
+
+class WorkerModel(BaseModel):
+    def setup_solver(self):
+        pass
+
+    def add_postprocessing(self):
+        pass
+
+    def define_materials(self):
+        pass
+
+    def define_boundary_conditions(self):
+        pass
+
+    def build_geometry(self):
+        pass
+
+
+class PidProject(DummySimulationProject):
+    def run(self):
+        self._output = {"x": self._input["model"]["x"], "pid": os.getpid()}
+
+
+sweep_project = SweepProject()
+worker_project = DummySimulationProject()
+worker_project.set_model(WorkerModel)
+
+
+@sweep_project.register("sweep")
+def sweep(model, modelparams, simparams, miscparams):
+    for i in range(simparams["nsteps"]):
+        yield {"step": i}
+
+    return {"nsteps": simparams["nsteps"]}
+
+
 class TestServer(unittest.TestCase):
     new(MODELNAME, CURRENT)
 
@@ -86,6 +145,279 @@ class TestServer(unittest.TestCase):
         self.server.set_port(example_port)
         self.assertEqual(self.server.port, example_port)
 
+    def test_jobs(self):
+        response = self.client.post("/jobs", json={"model": {"x": 1}})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job_id"]
+
+        self.server.app.jobs.get(job_id).future.result(timeout=10)
+        response = self.client.get(f"/jobs/{job_id}")
+        self.assertEqual(response.json()["status"], "finished")
+
+        response = self.client.get(f"/jobs/{job_id}/result")
+        self.assertEqual(response.status_code, 200)
+        self.assertDictEqual(response.json()["model"], {"x": 1})
+
+        # finished jobs cannot be cancelled
+        self.assertEqual(self.client.delete(f"/jobs/{job_id}").status_code, 409)
+
+        self.assertEqual(self.client.get("/jobs/falseid").status_code, 404)
+        self.assertEqual(self.client.get("/jobs/falseid/result").status_code, 404)
+        self.assertEqual(self.client.delete("/jobs/falseid").status_code, 404)
+
+    def test_batch(self):
+        items = [{"model": {"x": 1}}, {"simulation": "notadict"}, {"model": {"x": 2}}]
+        response = self.client.post("/process_batch", json=items)
+        self.assertEqual(response.status_code, 200)
+
+        outputs = response.json()
+        self.assertEqual(len(outputs), 3)
+        self.assertDictEqual(outputs[0]["model"], {"x": 1})
+        self.assertEqual(outputs[1]["exception"]["type"], "ValidationError")
+        self.assertDictEqual(outputs[2]["model"], {"x": 2})
+
+        # the items are run by worker processes, or by threads if the project cannot be pickled
+        app = create_app(PidProject(), max_jobs=2)
+        items = [{"model": {"x": i}} for i in range(4)]
+        with TestClient(app) as client:
+            outputs = client.post("/process_batch", json=items).json()
+            self.assertListEqual([oi["x"] for oi in outputs], [0, 1, 2, 3])
+            self.assertNotIn(os.getpid(), {oi["pid"] for oi in outputs})
+
+            app.project.unpicklable = lambda: None
+            outputs = client.post("/process_batch", json=items).json()
+            self.assertSetEqual({oi["pid"] for oi in outputs}, {os.getpid()})
+        app.jobs.shutdown()
+
+    def test_stream(self):
+        project = self.server.app.project
+        self.server.app.project = sweep_project
+        try:
+            response = self.client.post("/process_stream", json={"simulation": {"type": "sweep", "nsteps": 3}})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+            events = [json.loads(line) for line in response.text.splitlines()]
+            self.assertListEqual([e["event"] for e in events], ["partial"] * 3 + ["result"])
+            self.assertListEqual([e["data"] for e in events[:3]], [{"step": 0}, {"step": 1}, {"step": 2}])
+            self.assertDictEqual(events[-1]["data"], {"res": {"nsteps": 3}})
+
+            response = self.client.post(
+                "/process_stream", params={"format": "sse"}, json={"simulation": {"type": "sweep", "nsteps": 1}}
+            )
+            self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+            self.assertIn('event: partial\ndata: {"step": 0}\n\n', response.text)
+            self.assertIn('event: result\ndata: {"res": {"nsteps": 1}}\n\n', response.text)
+
+            self.assertEqual(self.client.post("/process_stream", params={"format": "xml"}, json={}).status_code, 400)
+
+            # the sweep is collected by the ordinary endpoint
+            response = self.client.post("/process_sim", json={"simulation": {"type": "sweep", "nsteps": 2}})
+            self.assertDictEqual(response.json(), {"res": {"nsteps": 2}})
+        finally:
+            self.server.app.project = project
+
+    def test_stop_stream(self):
+        started = Event()
+        release = Event()
+
+        @sweep_project.register("endless")
+        def endless(model, modelparams, simparams, miscparams):
+            started.set()
+            i = 0
+            while True:
+                release.wait(10)
+                yield i
+                i += 1
+
+        queue = JobQueue(max_workers=1)
+        job = queue.submit(sweep_project, {"simulation": {"type": "endless"}}, stream=True)
+        started.wait(10)
+        self.assertTrue(queue.cancel(job.id))
+        release.set()
+        job.future.result(timeout=10)
+
+        self.assertEqual(job.status, "cancelled")
+        events = []
+        while (event := job.events.get(timeout=10)) is not None:
+            events.append(event)
+        self.assertEqual(events[-1], ("result", {"cancelled": True}))
+        queue.shutdown()
+
+    def test_cancel_process_sim(self):
+        started = Event()
+        release = Event()
+
+        class BlockingProject(DummySimulationProject):
+            def run(self):
+                started.set()
+                release.wait(10)
+                self._output = self._input
+
+        app = create_app(BlockingProject(), max_jobs=1)
+        request = SimpleNamespace(app=app)
+        blocking = app.jobs.submit(app.project, {"x": 0})
+        started.wait(10)
+
+        async def cancel_request():
+            task = asyncio.create_task(process_sim(InputJsonSim(model={"x": 1}), request))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            await task
+
+        # the cancellation is not swallowed, and the queued job is cancelled
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(cancel_request())
+
+        job = [job for job in app.jobs._jobs.values() if job is not blocking][0]
+        self.assertEqual(job.status, "cancelled")
+
+        release.set()
+        blocking.future.result(timeout=10)
+        app.jobs.shutdown()
+
+    def test_create_app(self):
+        app1 = create_app(DummySimulationProject())
+        app2 = create_app(DummySimulationProject())
+        self.assertIsNot(app1.project, app2.project)
+        self.assertIsNot(app1.jobs, app2.jobs)
+        self.assertEqual(app1.title, "digital twin project API")
+
+        response = TestClient(app1).post("/process_sim", json={"model": {"x": 1}})
+        self.assertDictEqual(response.json()["model"], {"x": 1})
+
+    def test_workers(self):
+        # the workers import the project, so it has to be defined on module level
+        with self.assertRaises(ValueError):
+            Encapsulator(DummySimulationProject(), workers=3).worker_settings()
+
+        server = Encapsulator(worker_project, workers=3)
+        with TemporaryDirectory() as cache_dir:
+            server.set_result_cache(cache_dir, max_entries=10)
+            try:
+                with patch("uvicorn.run") as run:
+                    server.run()
+
+                args, kwargs = run.call_args
+                self.assertEqual(args[0], "digital_twin_distiller.encapsulator:create_worker_app")
+                self.assertTrue(kwargs["factory"])
+                self.assertEqual(kwargs["workers"], 3)
+                settings = json.loads(os.environ[WORKER_SETTINGS])
+                self.assertEqual(settings["project"], f"{__name__}:worker_project")
+                self.assertEqual(settings["model"], f"{__name__}:WorkerModel")
+
+                # a worker creates its own app from the settings in the environment, the model is set in the main
+                # block of the simulation scripts, which is not run by the workers
+                BaseModel.result_cache = Snapshot.solution_store = None
+                Snapshot.deduplicate = False
+                worker_project.model = None
+                worker_app = create_worker_app()
+                self.assertIsNot(worker_app, server.app)
+                self.assertIs(worker_app.project, worker_project)
+                self.assertIs(worker_project.model, WorkerModel)
+                self.assertEqual(BaseModel.result_cache.directory, Path(cache_dir).resolve() / "models")
+                self.assertEqual(Snapshot.solution_store.directory, Path(cache_dir).resolve() / "solutions")
+                self.assertTrue(Snapshot.deduplicate)
+
+                client = TestClient(worker_app)
+                self.assertEqual(client.get("/ping").status_code, 200)
+                self.assertEqual(client.get("/").status_code, 200)
+                self.assertDictEqual(client.post("/process_sim", json={"model": {"x": 1}}).json()["model"], {"x": 1})
+            finally:
+                BaseModel.result_cache = Snapshot.solution_store = None
+                Snapshot.deduplicate = False
+                worker_project.model = WorkerModel
+                os.environ.pop(WORKER_SETTINGS, None)
+
+    def test_deprecated_app(self):
+        import digital_twin_distiller.encapsulator as encapsulator
+
+        server = Encapsulator(DummySimulationProject())
+        with self.assertWarns(DeprecationWarning):
+            self.assertIs(encapsulator.app, server.app)
+        with self.assertRaises(AttributeError):
+            encapsulator.no_such_attribute
+
+    def test_build_docs(self):
+        with TemporaryDirectory() as docs_dir, patch("subprocess.run") as run:
+            docs_dir = Path(docs_dir)
+            (docs_dir / "docs").mkdir()
+            (docs_dir / "mkdocs.yml").write_text("site_name: docs")
+            (docs_dir / "docs" / "index.md").write_text("# Home")
+
+            self.assertTrue(build_docs(docs_dir))
+            self.assertEqual(run.call_args.kwargs["cwd"], docs_dir)
+
+            # the sources did not change
+            (docs_dir / "site" / "index.html").write_text("<h1>Home</h1>")
+            self.assertFalse(build_docs(docs_dir))
+            self.assertTrue(build_docs(docs_dir, force=True))
+
+            (docs_dir / "docs" / "index.md").write_text("# Start")
+            self.assertTrue(build_docs(docs_dir))
+            (docs_dir / "docs" / "new.md").write_text("")
+            self.assertTrue(build_docs(docs_dir))
+            self.assertFalse(build_docs(docs_dir))
+            self.assertEqual(run.call_count, 4)
+
+    def test_docs_in_background(self):
+        with TemporaryDirectory() as docs_dir, patch("digital_twin_distiller.encapsulator.Thread") as thread:
+            server = Encapsulator(DummySimulationProject())
+            server.set_endpoint_for_docs(docs_dir, endpoint="/manual", background=True)
+            self.assertEqual(thread.call_args.kwargs["args"], (docs_dir,))
+            thread.return_value.start.assert_called_once()
+
+            # the api is available before the documentation is built
+            client = TestClient(server.app)
+            self.assertEqual(client.get("/ping").status_code, 200)
+            self.assertEqual(client.get("/manual/").status_code, 404)
+
+    def test_job_queue(self):
+        started = Event()
+        release = Event()
+
+        class BlockingProject(DummySimulationProject):
+            def run(self):
+                started.set()
+                release.wait(10)
+                self._output = {"x": self._input["x"]}
+
+        queue = JobQueue(max_workers=1)
+        project = BlockingProject()
+        jobs = [queue.submit(project, {"x": i}) for i in range(3)]
+
+        # only one job runs at the same time, the queued ones can be cancelled
+        started.wait(10)
+        self.assertEqual(jobs[0].status, "running")
+        self.assertFalse(queue.cancel(jobs[0].id))
+        self.assertTrue(queue.cancel(jobs[1].id))
+        self.assertEqual(jobs[1].status, "cancelled")
+        self.assertEqual(jobs[2].status, "queued")
+
+        release.set()
+        jobs[2].future.result(timeout=10)
+        self.assertEqual(jobs[0].output, {"x": 0})
+        self.assertEqual(jobs[2].output, {"x": 2})
+
+        # the jobs have their own project state
+        self.assertFalse(project._input)
+        queue.shutdown()
+
+    def test_event_queue(self):
+        events = EventQueue()
+        events.put(("partial", 0))
+
+        # the queued events are handed over first, then the new ones
+        received = []
+        events.subscribe(received.append)
+        events.put(("partial", 1))
+        self.assertListEqual(received, [("partial", 0), ("partial", 1)])
+        self.assertTrue(events.empty())
+
+        events.subscribe(None)
+        events.put(None)
+        self.assertIsNone(events.get(timeout=1))
+        self.assertEqual(len(received), 2)
+
     @classmethod
     def tearDownClass(cls):
         # CLEANUP SECTION
@@ -33,6 +33,7 @@ from digital_twin_distiller.femm_wrapper import (
     femm_electrostatic,
     femm_heat_flow,
     femm_magnetic,
+    femm_prefixes,
 )
 from digital_twin_distiller.geometry import Geometry
 
@@ -138,6 +139,29 @@ class FemmTester(TestCase):
         res = fmw.add_segment(x1, y1, x2, y2)
         self.assertEqual("hi_addsegment(1.0, 0.0, 1.0, 1.0)", res)
 
+    def test_command_table(self):
+        # the commands of the table are the same for every field, only their prefixes differ
+        for field, prefix in femm_prefixes.items():
+            writer = FemmWriter()
+            writer.field = field
+            self.assertEqual(writer.add_node(1e-7, 123456.789), f"{prefix}_addnode(1e-07, 123456.789)")
+            self.assertEqual(writer.add_arc(2, 0, 0, 2, 45.5, 3), f"{prefix}_addarc(2, 0, 0, 2, 45.5, 3)")
+            self.assertEqual(writer.select_group(4), f"{prefix}_selectgroup(4)")
+            self.assertEqual(
+                writer.set_segment_prop("a", 0.5, 0, 1, 2), f'{prefix}_setsegmentprop("a", 0.5, 0, 1, 2, "<None>")'
+            )
+
+        # the arc segment properties are generated only for the magnetic and electrostatic fields
+        writer = FemmWriter()
+        writer.field = femm_electrostatic
+        self.assertEqual(writer.set_arc_segment_prop(1, "b", 0, 3), "ei_setarcsegmentprop(1, 'b', 0, 3)")
+        writer.field = femm_heat_flow
+        self.assertIsNone(writer.set_arc_segment_prop(1, "b", 0, 3))
+
+        writer = FemmWriter()
+        writer.field = "alma"
+        self.assertRaises(ValueError, writer.add_node, 0.0, 0.0)
+
     def test_addblocklabel(self):
         x = 1.0
         y = 0.0
@@ -1,6 +1,8 @@
+from math import hypot
 from pathlib import Path
 from unittest import TestCase
 
+import numpy as np
 from importlib_resources import files
 
 from digital_twin_distiller.geometry import Geometry
@@ -71,6 +73,87 @@ class TestGeometry(TestCase):
         self.assertEqual(len(g.nodes), 34)
         self.assertEqual(len(g.lines), 52)
 
+    def test_intersections_with_arcs(self):
+        path_rotor = files("tests.svgtests").joinpath("antunes_rotor.svg")
+        g = Geometry()
+        g.import_svg(str(path_rotor))
+        g.generate_intersections()
+
+        # the lines that end on the arcs are kept
+        self.assertEqual(len(g.nodes), 10)
+        self.assertEqual(len(g.lines), 7)
+        self.assertEqual(len(g.circle_arcs), 5)
+
+        # a line crossing a half circle
+        g = Geometry()
+        g.add_arc(CircleArc(Node(1.0, 0.0), Node(0.0, 0.0), Node(-1.0, 0.0)))
+        g.add_line(Line(Node(-1.0, 0.0), Node(1.0, 0.0)))
+        g.add_line(Line(Node(0.0, -1.0), Node(0.0, 2.0)))
+        g.generate_intersections()
+
+        # the hanging ends of the vertical line are removed
+        self.assertEqual(len(g.circle_arcs), 2)
+        self.assertEqual(len(g.lines), 3)
+        self.assertEqual(len(g.nodes), 4)
+        self.assertIn(Node(0.0, 1.0), g.nodes)
+        self.assertNotIn(Node(0.0, 2.0), g.nodes)
+
+        # an arc crossing nothing is kept unchanged
+        g = Geometry()
+        lonely = CircleArc(Node(6.0, 5.0), Node(5.0, 5.0), Node(4.0, 5.0))
+        g.add_arc(lonely)
+        g.add_line(Line(Node(0.0, 0.0), Node(1.0, 0.0)))
+        g.add_line(Line(Node(0.5, -1.0), Node(0.5, 1.0)))
+        g.generate_intersections()
+
+        self.assertEqual(len(g.circle_arcs), 1)
+        self.assertIs(g.circle_arcs[0], lonely)
+        self.assertIn(Node(6.0, 5.0), g.nodes)
+        self.assertIn(Node(4.0, 5.0), g.nodes)
+
+    def test_sweep_overlaps(self):
+        rng = np.random.default_rng(42)
+        corner = rng.uniform(0, 10, (200, 2))
+        boxes = np.hstack((corner, corner + rng.uniform(0, 1, (200, 2))))
+
+        expected = set()
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                if (boxes[i, :2] <= boxes[j, 2:]).all() and (boxes[j, :2] <= boxes[i, 2:]).all():
+                    expected.add((i, j))
+
+        self.assertSetEqual(set(map(tuple, Geometry.sweep_overlaps(boxes).tolist())), expected)
+        self.assertEqual(Geometry.sweep_overlaps(np.empty((0, 4))).shape, (0, 2))
+
+    def test_line_intersections_batch(self):
+        geo = Geometry()
+        segments_1 = [(0, 0, 2, 2), (0, 0, 2, 0), (0, 0, 1, 0), (0, 0, 1, 0)]
+        segments_2 = [(0, 2, 2, 0), (1, 0, 3, 0), (0, 1, 1, 1), (2, -1, 2, 1)]
+        points, t, u = geo.get_line_intersections_batch(segments_1, segments_2)
+
+        # crossing
+        np.testing.assert_allclose(points[0, 0], (1, 1))
+        self.assertAlmostEqual(t[0, 0], 0.5)
+        self.assertAlmostEqual(u[0, 0], 0.5)
+        self.assertTrue(np.isnan(points[0, 1]).all())
+
+        # collinear overlap from (1, 0) to (2, 0)
+        np.testing.assert_allclose(points[1], ((1, 0), (2, 0)))
+        np.testing.assert_allclose(t[1], (0.5, 1.0))
+        np.testing.assert_allclose(u[1], (0.0, 0.5))
+
+        # parallel and disjoint
+        self.assertTrue(np.isnan(points[2:]).all())
+        self.assertTrue(np.isnan(t[2:]).all())
+
+        for i, (s1, s2) in enumerate(zip(segments_1, segments_2)):
+            p1, p2 = geo.get_line_intersetions(Line(Node(*s1[:2]), Node(*s1[2:])), Line(Node(*s2[:2]), Node(*s2[2:])))
+            for k, pk in enumerate((p1, p2)):
+                if pk is None:
+                    self.assertTrue(np.isnan(points[i, k]).all())
+                else:
+                    np.testing.assert_allclose(points[i, k], pk)
+
     def test_append_node(self):
 
         geo = Geometry()
@@ -86,6 +169,83 @@ class TestGeometry(TestCase):
         self.assertEqual(b, res)
         self.assertEqual(2, len(geo.nodes))
 
+    def test_append_node_index(self):
+        geo = Geometry()
+        a = Node(1.0, 0.0, id_=1)
+        b = Node(1.0 + 0.9e-5, 0.0, id_=2)
+        c = Node(1.0 - 0.9e-5, 0.9e-5, id_=3)
+
+        self.assertIs(geo.append_node(a), a)
+        # b is in the neighbouring cell of the grid
+        self.assertIs(geo.append_node(b), a)
+        self.assertEqual(1, len(geo.nodes))
+
+        # c is closer to a than epsilon only on both axes, but not in euclidean distance
+        self.assertIs(geo.append_node(c), c)
+        self.assertEqual(2, len(geo.nodes))
+
+        self.assertIs(geo.find_node(3), c)
+        self.assertIsNone(geo.find_node(2))
+
+        # the index follows the changes of the tolerance
+        geo.epsilon = 1e-3
+        self.assertIs(geo.append_node(Node(1.0005, 0.0)), a)
+        self.assertEqual(2, len(geo.nodes))
+
+    def test_append_node_after_modification(self):
+        geo = Geometry()
+        a = Node(0.0, 0.0)
+        geo.add_node(a)
+
+        # nodes added directly to the list
+        b = Node(1.0, 1.0)
+        geo.nodes.append(b)
+        self.assertIs(geo.append_node(Node(1.0, 1.0)), b)
+
+        # nodes moved in place
+        a.move_xy(2.0, 0.0)
+        geo.invalidate_index()
+        self.assertIs(geo.append_node(Node(2.0, 0.0)), a)
+        self.assertEqual(2, len(geo.nodes))
+
+        # the stale entries of the index are recognized without invalidate_index
+        a.move_xy(1.0, 0.0)
+        d = geo.append_node(Node(2.0, 0.0))
+        self.assertIsNot(d, a)
+        self.assertIs(geo.append_node(Node(3.0, 0.0)), a)
+
+        c = Node(4.0, 4.0)
+        geo.nodes[1] = c
+        self.assertIs(geo.append_node(Node(1.0, 1.0)), geo.nodes[-1])
+        self.assertIs(geo.append_node(Node(4.0, 4.0)), c)
+        self.assertEqual(4, len(geo.nodes))
+
+    def test_duplicate_edges(self):
+        geo = Geometry()
+        a = Node(0.0, 0.0)
+        b = Node(1.0, 0.0)
+        c = Node(0.0, 1.0)
+
+        geo.add_line(Line(a, b))
+        geo.add_line(Line(Node(1.0, 0.0), Node(0.0, 0.0)))
+        self.assertEqual(1, len(geo.lines))
+
+        # arcs with the same endpoints but with different center points are different
+        geo.add_arc(CircleArc(b, Node(0.0, 0.0), c))
+        geo.add_arc(CircleArc(Node(1.0, 0.0), Node(0.0, 0.0), Node(0.0, 1.0)))
+        geo.add_arc(CircleArc(b, Node(1.0, 1.0), c))
+        self.assertEqual(2, len(geo.circle_arcs))
+
+        geo.add_cubic_bezier(CubicBezier(a, Node(0.1, 0.5), Node(0.2, 0.6), c))
+        geo.add_cubic_bezier(CubicBezier(a, Node(0.1, 0.5), Node(0.2, 0.6), c))
+        geo.add_cubic_bezier(CubicBezier(a, Node(0.1, 0.4), Node(0.2, 0.6), c))
+        self.assertEqual(2, len(geo.cubic_beziers))
+
+        # lines deleted from the list directly can be added again
+        geo.lines.clear()
+        geo.add_line(Line(a, b))
+        self.assertEqual(1, len(geo.lines))
+
     def test_merge_points(self):
         # after merging the nodes the number of them cannot increased
 
@@ -138,6 +298,71 @@ class TestGeometry(TestCase):
 
         self.assertEqual(len(surfaces), 1)
 
+    def test_regions(self):
+        geo = Geometry()
+        geo.add_rectangle(Rectangle(x0=0.0, y0=0.0, width=2.0, height=2.0))
+        geo.add_rectangle(Rectangle(x0=2.0, y0=0.0, width=2.0, height=2.0))
+
+        regions = geo.regions()
+        self.assertEqual(len(regions.faces), 2)
+        self.assertListEqual(list(regions.locate([(1.0, 1.0), (3.0, 1.0), (5.0, 5.0)])), [0, 1, -1])
+
+        # the shared edge is walked in both directions
+        loops = [regions.loops(face)[0] for face in regions.faces]
+        shared = [(ei, reverse) for loop in loops for ei, reverse in loop if ei.start_pt.x == ei.end_pt.x == 2.0]
+        self.assertEqual(len(shared), 2)
+        self.assertIs(shared[0][0], shared[1][0])
+        self.assertNotEqual(shared[0][1], shared[1][1])
+
+        # the regions are cached until the edges are changed
+        self.assertIs(geo.regions(), regions)
+        geo.add_arc(CircleArc(Node(4.0, 0.0), Node(4.0, 1.0), Node(4.0, 2.0)))
+        regions = geo.regions()
+        self.assertEqual(len(regions.faces), 3)
+        self.assertAlmostEqual(sorted(fi.area for fi in regions.faces)[0], np.pi / 2, 9)
+
+        geo.invalidate_index()
+        self.assertIsNot(geo.regions(), regions)
+
+        # the in place modifications of the edges are recognized without invalidating the index
+        regions = geo.regions()
+        for node in (geo.circle_arcs[0].center_pt, geo.circle_arcs[0].end_pt):
+            node.x += 1.0
+        self.assertIsNot(geo.regions(), regions)
+        self.assertAlmostEqual(sorted(fi.area for fi in geo.regions().faces)[0], 4.0, 9)
+
+    def test_find_edges(self):
+        geo = Geometry()
+        a, b, c = Node(0.0, 0.0), Node(1.0, 0.0), Node(0.0, 1.0)
+        ab, ca = Line(a, b), Line(c, a)
+        bc = CircleArc(b, a, c)
+        for li in (ab, ca):
+            geo.add_line(li)
+        geo.add_arc(bc)
+
+        loop = [a.id, c.id, b.id]
+        surface = geo.find_edges(loop)
+        self.assertListEqual(loop, [a.id, c.id, b.id])
+        self.assertListEqual([ei.id for ei in surface], [-ca.id, -bc.id, -ab.id])
+
+        # the edges are not copied, the reversed edges are walked from their end points
+        self.assertIs(surface[0].edge, ca)
+        self.assertIsInstance(surface[1].edge, CircleArc)
+        self.assertIs(surface[1].edge.start_pt, b)
+        self.assertIs(surface[1].start_pt, c)
+        self.assertIs(surface[1].end_pt, b)
+        self.assertListEqual([(ei.start_pt, ei.end_pt) for ei in surface], [(a, c), (c, b), (b, a)])
+
+        surface = geo.find_surfaces()[0]
+        self.assertListEqual(sorted(ei.id for ei in surface), sorted((ab.id, bc.id, ca.id)))
+
+        # an edge replaced in place is found without invalidating the index
+        d = Node(0.0, 2.0)
+        cd = Line(c, d)
+        geo.lines[1] = cd
+        self.assertListEqual([ei.id for ei in geo.find_edges([a.id, c.id, b.id])], [-bc.id, -ab.id])
+        self.assertIs(geo.find_edges([c.id, d.id])[0].edge, cd)
+
     @staticmethod
     def add_triangular_geometry():
         # creates a triangular shaped geometry which contains a line, a bezier line and a circle arc
@@ -287,3 +512,20 @@ class TestGeometry(TestCase):
         g.delete_line(0.5, 0)
         self.assertEqual(len(g.lines), 3)
         self.assertFalse(l0 in g.lines)
+
+    def test_closest_entities(self):
+        g = Geometry()
+        g.add_rectangle(Rectangle(0, 0, width=1, height=1))
+        g.add_arc(CircleArc(Node(3, 0), Node(2, 0), Node(1, 0)))
+        g.add_arc(CircleArc(Node(1, 0), Node(2, 0), Node(3, 0)))
+
+        d = g.line_distances([0.5, 2.0], [-1.0, 0.5])
+        self.assertEqual(d.shape, (2, 4))
+        self.assertListEqual(d[0].tolist(), [li.distance_to_point(0.5, -1.0) for li in g.lines])
+
+        self.assertIs(g.closest_line(0.5, 1.2), g.lines[2])
+
+        # the upper arc is closer, but the apex of the lower arc is closer than the apex of the upper one
+        self.assertIs(g.closest_arc(2.0, 0.9), g.circle_arcs[0])
+        self.assertAlmostEqual(g.arc_distances(2.0, 0.9)[0], 0.1, 12)
+        self.assertAlmostEqual(g.arc_distances(2.0, 0.9)[1], hypot(1.0, 0.9), 12)
@@ -0,0 +1,114 @@
+from copy import copy
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from digital_twin_distiller.geometry import Geometry
+from digital_twin_distiller.geometry_arrays import GeometryArrays
+from digital_twin_distiller.modelpiece import ModelPiece
+from digital_twin_distiller.objects import CircleArc, CubicBezier, Line, Node
+
+
+class TestGeometryArrays(TestCase):
+    def get_geometry(self):
+        geo = Geometry()
+        geo.add_node(Node(0, 1, label="lonely"))
+        geo.add_line(Line(Node(0, 0), Node(0, -1), color="#ff0000", attributes={"boundary": "gnd"}))
+        geo.add_line(Line(Node(0, -1), Node(2, -1)))
+        geo.add_arc(CircleArc(Node(-1, 0), Node(0, 0), Node(1, 0), max_seg_deg=5, label="arc"))
+        geo.add_cubic_bezier(CubicBezier(Node(2, -1), Node(3, 0), Node(3, 1), Node(2, 2), n_segment=10))
+        return geo
+
+    def assert_same_geometry(self, geo, other):
+        self.assertEqual(geo.epsilon, other.epsilon)
+        self.assertEqual(len(geo.nodes), len(other.nodes))
+        for a, b in zip(geo.nodes, other.nodes):
+            self.assertEqual((a.x, a.y, a.id, a.label, a.precision), (b.x, b.y, b.id, b.label, b.precision))
+
+        self.assertEqual(len(geo.lines), len(other.lines))
+        for a, b in zip(geo.lines, other.lines):
+            self.assertEqual(a.id, b.id)
+            self.assertEqual((a.start_pt.id, a.end_pt.id), (b.start_pt.id, b.end_pt.id))
+            self.assertEqual((a.label, a.color, a.attributes), (b.label, b.color, b.attributes))
+
+        self.assertEqual(len(geo.circle_arcs), len(other.circle_arcs))
+        for a, b in zip(geo.circle_arcs, other.circle_arcs):
+            self.assertEqual(a.id, b.id)
+            self.assertEqual(a, b)
+            self.assertEqual((a.max_seg_deg, a.theta, a.label), (b.max_seg_deg, b.theta, b.label))
+
+        self.assertEqual(len(geo.cubic_beziers), len(other.cubic_beziers))
+        for a, b in zip(geo.cubic_beziers, other.cubic_beziers):
+            self.assertEqual(a.id, b.id)
+            self.assertEqual(a, b)
+            self.assertEqual(a.n_segment, b.n_segment)
+
+    def test_roundtrip(self):
+        geo = self.get_geometry()
+        arrays = GeometryArrays.from_geometry(geo)
+
+        # (0, 0) is stored twice, as the start of the first line and as the center of the arc
+        self.assertEqual(arrays.nodes.shape, (11, 2))
+        self.assertEqual(arrays.node_listed.sum(), len(geo.nodes))
+        self.assertEqual(arrays.lines.dtype, np.int32)
+        self.assertEqual(arrays.lines.shape, (2, 2))
+        self.assertEqual(arrays.circle_arcs.shape, (1, 4))
+        self.assertEqual(arrays.cubic_beziers.shape, (1, 4))
+
+        back = arrays.to_geometry()
+        self.assert_same_geometry(geo, back)
+
+        # the nodes remain shared between the elements
+        self.assertIs(back.lines[0].end_pt, back.lines[1].start_pt)
+        self.assertIs(back.lines[1].end_pt, back.cubic_beziers[0].start_pt)
+
+    def test_roundtrip_svg(self):
+        geo = Geometry()
+        geo.import_svg(str(Path(__file__).parent / "svgtests" / "antunes_rotor.svg"))
+
+        self.assert_same_geometry(geo, GeometryArrays.from_geometry(geo).to_geometry())
+
+    def test_empty(self):
+        back = GeometryArrays.from_geometry(Geometry()).to_geometry()
+        self.assertEqual(len(back.nodes), 0)
+        self.assertEqual(len(back.lines), 0)
+
+    def test_transforms(self):
+        for transform, args in (
+            ("translate", (5, -1)),
+            ("rotate", ((1, 2), 30.0)),
+            ("scale", (2.0, 0.5)),
+            ("mirror", ((0, 0), (1, 1))),
+        ):
+            piece = ModelPiece("test")
+            piece.geom = self.get_geometry()
+            arrays = piece.to_arrays()
+
+            getattr(piece, transform)(*args)
+            getattr(arrays, transform)(*args)
+            geo = arrays.to_geometry()
+
+            for a, b in zip(piece.geom.nodes, geo.nodes):
+                self.assertEqual(a, b)
+            for a, b in zip(piece.geom.lines, geo.lines):
+                self.assertEqual((a.start_pt, a.end_pt), (b.start_pt, b.end_pt))
+            for a, b in zip(piece.geom.circle_arcs, geo.circle_arcs):
+                self.assertEqual(a, b)
+
+            piece.update_bbox()
+            np.testing.assert_allclose(arrays.bbox(), piece.bbox, atol=1e-6)
+
+    def test_copy(self):
+        arrays = GeometryArrays.from_geometry(self.get_geometry())
+        other = copy(arrays)
+        other.translate(1, 1)
+
+        self.assertFalse(np.allclose(arrays.nodes, other.nodes))
+        self.assertEqual(arrays.node_ids, other.node_ids)
+
+    def test_modelpiece(self):
+        piece = ModelPiece("test")
+        piece.load_piece_from_arrays(GeometryArrays.from_geometry(self.get_geometry()))
+
+        self.assertEqual(piece.bbox, [-1, -1, 2, 2])
@@ -1,11 +1,13 @@
 import unittest
 from pathlib import Path
 from shutil import rmtree
+from tempfile import TemporaryDirectory
 
 from digital_twin_distiller import DirichletBoundaryCondition, Line, Material, Node
 from digital_twin_distiller.metadata import Agros2DMetadata
 from digital_twin_distiller.model import BaseModel
 from digital_twin_distiller.platforms.agros2d import Agros2D
+from digital_twin_distiller.resultcache import ResultCache
 from digital_twin_distiller.snapshot import Snapshot
 
 
@@ -61,6 +63,34 @@ class MockModel(BaseModel):
         self.snapshot.add_geometry(self.geom)
 
 
+class CachedMockModel(MockModel):
+    executions = 0
+
+    def __init__(self, x, scale=1.0, **kwargs):
+        self.x = x
+        self.scale = scale
+        super().__init__(**kwargs)
+
+    def cache_key(self):
+        # the scale changes only the results, not the solver script
+        return {"scale": self.scale}
+
+    def setup_solver(self):
+        super().setup_solver()
+        script = Path(self.snapshot.platform.metadata.file_script_name)
+
+        def export(*args, **kwargs):
+            script.parent.mkdir(parents=True, exist_ok=True)
+            script.write_text(f"# {self.name}\nx = {self.x}\n")
+
+        def execute(*args, **kwargs):
+            CachedMockModel.executions += 1
+
+        self.snapshot.export = export
+        self.snapshot.execute = execute
+        self.snapshot.retrive_results = lambda: {"x": self.x * self.scale}
+
+
 class TestModel(unittest.TestCase):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -196,3 +226,22 @@ class TestModel(unittest.TestCase):
         m.build_geometry = f
         res = m(cleanup=False, devmode=False)
         self.assertTrue(res is None)
+
+    def test_result_cache(self):
+        with TemporaryDirectory() as cache_dir:
+            cache = ResultCache(cache_dir)
+            CachedMockModel.executions = 0
+
+            self.assertEqual(CachedMockModel(1.0, result_cache=cache)(), {"x": 1.0})
+            self.assertEqual(CachedMockModel(1.0, result_cache=cache)(), {"x": 1.0})
+            self.assertEqual(CachedMockModel(2.0, result_cache=cache)(), {"x": 2.0})
+            self.assertEqual(CachedMockModel(1.0, scale=3.0, result_cache=cache)(), {"x": 3.0})
+            self.assertEqual(CachedMockModel.executions, 3)
+            self.assertEqual(cache.hits, 1)
+            self.assertEqual(cache.misses, 3)
+
+            # the cache is opt-in
+            CachedMockModel(1.0)()
+            self.assertEqual(CachedMockModel.executions, 4)
+
+        rmtree(Path(__file__).parent / "snapshots", ignore_errors=True)
@@ -1,7 +1,8 @@
 import unittest
 
+from digital_twin_distiller import affine
 from digital_twin_distiller.modelpiece import ModelPiece
-from digital_twin_distiller.objects import CircleArc, Line, Node
+from digital_twin_distiller.objects import CircleArc, CubicBezier, Line, Node
 
 
 class TestModelpiece(unittest.TestCase):
@@ -196,6 +197,28 @@ class TestModelpiece(unittest.TestCase):
         self.assertEqual(m.geom.circle_arcs[0].apex_pt, Node(0, -10))
         self.assertEqual(m.geom.circle_arcs[0].end_pt, Node(-1, -11))
 
+    def test_transform(self):
+        m = self.get_modelpiece()
+        bezier = CubicBezier(Node(1, 0), Node(2, 0), Node(2, 1), Node(1, 1))
+        m.geom.add_cubic_bezier(bezier)
+        ids = [ni.id for ni in m.geom.nodes]
+
+        m.transform(affine.compose(affine.rotation(90), affine.translation(1, 0), affine.reflection((0, 0), (1, 0))))
+
+        self.assertEqual(m.geom.nodes[0], Node(0, 0))
+        self.assertEqual(m.geom.lines[0].end_pt, Node(2, 0))
+        self.assertEqual(bezier.control1, Node(1, -2))
+        self.assertEqual(bezier.control2, Node(0, -2))
+
+        # the nodes are moved in place, so they keep their ids and stay shared by the elements
+        self.assertListEqual([ni.id for ni in m.geom.nodes], ids)
+        self.assertIs(m.geom.lines[0].start_pt, m.geom.nodes[1])
+
+        # the arc is mirrored, its direction is preserved by swapping its end points
+        self.assertEqual(m.geom.circle_arcs[0].start_pt, Node(1, -1))
+        self.assertEqual(m.geom.circle_arcs[0].apex_pt, Node(2, 0))
+        self.assertEqual(m.geom.circle_arcs[0].end_pt, Node(1, 1))
+
     def test_copy(self):
 
         m = self.get_modelpiece()
@@ -109,6 +109,65 @@ class TestSurfaceDetection(TestCase):
         assert any(r5 == si for si in surfaces)
         assert any(r6 == si for si in surfaces)
 
+    def test_graph_nodes(self):
+        ng_metadata = NgElectrostaticMetadata()
+        ng_metadata.file_script_name = "testscriptname"
+        platform = NgElectrostatics(ng_metadata)
+
+        # the endpoints are equal, but they are on the two sides of a grid cell border
+        h = 0.5e-5
+        platform.export_geometry_element(Line(Node(h, h), Node(1.0, 0.0)))
+        platform.export_geometry_element(Line(Node(1.0 + 1e-9, 1e-9), Node(1.0, 1.0)))
+        platform.export_geometry_element(Line(Node(1.0, 1.0 - 1e-9), Node(h - 1e-9, h + 1e-9)))
+
+        self.assertEqual(platform.G.number_of_nodes(), 3)
+        self.assertEqual(platform.G.number_of_edges(), 3)
+
+    def test_surface_with_hole(self):
+        ng_metadata = NgElectrostaticMetadata()
+        ng_metadata.file_script_name = "testscriptname"
+        platform = NgElectrostatics(ng_metadata)
+
+        outer = [Node(0, 0), Node(4, 0), Node(4, 4), Node(0, 4)]
+        inner = [Node(1, 1), Node(3, 1), Node(3, 3), Node(1, 3)]
+        for nodes in (outer, inner):
+            for i in range(4):
+                platform.export_geometry_element(Line(nodes[i], nodes[(i + 1) % 4]))
+
+        for name, label in (("r2", (0.5, 0.5)), ("r3", (2, 2))):
+            material = Material(name)
+            material.assigned.append(label)
+            platform.export_material_definition(material)
+
+        surfaces = platform.compose_geometry()
+        self.assertEqual(len(surfaces), 2)
+
+        # the edges of the hole separate the two materials
+        domains = {}
+        for u, v, attr in platform.H.edges(data=True):
+            domains[frozenset((u, v))] = {attr["leftdomain"], attr["rightdomain"]}
+
+        for nodes, expected in ((outer, {"r2", 0}), (inner, {"r2", "r3"})):
+            for i in range(4):
+                self.assertSetEqual(domains[frozenset((nodes[i], nodes[(i + 1) % 4]))], expected)
+
+        # the faces are reused until the graph changes
+        faces = platform._find_faces(platform.G)
+        self.assertIs(platform._find_faces(platform.G), faces)
+        platform.export_geometry_element(Line(outer[0], inner[0]))
+        self.assertIsNot(platform._find_faces(platform.G), faces)
+
+        # a moved node changes the faces, even if the number of the nodes and edges is the same
+        faces = platform._find_faces(platform.G)
+        inner[0].x += 0.5
+        self.assertIsNot(platform._find_faces(platform.G), faces)
+
+        # an edge is swapped for an other one
+        faces = platform._find_faces(platform.G)
+        platform.G.remove_edge(outer[0], inner[0])
+        platform.export_geometry_element(Line(outer[1], inner[1]))
+        self.assertIsNot(platform._find_faces(platform.G), faces)
+
     def test_render(self):
         # Its enough to pass if the method does not throw any exeption.
         output = StringIO()
@@ -81,6 +81,28 @@ class TestNodeOperations(TestCase):
         m = n0.mean(n1)
         self.assertEqual(m, Node(0.0, 0.0))
 
+    def test_hash(self):
+        n0 = Node(1.0, 2.0)
+        n1 = Node(1.0 + 1e-9, 2.0 - 1e-9)
+        self.assertEqual(n0, n1)
+
+        # the hash does not change when the node is moved
+        h = hash(n0)
+        n0.x += 1.0
+        self.assertEqual(hash(n0), h)
+        self.assertEqual(len({n0, n1}), 2)
+
+    def test_grid_cell(self):
+        n0 = Node(1.0, 2.0)
+        n1 = Node(1.0 + 1e-9, 2.0 - 1e-9)
+        self.assertEqual(n0.grid_cell(), n1.grid_cell())
+        self.assertNotEqual(n0.grid_cell(), Node(1.0, 3.0).grid_cell())
+
+        # equal nodes are in the same or in neighbouring grid cells
+        i0, j0 = Node(0.5e-5 - 1e-9, 0.0).grid_cell()
+        i1, j1 = Node(0.5e-5 + 1e-9, 0.0).grid_cell()
+        self.assertEqual((i1 - i0, j1 - j0), (1, 0))
+
 
 class TestLine(TestCase):
     def test_init_line(self):
@@ -129,7 +151,7 @@ class TestArc(TestCase):
         c = CircleArc(start_pt=Node(-1, 0), center_pt=Node(0, 0), end_pt=Node(1, 0))
         c1 = copy(c)
 
-        for attr_i in c.__dict__:
+        for attr_i in CircleArc.__slots__:
             if attr_i != "id":
                 self.assertEqual(getattr(c, attr_i), getattr(c1, attr_i))
 
@@ -143,6 +165,12 @@ class TestArc(TestCase):
         self.assertAlmostEqual(c.distance_to_point(-5, 0), 4.0, 5)
         self.assertAlmostEqual(c.distance_to_point(0, -5), 4.0, 5)
 
+        # the nodes are scaled in place, the cached radius is stale
+        for node in (c.start_pt, c.center_pt, c.end_pt):
+            node.x, node.y = 2.0 * node.x, 2.0 * node.y
+        self.assertAlmostEqual(c.distance_to_point(0, 0), 2.0, 5)
+        self.assertAlmostEqual(c.distance_to_point(0, -5), 3.0, 5)
+
     def test_from_rad(self):
         n0 = Node(-1, 0)
         n1 = Node(1, 0)
@@ -0,0 +1,139 @@
+import unittest
+from math import atan2, pi
+
+import numpy as np
+from shapely.geometry import Point
+
+from digital_twin_distiller.objects import Node
+from digital_twin_distiller.planar import locate_points, planar_faces
+
+
+def square(x0, y0, a):
+    """The nodes and the edges of a square."""
+    nodes = [Node(x0, y0), Node(x0 + a, y0), Node(x0 + a, y0 + a), Node(x0, y0 + a)]
+    return nodes, [(nodes[i], nodes[(i + 1) % 4]) for i in range(4)]
+
+
+class TestPlanarFaces(unittest.TestCase):
+    def test_grid(self):
+        n = 6
+        nodes = {(i, j): Node(i, j) for i in range(n + 1) for j in range(n + 1)}
+        edges = [(nodes[i, j], nodes[i + 1, j]) for i in range(n) for j in range(n + 1)]
+        edges += [(nodes[i, j + 1], nodes[i, j]) for i in range(n + 1) for j in range(n)]
+
+        faces = planar_faces(edges)
+        self.assertEqual(len(faces), n * n)
+        for face in faces:
+            self.assertAlmostEqual(face.area, 1.0, 12)
+            self.assertEqual(len(face.nodes), 4)
+            self.assertFalse(face.holes)
+
+            # the faces are counter-clockwise, so they are on the left side of their edges
+            self.assertTrue(face.polygon().exterior.is_ccw)
+
+        # every cell is found exactly once
+        cells = {min((ni.x, ni.y) for ni in face.nodes) for face in faces}
+        self.assertEqual(len(cells), n * n)
+
+    def test_hole(self):
+        outer_nodes, outer = square(0, 0, 4)
+        inner_nodes, inner = square(1, 1, 2)
+        _, island = square(10, 10, 1)
+
+        for edges in (outer + inner + island, outer + inner + island + [(outer_nodes[0], inner_nodes[0])]):
+            faces = sorted(planar_faces(edges), key=lambda f: f.area)
+            self.assertEqual(len(faces), 3)
+            self.assertAlmostEqual(faces[0].area, 1.0, 12)
+            self.assertAlmostEqual(faces[1].area, 4.0, 12)
+            self.assertAlmostEqual(faces[2].area, 12.0, 12)
+
+            ring = faces[2]
+            self.assertEqual(len(ring.holes), 1)
+            self.assertSetEqual({u for _, u, _ in ring.holes[0]}, set(inner_nodes))
+            self.assertAlmostEqual(ring.polygon().area, 12.0, 12)
+
+            # the ring and the inner square are on the two sides of the inner edges
+            self.assertSetEqual(
+                {(u, v) for _, u, v in ring.holes[0]},
+                {(v, u) for _, u, v in faces[1].outer},
+            )
+
+    def test_nested_components(self):
+        _, a = square(0, 0, 10)
+        _, b = square(1, 1, 8)
+        c_nodes, c = square(2, 2, 1)
+        d_nodes, d = square(5, 5, 1)
+
+        faces = sorted(planar_faces(a + b + c + d), key=lambda f: f.area)
+        self.assertListEqual([round(fi.area, 9) for fi in faces], [1.0, 1.0, 100 - 64, 64 - 2])
+
+        # the small squares are the holes of the innermost face
+        self.assertEqual(len(faces[3].holes), 2)
+        self.assertSetEqual({u for hole in faces[3].holes for _, u, _ in hole}, set(c_nodes + d_nodes))
+        self.assertEqual(len(faces[2].holes), 1)
+
+    def test_dangling_edges(self):
+        nodes, edges = square(0, 0, 2)
+        center, outside = Node(1, 1), Node(5, 5)
+        edges += [(nodes[0], center), (nodes[2], outside), (outside, Node(6, 5))]
+
+        faces = planar_faces(edges)
+        self.assertEqual(len(faces), 1)
+        self.assertAlmostEqual(faces[0].area, 4.0, 12)
+        self.assertSetEqual(set(faces[0].nodes), set(nodes))
+
+        # a tree has no bounded faces
+        self.assertListEqual(planar_faces(edges[4:]), [])
+        self.assertListEqual(planar_faces([]), [])
+
+    def test_parallel_arcs(self):
+        # a circle from two half circle arcs, and a diameter between their endpoints
+        a, b = Node(-1, 0), Node(1, 0)
+        edges = [(a, b), (b, a), (a, b)]
+        arcs = {0: a, 1: b}
+
+        def direction(i, u, v):
+            if i not in arcs:
+                return atan2(v.y - u.y, v.x - u.x)
+
+            # the arcs go counter-clockwise from their start points around the origin
+            orientation = 1 if arcs[i] is u else -1
+            return atan2(orientation * u.x, -orientation * u.y)
+
+        def area(i, u, v):
+            chord = 0.5 * (u.x * v.y - v.x * u.y)
+            if i not in arcs:
+                return chord
+
+            orientation = 1 if arcs[i] is u else -1
+            return chord + orientation * pi / 2
+
+        faces = planar_faces(edges, direction=direction, area=area)
+        faces.sort(key=lambda f: sorted(i for i, _, _ in f.outer))
+        self.assertEqual(len(faces), 2)
+        self.assertAlmostEqual(faces[0].area, pi / 2, 12)
+        self.assertAlmostEqual(faces[1].area, pi / 2, 12)
+
+        # the lower half circle is bounded by the first arc and the diameter
+        self.assertSetEqual({i for i, _, _ in faces[0].outer}, {0, 2})
+        self.assertSetEqual({i for i, _, _ in faces[1].outer}, {1, 2})
+
+    def test_locate_points(self):
+        _, outer = square(0, 0, 4)
+        _, inner = square(1, 1, 2)
+        n = 3
+        nodes = {(i, j): Node(10 + i, j) for i in range(n + 1) for j in range(n + 1)}
+        grid = [(nodes[i, j], nodes[i + 1, j]) for i in range(n) for j in range(n + 1)]
+        grid += [(nodes[i, j + 1], nodes[i, j]) for i in range(n + 1) for j in range(n)]
+        faces = planar_faces(outer + inner + grid)
+
+        points = np.random.default_rng(0).uniform(-1.0, 14.0, (2000, 2))
+        located = locate_points(faces, points)
+        for (x, y), k in zip(points.tolist(), located):
+            containing = [i for i, face in enumerate(faces) if face.polygon().contains(Point(x, y))]
+            self.assertListEqual(containing, [k] if k >= 0 else [])
+
+        # the ring around the hole, the inner square, and a point outside of the faces
+        by_area = {round(face.area, 9): i for i, face in enumerate(faces)}
+        self.assertListEqual(locate_points(faces, [(0.5, 0.5), (2, 2), (20, 20)]).tolist(), [by_area[12], by_area[4], -1])
+        self.assertListEqual(locate_points(faces, []).tolist(), [])
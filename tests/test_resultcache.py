@@ -0,0 +1,57 @@
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from digital_twin_distiller.resultcache import ResultCache, canonical_hash
+
+
+class TestResultCache(unittest.TestCase):
+    def test_canonical_hash(self):
+        self.assertEqual(canonical_hash({"a": 1, "b": [1.5, 2]}), canonical_hash({"b": [1.5, 2], "a": 1}))
+        self.assertEqual(canonical_hash(np.array([1.5, 2.0])), canonical_hash([1.5, 2.0]))
+        self.assertNotEqual(canonical_hash([1.5, 2.0]), canonical_hash([1.5, 2.1]))
+        self.assertNotEqual(canonical_hash("a", "b"), canonical_hash("ab"))
+
+        # the objects without a stable serialization are not hashed by their repr, e.g. by their memory address
+        self.assertRaises(TypeError, canonical_hash, {"a": object()})
+
+    def test_get_set(self):
+        with TemporaryDirectory() as d:
+            cache = ResultCache(d)
+            self.assertIsNone(cache.get("k"))
+            cache.set("k", {"Energy": 1.5, "Bx": [(0.0, 1.0, 2.0)]})
+            self.assertIn("k", cache)
+            self.assertEqual(cache.get("k"), {"Energy": 1.5, "Bx": [(0.0, 1.0, 2.0)]})
+
+            # an other cache object sees the same directory
+            self.assertEqual(ResultCache(d).get("k"), {"Energy": 1.5, "Bx": [(0.0, 1.0, 2.0)]})
+
+            stats = cache.stats()
+            self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+            cache.clear()
+            self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        with TemporaryDirectory() as d:
+            cache = ResultCache(d, max_entries=2)
+            cache.set("a", 1)
+            cache.set("b", 2)
+            cache.get("a")
+            cache.set("c", 3)
+
+            self.assertIn("a", cache)
+            self.assertNotIn("b", cache)
+            self.assertIn("c", cache)
+            self.assertEqual(cache.evictions, 1)
+
+    def test_size_eviction(self):
+        with TemporaryDirectory() as d:
+            cache = ResultCache(d, max_size=1500)
+            for i in range(5):
+                cache.set(str(i), bytes(600))
+
+            self.assertEqual(len(cache), 2)
+            self.assertLessEqual(cache.stats()["size"], 1500)
+            self.assertIn("4", cache)
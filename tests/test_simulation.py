@@ -1,9 +1,11 @@
+import json
+import os
 import unittest
 from pathlib import Path
 
 from digital_twin_distiller.cli import new
 from digital_twin_distiller.modelpaths import ModelDir
-from digital_twin_distiller.simulationproject import SimulationProject
+from digital_twin_distiller.simulationproject import SimulationProject, load_defaults
 from digital_twin_distiller.utils import purge_dir
 
 CURRENT = Path(__file__).parent
@@ -19,6 +21,24 @@ DEFAULT_REQ = {
 }
 
 
+def parabolic_sim(model, modelparams, simparams, miscparams):
+    x0 = modelparams["x0"]
+    mw = modelparams["mw"]
+    if x0 > 2.5 and mw > 6.5:
+        raise ValueError("invalid design")
+
+    return {"T": 1 + x0 * 10 + mw * 100, "pid": os.getpid()}
+
+
+# the simulations registered with the decorator are sent to the worker processes by their names
+decorated = SimulationProject()
+
+
+@decorated.register("default")
+def decorated_sim(model, modelparams, simparams, miscparams):
+    return parabolic_sim(model, modelparams, simparams, miscparams)
+
+
 class TestSimulation(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -65,6 +85,35 @@ class TestSimulation(unittest.TestCase):
         self.assertEqual(sim1.cfg_misc["processes"], 4)
         self.assertEqual(sim1.cfg_misc["cleanup"], True)
 
+    def test_cached_defaults(self):
+        sim1 = SimulationProject(self.modelclass)
+        sim1._input = DEFAULT_REQ
+        sim1._load_defaults()
+        sim1.cfg_model["x0"] = 100.0
+        sim1.cfg_simulation["t1"] = 100.0
+
+        # the next request gets unmodified copies of the defaults
+        sim2 = SimulationProject(self.modelclass)
+        sim2._input = DEFAULT_REQ
+        sim2._load_defaults()
+        self.assertAlmostEqual(sim2.cfg_model["x0"], 1.0, delta=1e-12)
+        self.assertAlmostEqual(sim2.cfg_simulation["t1"], 5.3, delta=1e-12)
+        self.assertIs(load_defaults(ModelDir.DEFAULTS / "model.json"), load_defaults(ModelDir.DEFAULTS / "model.json"))
+
+        # the modified defaults are loaded again
+        file_model = ModelDir.DEFAULTS / "model.json"
+        original = file_model.read_text()
+        try:
+            file_model.write_text(json.dumps({**json.loads(original), "x0": 2.0}))
+            sim2._load_defaults()
+            self.assertAlmostEqual(sim2.cfg_model["x0"], 2.0, delta=1e-12)
+        finally:
+            file_model.write_text(original)
+
+        with self.assertRaisesRegex(ValueError, "'nonexistent'"):
+            sim2._input = {**DEFAULT_REQ, "simulation": {"type": "nonexistent"}}
+            sim2._load_defaults()
+
     def test_update_input(self):
         sim1 = SimulationProject(self.modelclass)
         sim1._input = DEFAULT_REQ
@@ -92,3 +141,52 @@ class TestSimulation(unittest.TestCase):
 
         sim1.run()
         self.assertAlmostEqual(sim1._output["res"]["T"], 511.0)
+
+    def test_tolerance_analysis(self):
+        for processes in (1, 2):
+            sim1 = SimulationProject(self.modelclass)
+            sim1._input = DEFAULT_REQ
+            sim1._load_defaults()
+            sim1.update_input()
+            sim1.cfg_misc["tolerance_processes"] = processes
+            sim1.register("default")(parabolic_sim)
+
+            sim1.run()
+            self.assertAlmostEqual(sim1._output["res"]["T"], 511.0)
+
+            # the failed design is left out
+            self.assertAlmostEqual(sim1._output["tolerances"]["T"]["upper"], 210.0)
+            self.assertAlmostEqual(sim1._output["tolerances"]["T"]["lower"], 0.0)
+            self.assertAlmostEqual(sim1.cfg_model["x0"], 1.0)
+
+            self.assertEqual(len(sim1._output["failed"]), 1)
+            self.assertIn("invalid design", sim1._output["failed"][0]["error"])
+
+            if processes > 1:
+                self.assertNotEqual(sim1._output["res"]["pid"], os.getpid())
+            else:
+                self.assertEqual(sim1._output["res"]["pid"], os.getpid())
+
+        # the failed designs are reported only if there is any
+        sim1 = SimulationProject(self.modelclass)
+        sim1._input = {**DEFAULT_REQ, "tolerances": {"type": "ff", "parameters": {"x0": 0.1}, "variables": ["T"]}}
+        sim1._load_defaults()
+        sim1.update_input()
+        sim1.register("default")(parabolic_sim)
+        sim1.run()
+        self.assertAlmostEqual(sim1._output["tolerances"]["T"]["upper"], 2.0)
+        self.assertNotIn("failed", sim1._output)
+
+    def test_tolerance_analysis_decorated(self):
+        decorated.set_model(self.modelclass)
+        decorated._input = DEFAULT_REQ
+        decorated._load_defaults()
+        decorated.update_input()
+        decorated.cfg_misc["tolerance_processes"] = 2
+
+        decorated.run()
+        self.assertAlmostEqual(decorated._output["res"]["T"], 511.0)
+
+        # the designs are solved by the process pool
+        self.assertNotEqual(decorated._output["res"]["pid"], os.getpid())
+        self.assertEqual(len(decorated._output["failed"]), 1)
@@ -1,6 +1,8 @@
 import math
 import unittest
+from collections import OrderedDict
 from pathlib import Path
+from tempfile import TemporaryDirectory
 
 from digital_twin_distiller.boundaries import (
     AntiPeriodicAirGap,
@@ -14,9 +16,10 @@ from digital_twin_distiller.femm_wrapper import femm_current_flow, femm_electros
 from digital_twin_distiller.geometry import Geometry
 from digital_twin_distiller.material import Material
 from digital_twin_distiller.metadata import Agros2DMetadata, FemmMetadata
-from digital_twin_distiller.objects import CircleArc, Line, Node
+from digital_twin_distiller.objects import CircleArc, Line, Node, Rectangle
 from digital_twin_distiller.platforms.agros2d import Agros2D
 from digital_twin_distiller.platforms.femm import Femm
+from digital_twin_distiller.resultcache import ResultCache
 from digital_twin_distiller.snapshot import Snapshot
 
 
@@ -306,6 +309,24 @@ class TestSnapshotFemm(unittest.TestCase):
         # running should cause an exception
         self.assertRaises(Exception, s.execute(cleanup=True))
 
+    def test_export_buffer(self):
+        s = self.get_snapshot()
+        s.add_geometry(self.get_geometry())
+        s.add_material(Material("air"))
+        s.assign_material(0, 0, "air")
+        s.add_postprocessing("point_value", (0.5, 0.5), "Bx")
+
+        with TemporaryDirectory() as d:
+            s.platform.metadata.file_script_name = Path(d) / "P_buffer"
+            f = MockFileHandle()
+            s.export(f)
+            self.assertIsNone(s.platform.script)
+            self.assertFalse(Path(s.platform.metadata.file_script_name).exists())
+
+            s.export()
+            self.assertEqual(s.platform.script, f.content)
+            self.assertEqual(Path(s.platform.metadata.file_script_name).read_text(), f.content)
+
     def test_export_geometry_entities(self):
         s = self.get_snapshot()
         s.add_boundary_condition(DirichletBoundaryCondition("eper", "magnetic", magnetic_potential=3))
@@ -354,6 +375,114 @@ class TestSnapshotFemm(unittest.TestCase):
         self.assertIn(r"mi_addsegment(0, 1, 0, 0)", f.content)
         self.assertIn(r"mi_addarc(0, 0.5, 1, 0.5, 180.0, 1)", f.content)
 
+    def test_assign_boundary_conditions(self):
+        s = self.get_snapshot()
+        s.add_boundary_condition(DirichletBoundaryCondition("eper", "magnetic", magnetic_potential=3))
+        s.add_boundary_condition(NeumannBoundaryCondition("cekla", "magnetic", surface_current=12.4))
+
+        g = Geometry()
+        g.add_rectangle(Rectangle(0, 0, width=1, height=1))
+        g.add_arc(CircleArc(Node(0, 0.5), Node(0.5, 0.5), Node(1, 0.5)))
+        g.add_arc(CircleArc(Node(1, 0.5), Node(0.5, 0.5), Node(0, 0.5)))
+        s.add_geometry(g)
+
+        lines = list(s.lines.values())
+        arcs = list(s.circle_arcs.values())
+
+        # the corner is on two lines, the first one is chosen
+        s.assign_boundary_conditions([(0.5, -0.1, "eper"), (1.0, 1.0, "eper"), (0.2, 0.6, "cekla")])
+        self.assertSetEqual(s.boundaries["eper"].assigned, {lines[0].id, lines[1].id})
+        self.assertSetEqual(s.boundaries["cekla"].assigned, {lines[3].id})
+
+        s.assign_arc_boundary_conditions([(0.5, 0.1, "cekla")])
+        self.assertIn(arcs[0].id, s.boundaries["cekla"].assigned)
+        self.assertIs(s.closest_arc(0.5, 1.2), arcs[1])
+        self.assertIs(s.closest_line(0.5, 1.2), lines[2])
+
+        with self.assertRaises(ValueError):
+            s.assign_boundary_conditions([(0.5, 0.5, "eper"), (0, 0, "falsename")])
+
+        # the index follows the new lines
+        g = Geometry()
+        g.add_line(Line(Node(5, 5), Node(6, 5)))
+        s.add_geometry(g)
+        s.assign_boundary_condition(5.5, 5.1, "eper")
+        self.assertIn(list(s.lines.values())[-1].id, s.boundaries["eper"].assigned)
+
+    def test_execute_deduplication(self):
+        launches = []
+
+        def get_snapshot(directory, name):
+            metadata = self.get_metadata()
+            metadata.file_script_name = Path(directory) / f"P_{name}"
+            metadata.file_metrics_name = Path(directory) / f"S_{name}.csv"
+            s = Snapshot(Femm(metadata))
+            s.add_postprocessing("point_value", (0.5, 0.5), "Bx")
+            s.add_geometry(self.get_geometry())
+
+            def execute(cleanup=False, timeout=10):
+                launches.append(name)
+                Path(metadata.file_metrics_name).write_text("Bx, 0.5, 0.5, 1.25\n")
+                return True
+
+            s.platform.execute = execute
+            return s
+
+        with TemporaryDirectory() as d, TemporaryDirectory() as store_dir:
+            # the deduplication is off by default
+            for name in ("x", "y"):
+                s = get_snapshot(d, name)
+                s.export()
+                s.execute()
+            self.assertListEqual(launches, ["x", "y"])
+            launches.clear()
+
+            Snapshot.deduplicate = True
+            Snapshot._solutions = OrderedDict()
+            Snapshot.solution_store = ResultCache(store_dir)
+            avoided = Snapshot.avoided_runs
+            try:
+                for name in ("a", "b"):
+                    s = get_snapshot(d, name)
+                    s.export()
+                    self.assertTrue(s.execute())
+                    self.assertListEqual([0.5, 0.5, 1.25], list(s.retrive_results()["Bx"][0]))
+
+                self.assertListEqual(launches, ["a"])
+                self.assertEqual(Snapshot.avoided_runs, avoided + 1)
+
+                # the solutions are found in the shared store by the other processes
+                Snapshot._solutions = OrderedDict()
+                s = get_snapshot(d, "c")
+                s.export()
+                s.execute()
+                self.assertListEqual(launches, ["a"])
+
+                # a different script is solved
+                s = get_snapshot(d, "d")
+                s.add_postprocessing("point_value", (0.1, 0.1), "Bx")
+                s.export()
+                s.execute()
+                self.assertListEqual(launches, ["a", "d"])
+
+                # only the most recently used solutions are kept in the process
+                Snapshot.max_solutions = 1
+                Snapshot.solution_store = None
+                s = get_snapshot(d, "e")
+                s.add_postprocessing("point_value", (0.2, 0.2), "Bx")
+                s.export()
+                s.execute()
+                s = get_snapshot(d, "f")
+                s.export()
+                s.execute()
+                self.assertListEqual(launches, ["a", "d", "e", "f"])
+                self.assertEqual(len(Snapshot._solutions), 1)
+            finally:
+                Snapshot.deduplicate = False
+                Snapshot.max_solutions = 128
+                Snapshot._solutions = OrderedDict()
+                Snapshot.solution_store = None
+
     def test_retrive_results(self):
         s = self.get_snapshot()
         result_file = Path(s.platform.metadata.file_metrics_name)
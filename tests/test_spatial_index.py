@@ -0,0 +1,75 @@
+import random
+import unittest
+from math import hypot
+
+import numpy as np
+
+from digital_twin_distiller.objects import CircleArc, Line, Node
+from digital_twin_distiller.spatial_index import NearestEdgeIndex, arc_boxes, arc_distances, closest, segment_distances
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def test_segment_distances(self):
+        rnd = random.Random(1)
+        lines = [Line(Node(rnd.uniform(-1, 1), rnd.uniform(-1, 1)), Node(rnd.uniform(-1, 1), rnd.uniform(-1, 1)))]
+        lines.append(Line(Node(0, 0), Node(1, 0)))
+        segments = [(*li.start_pt, *li.end_pt) for li in lines]
+
+        for x, y in ((0.5, 1), (2, 0), (-1, 0), (0.3, -0.2)):
+            d = segment_distances(x, y, segments)
+            self.assertListEqual(d.tolist(), [li.distance_to_point(x, y) for li in lines])
+
+        # zero length segment
+        self.assertAlmostEqual(segment_distances(3, 4, [(0, 0, 0, 0)])[0], 5.0)
+
+    def test_arc_distances(self):
+        arcs = [CircleArc(Node(-1, 0), Node(0, 0), Node(1, 0)), CircleArc(Node(2, 1), Node(1, 1), Node(1, 2))]
+        rows = [(*arc.start_pt, *arc.center_pt, *arc.end_pt) for arc in arcs]
+
+        for x, y in ((0, 0), (0, -5), (0, 5), (-3, 0.1), (1.5, 1.5), (0, 1), (1, 0.5), (2.5, 2.5)):
+            d = arc_distances(x, y, rows)
+            for di, arc in zip(d, arcs):
+                self.assertAlmostEqual(di, arc.distance_to_point(x, y), 12)
+
+        # points over the arc are measured from the arc and not from its start, apex and end points
+        self.assertAlmostEqual(arc_distances(0.6, -0.9, rows[:1])[0], abs(hypot(0.6, 0.9) - 1), 12)
+        self.assertAlmostEqual(arc_distances(1, 1, rows[1:])[0], 1.0, 12)
+        self.assertAlmostEqual(arc_distances(0, 1, rows[1:])[0], hypot(1, 1), 12)
+
+        boxes = arc_boxes(rows)
+        self.assertTrue(np.allclose(boxes, [(-1, -1, 1, 0), (1, 1, 2, 2)]))
+
+    def test_closest(self):
+        self.assertEqual(closest(np.array([3.0, 1.0, 2.0, 1.0])), (1.0, 1))
+        with self.assertRaises(ValueError):
+            closest(np.array([]))
+
+    def test_nearest(self):
+        rnd = random.Random(3)
+        lines = []
+        for _ in range(300):
+            x, y = rnd.randint(0, 20) * 0.5, rnd.randint(0, 20) * 0.5
+            lines.append(Line(Node(x, y), Node(x + 0.5, y)))
+            lines.append(Line(Node(rnd.uniform(-5, 5), rnd.uniform(-5, 5)), Node(rnd.uniform(-5, 5), rnd.uniform(-5, 5))))
+
+        # a long edge, which is tested in every query
+        lines.append(Line(Node(-100, -100), Node(100, 100)))
+
+        segments = np.array([(*li.start_pt, *li.end_pt) for li in lines])
+        boxes = np.hstack((np.minimum(segments[:, :2], segments[:, 2:]), np.maximum(segments[:, :2], segments[:, 2:])))
+        index = NearestEdgeIndex(boxes, lambda x, y, indices: segment_distances(x, y, segments[indices]))
+        self.assertEqual(len(index.large), 1)
+
+        for k in range(500):
+            if k % 2:
+                x, y = rnd.randint(-4, 24) * 0.5, rnd.randint(-4, 24) * 0.5
+            else:
+                x, y = rnd.uniform(-30, 30), rnd.uniform(-30, 30)
+
+            expected = min(range(len(lines)), key=lambda i: lines[i].distance_to_point(x, y))
+            self.assertEqual(index.nearest(x, y), expected)
+
+    def test_empty(self):
+        index = NearestEdgeIndex(np.empty((0, 4)), segment_distances)
+        with self.assertRaises(ValueError):
+            index.nearest(0, 0)
@@ -11,6 +11,25 @@ class TestUtils(unittest.TestCase):
     def test_get_id(self):
         self.assertTrue(u.getID() > 0)
 
+        ids = [u.getID() for _ in range(1000)]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(len({u.get_short_id(Node(id_=id_)) for id_ in ids}), len(ids))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "fork is not available")
+    def test_get_id_forked_process(self):
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write_end, str(u.getID()).encode())
+            os._exit(0)
+
+        os.waitpid(pid, 0)
+        child_id = int(os.read(read_end, 64))
+        os.close(read_end)
+        os.close(write_end)
+
+        self.assertNotEqual(child_id >> 64, u.getID() >> 64)
+
     def test_mirror(self):
         p0 = Node(0, 0)
         p1 = Node(0, 1)